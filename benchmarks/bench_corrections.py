@@ -0,0 +1,121 @@
+"""
+Corrections and QC benchmarks: nitrate concentration, Lanczos filter, CTD QC, magnetic declination
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from EcoFOCIpy.io import nitrates_parser
+from EcoFOCIpy.math import lanzcos, nitrates_corr
+from EcoFOCIpy.math.geomag.geomag import geomag
+from EcoFOCIpy.qc import ctd_qc
+from EcoFOCIpy.testing import synth
+
+from .common import SCALES, TIMEOUT
+
+
+class NitrateConcentration:
+    """calc_nitrate_concentration on 500 SUNA spectra per scale"""
+    params = SCALES
+    param_names = ['scale']
+    timeout = TIMEOUT
+
+    def setup_cache(self):
+        return {scale: synth.suna_csv(f"suna_{scale}x.csv", 500 * scale) for scale in SCALES}
+
+    def setup(self, files, scale):
+        self.suna = nitrates_parser.Suna().parse(files[scale])
+        n = len(self.suna)
+        rng = np.random.default_rng(0)
+        self.ctd = pd.DataFrame({'temperature (degree_C)': rng.normal(4, 1, n),
+                                 'salinity (PSU)': rng.normal(32, 0.2, n),
+                                 'Water_Depth (dbar)': rng.normal(40, 1, n)},
+                                index=self.suna.index)
+        self.ncal = synth.nitrate_calibration()
+
+    def time_calc_nitrate_concentration(self, files, scale):
+        nitrates_corr.calc_nitrate_concentration(self.suna, self.ctd, self.ncal)
+
+    def peakmem_calc_nitrate_concentration(self, files, scale):
+        nitrates_corr.calc_nitrate_concentration(self.suna, self.ctd, self.ncal)
+
+
+class Lanzcos:
+    """35 hour low pass of a year of hourly data per scale"""
+    params = SCALES
+    param_names = ['scale']
+    timeout = TIMEOUT
+
+    def setup(self, scale):
+        t = np.arange(8760 * scale)
+        self.data = (np.sin(2 * np.pi * t / 12.42) + 0.3 * np.sin(2 * np.pi * t / 240)
+                     + np.random.default_rng(0).normal(0, 0.1, t.size))
+
+    def time_lanzcos(self, scale):
+        lanzcos.lanzcos(self.data, dt=1 / 24.0, Cf=35.0)
+
+    def peakmem_lanzcos(self, scale):
+        lanzcos.lanzcos(self.data, dt=1 / 24.0, Cf=35.0)
+
+
+class CTDQC:
+    """run_ctd_qc with every test enabled on 10000 scans per scale"""
+    params = SCALES
+    param_names = ['scale']
+    timeout = TIMEOUT
+
+    config = {
+        'temperature': {'gross_range': {'min': -2, 'max': 30},
+                        'spike': {'threshold': 1.0},
+                        'stuck_value': {'consecutive_limit': 5},
+                        'gradient': {'threshold': 0.5}},
+        'salinity': {'gross_range': {'min': 20, 'max': 36},
+                     'spike': {'threshold': 0.5},
+                     'stuck_value': {'consecutive_limit': 5},
+                     'gradient': {'threshold': 0.2}},
+        'density_inversion': {'threshold': -0.03},
+    }
+
+    def setup(self, scale):
+        n = 10_000 * scale
+        rng = np.random.default_rng(0)
+        pressure = np.linspace(1, 1000, n)
+        self.df = pd.DataFrame({'pressure': pressure,
+                                'temperature': 10 * np.exp(-pressure / 300) + rng.normal(0, 0.01, n),
+                                'salinity': 31 + 3 * (1 - np.exp(-pressure / 200))
+                                + rng.normal(0, 0.005, n)})
+
+    def time_run_ctd_qc(self, scale):
+        ctd_qc.run_ctd_qc(self.df, self.config)
+
+    def peakmem_run_ctd_qc(self, scale):
+        ctd_qc.run_ctd_qc(self.df, self.config)
+
+
+class GeoMag:
+    """WMM declination at 100 positions/dates per scale, the model file is read once"""
+    params = SCALES
+    param_names = ['scale']
+    timeout = TIMEOUT
+
+    def setup(self, scale):
+        n = 100 * scale
+        rng = np.random.default_rng(0)
+        self.lat = rng.uniform(50, 75, n)
+        self.lon = rng.uniform(140, 180, n)
+        self.dates = [datetime.date(2021, 1, 1) + datetime.timedelta(days=int(d))
+                      for d in rng.integers(0, 1500, n)]
+        self.model = geomag.GeoMag()
+
+    def time_declination(self, scale):
+        for lat, lon, date in zip(self.lat, self.lon, self.dates):
+            self.model.GeoMag(lat, -lon, time=date)
+
+
+class GeoMagModel:
+    """Reading the WMM coefficient file"""
+    timeout = TIMEOUT
+
+    def time_load_model(self):
+        geomag.GeoMag()
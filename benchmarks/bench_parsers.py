@@ -0,0 +1,165 @@
+"""
+Parser benchmarks on synthetic files at 1x, 10x and 100x a typical deployment file
+"""
+from EcoFOCIpy.io import (adcp_parser, mtr_parser, nitrates_parser, rcm_parser, sbe_parser,
+                          wetlabs_parser)
+from EcoFOCIpy.testing import synth
+
+from .common import SCALES, TIMEOUT
+
+MTR_COEF = [1.1e-3, 2.4e-4, 1.0e-7]
+
+
+class _ParserBenchmark:
+    """time/peakmem of `reader` on one synthetic file per scale, written once by setup_cache
+
+    Subclasses set `writer(path, nrows)` (a synth function), `reader(path)` and the
+    file `suffix`.  asv keys the setup_cache results on where the method is defined,
+    so every subclass defines its own setup_cache calling write_scales.
+    """
+    params = SCALES
+    param_names = ['scale']
+    timeout = TIMEOUT
+    nrows = 10_000
+    suffix = ''
+    writer = None
+    reader = None
+
+    def write_scales(self):
+        name = type(self).__name__.lower()
+        return {scale: self.writer(f"{name}_{scale}x{self.suffix}", self.nrows * scale)
+                for scale in SCALES}
+
+    def time_parse(self, files, scale):
+        self.reader(files[scale])
+
+    def peakmem_parse(self, files, scale):
+        self.reader(files[scale])
+
+
+class SBE56Cnv(_ParserBenchmark):
+    nrows = 10_000
+    suffix = '.cnv'
+    writer = staticmethod(synth.sbe56_cnv)
+    reader = staticmethod(sbe_parser.sbe56.parse)
+
+    def setup_cache(self):
+        return self.write_scales()
+
+
+class SBE16Cnv(_ParserBenchmark):
+    nrows = 5_000
+    suffix = '.cnv'
+    writer = staticmethod(synth.sbe16_cnv)
+    reader = staticmethod(sbe_parser.sbe16.parse)
+
+    def setup_cache(self):
+        return self.write_scales()
+
+
+class SBE37Csv(_ParserBenchmark):
+    nrows = 10_000
+    suffix = '.csv'
+    writer = staticmethod(synth.sbe37_csv)
+    reader = staticmethod(sbe_parser.sbe37.parse)
+
+    def setup_cache(self):
+        return self.write_scales()
+
+
+class SBE39Csv(_ParserBenchmark):
+    nrows = 10_000
+    suffix = '.csv'
+    writer = staticmethod(synth.sbe39_csv)
+    reader = staticmethod(sbe_parser.sbe39.parse)
+
+    def setup_cache(self):
+        return self.write_scales()
+
+
+class SBE26Tid(_ParserBenchmark):
+    nrows = 10_000
+    suffix = '.tid'
+    writer = staticmethod(synth.sbe26_tid)
+    reader = staticmethod(sbe_parser.sbe26.parse)
+
+    def setup_cache(self):
+        return self.write_scales()
+
+
+def _write_adcp(prefix, nensembles):
+    return synth.adcp_files('.', prefix, nensembles, nbins=20)
+
+
+def _read_adcp(paths):
+    adcp = adcp_parser.adcp(serial_no='synthetic')
+    adcp.load_vel_file(paths['.VEL'])
+    adcp.load_pg_file(paths['.PG'])
+    adcp.load_ein_file(paths['.EIN'])
+
+
+class ADCP(_ParserBenchmark):
+    """.VEL, .PG and .EIN of 20 bin ensembles"""
+    nrows = 500
+    writer = staticmethod(_write_adcp)
+    reader = staticmethod(_read_adcp)
+
+    def setup_cache(self):
+        return self.write_scales()
+
+
+def _read_suna(path):
+    nitrates_parser.Suna().parse(path)
+
+
+class SunaCsv(_ParserBenchmark):
+    nrows = 500
+    suffix = '.csv'
+    writer = staticmethod(synth.suna_csv)
+    reader = staticmethod(_read_suna)
+
+    def setup_cache(self):
+        return self.write_scales()
+
+
+def _read_mtr(path):
+    mtr_parser.MTR(path, 'legacy', mtr_coef=MTR_COEF)
+
+
+class MTRLegacy(_ParserBenchmark):
+    """nrows is the number of 120 value hex blocks"""
+    nrows = 50
+    suffix = '.txt'
+    writer = staticmethod(synth.mtr_legacy)
+    reader = staticmethod(_read_mtr)
+
+    def setup_cache(self):
+        return self.write_scales()
+
+
+def _read_wetlabs(path):
+    wetlabs_parser.wetlabs().parse(path)
+
+
+class WetLabs(_ParserBenchmark):
+    nrows = 10_000
+    suffix = '.txt'
+    writer = staticmethod(synth.wetlabs_txt)
+    reader = staticmethod(_read_wetlabs)
+
+    def setup_cache(self):
+        return self.write_scales()
+
+
+def _read_rcm(path):
+    rcm_parser.rcm().parse(path)
+
+
+class RCM(_ParserBenchmark):
+    nrows = 5_000
+    suffix = '.dat'
+    writer = staticmethod(synth.rcm_dat)
+    reader = staticmethod(_read_rcm)
+
+    def setup_cache(self):
+        return self.write_scales()
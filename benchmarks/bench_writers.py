@@ -0,0 +1,47 @@
+"""
+EcoFOCI_CFnc netCDF writing benchmarks for a moored SBE37 record
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from EcoFOCIpy.io import ncCFsave
+from EcoFOCIpy.metaconfig import load_config
+
+from .common import SCALES, STATICDATA, TIMEOUT
+
+
+class EcoFOCICFncSave:
+    """xarray2netcdf_save of a 30 s, 4 variable record with QC flags, 100000 samples per scale"""
+    params = (SCALES, [True, False])
+    param_names = ['scale', 'compress']
+    timeout = TIMEOUT
+
+    def setup(self, scale, compress):
+        n = 100_000 * scale
+        rng = np.random.default_rng(0)
+        index = pd.date_range('2018-04-30 14:00', periods=n, freq='30s', name='date_time')
+        df = pd.DataFrame({'temperature': rng.normal(4.4, 0.5, n),
+                           'pressure': rng.normal(45, 0.5, n),
+                           'conductivity': rng.normal(3.1, 0.05, n),
+                           'salinity': rng.normal(32, 0.2, n)}, index=index)
+
+        instrument_yaml = load_config.load_config(
+            os.path.join(STATICDATA, 'instr_metaconfig', 'sbe37_cf.yaml'))
+        self.nc = ncCFsave.EcoFOCI_CFnc(df=df, instrument_yaml=instrument_yaml,
+                                        operation_type='mooring')
+        self.nc.expand_dimensions()
+        self.nc.variable_meta_data(variable_keys=list(df.columns), drop_missing=True)
+        self.nc.var_qcflag_init()
+        self.filename = f"sbe37_{scale}x_{compress}.nc"
+
+    def teardown(self, scale, compress):
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    def time_xarray2netcdf_save(self, scale, compress):
+        self.nc.xarray2netcdf_save(self.nc.get_xdf(), filename=self.filename, compress=compress)
+
+    def peakmem_xarray2netcdf_save(self, scale, compress):
+        self.nc.xarray2netcdf_save(self.nc.get_xdf(), filename=self.filename, compress=compress)
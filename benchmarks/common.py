@@ -0,0 +1,11 @@
+"""Settings shared by the benchmark modules"""
+import os
+
+# multiples of the base size of each benchmark
+SCALES = [1, 10, 100]
+
+# seconds, the 100x cases of the row by row parsers take a while
+TIMEOUT = 600
+
+STATICDATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'staticdata')
@@ -14,21 +14,22 @@ instruments including:
 - Optical sensors (WET Labs)
 - Temperature/conductivity loggers
 
-Main modules:
+Main modules (imported on first use):
 
-    - ``instruments``: Device-specific data parsers and processors
-    - ``io``: File I/O operations (NetCDF, CSV, etc.)
+    - ``io``: Instrument parsers and file I/O operations (NetCDF, CSV, etc.)
     - ``math``: Oceanographic calculations and transformations
     - ``qc``: Quality control and data flagging
     - ``plots``: Visualization tools
     - ``epic``: EPIC (Oceanographic Data Interchange Format) utilities
+    - ``metaconfig``: yaml configuration loading
+    - ``testing``: synthetic instrument files for load testing
+    - ``profiling``: opt-in timing and memory report of the processing stages
 
 Example usage:
 
-    >>> import EcoFOCIpy
-    >>> from EcoFOCIpy import instruments
-    >>> ctd = instruments.SBE16(config_file='mooring_config.yaml')
-    >>> data = ctd.load_data('sbe16_raw.cnv')
+    >>> from EcoFOCIpy.io import sbe_parser
+    >>> sbe16_wop_data = sbe_parser.sbe16()
+    >>> (data, header) = sbe16_wop_data.parse(filename='sbe16_raw.cnv')
     >>> print(f"Data shape: {data.shape}")
 
 Version: 0.2.5
@@ -42,21 +43,16 @@ __version__ = "0.2.5"
 __author__ = "NOAA/PMEL EcoFOCI Team"
 __license__ = "BSD-3-Clause"
 __all__ = [
-    "instruments",
     "io",
     "math",
     "qc",
     "plots",
     "epic",
+    "metaconfig",
+    "testing",
+    "profiling",
 ]
 
-try:
-    from . import epic  # noqa: F401
-    from . import instruments  # noqa: F401
-    from . import io  # noqa: F401
-    from . import math  # noqa: F401
-    from . import plots  # noqa: F401
-    from . import qc  # noqa: F401
-except ImportError as e:
-    import warnings
-    warnings.warn(f"Could not import all EcoFOCIpy submodules: {e}")
+from ._lazy import lazy_submodules
+
+__getattr__, __dir__ = lazy_submodules(__name__, __all__)
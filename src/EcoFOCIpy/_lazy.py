@@ -0,0 +1,34 @@
+"""PEP 562 lazy submodule loading for the EcoFOCIpy packages"""
+import importlib
+import sys
+
+
+def lazy_submodules(package, submodules, attributes=None):
+    """Module level ``__getattr__``/``__dir__`` importing submodules on first access
+
+    Used in the package ``__init__`` files so ``import EcoFOCIpy`` (or a process
+    pool worker importing one parser) does not pull in matplotlib, xarray, gsw...
+
+        __all__ = ["sbe_parser", "ncCFsave"]
+        __getattr__, __dir__ = lazy_submodules(__name__, __all__)
+
+    `attributes` maps names re-exported from a submodule to that submodule,
+    eg {"open_instrument": "registry"}.
+    """
+    attributes = dict(attributes or {})
+    submodules = frozenset(submodules) - set(attributes)
+
+    def __getattr__(name):
+        if name in submodules:
+            # import_module also sets the attribute on the package for later lookups
+            return importlib.import_module(f"{package}.{name}")
+        if name in attributes:
+            value = getattr(importlib.import_module(f"{package}.{attributes[name]}"), name)
+            setattr(sys.modules[package], name, value)
+            return value
+        raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package])) | submodules | set(attributes))
+
+    return __getattr__, __dir__
@@ -2,6 +2,7 @@ r"""Module to convert PMEL-EPIC timeword to a python datetime and back
 
     Modifications
     -------------
+    2026: vectorized conversions with datetime64[ms], fill time words to NaT
     2021: Python 3 Compatibility
     2016-11-14: SBELL - create routine to add datetime offset
 
@@ -9,8 +10,17 @@ r"""Module to convert PMEL-EPIC timeword to a python datetime and back
 import datetime
 
 import numpy as np
+import pandas as pd
 from cftime import date2num
 
+#We can used the defined date from the conventions
+#1968-05-23 => 2440000
+EPIC_REF_TIME = np.datetime64('1968-05-23', 'ms')
+EPIC_REF_DAY = 2440000
+MS_PER_DAY = 86400000
+#fill value of integer time words, larger values (eg the EPIC 1e35) are fill too
+EPIC_INT_FILL = np.iinfo(np.int32).max
+
 
 def EPIC2Datetime(timeword_1, timeword_2):
     r"""
@@ -43,16 +53,20 @@ def EPIC2Datetime(timeword_1, timeword_2):
 
     Returns
     -------
-    Outputs : array_like
-              Python datetime structure representing the EPIC datetime
+    Outputs : DatetimeIndex or numpy.datetime64
+              EPIC datetimes with millisecond precision (numpy.datetime64 for scalar input),
+              NaT where either timeword is missing (masked, NaN or a fill value) or
+              time2 is outside of a day
 
     Notes
     -----
-    TODO
+    The conversion is integer arithmetic on whole arrays (datetime64[ms]), no python
+    datetime objects are created.
 
     Examples
     --------
-    TODO
+    >>> EPIC2Datetime([2440000, 2450000], [46800000, 500])
+    DatetimeIndex(['1968-05-23 13:00:00', '1995-10-09 00:00:00.500'], dtype='datetime64[ms]', freq=None)
 
     References
     ----------
@@ -70,7 +84,7 @@ def EPIC2Datetime(timeword_1, timeword_2):
 
     """
 
-    #We can used the defined date from the conventions
+    #The defined date from the conventions (EPIC_REF_TIME, EPIC_REF_DAY)
     #1968-05-23 => 2440000
     #4713-01-01 BCE => 0 (be aware that this uses the julian calendar not the gregorian or mixed
     #   and may result in a 10 day error if the calendar is not appropriately identified)
@@ -78,13 +92,23 @@ def EPIC2Datetime(timeword_1, timeword_2):
     #Using a more modern reference date skips this problem and is sufficient if the dates of all data
     #   are after 1582.
 
-    ref_time_dt = datetime.datetime(1968, 5, 23)
-    ref_time_epic = 2440000
+    #float64 holds both timewords exactly
+    timeword_1 = np.ma.filled(np.ma.asarray(timeword_1, dtype=np.float64), np.nan)
+    timeword_2 = np.ma.filled(np.ma.asarray(timeword_2, dtype=np.float64), np.nan)
+    with np.errstate(invalid='ignore'):
+        missing = (~np.isfinite(timeword_1) | ~np.isfinite(timeword_2)
+                   | (np.abs(timeword_1) >= EPIC_INT_FILL)
+                   | (timeword_2 < 0) | (timeword_2 > MS_PER_DAY))
+    timeword_1 = np.where(missing, EPIC_REF_DAY, timeword_1).astype(np.int64)
+    timeword_2 = np.where(missing, 0, timeword_2).astype(np.int64)
 
-    delta_days = np.array(timeword_1) - ref_time_epic
-    delta_seconds = np.array(timeword_2)/1000
+    epic_dt = (EPIC_REF_TIME
+               + ((timeword_1 - EPIC_REF_DAY) * MS_PER_DAY + timeword_2).astype('timedelta64[ms]'))
+    epic_dt = np.where(missing, np.datetime64('NaT', 'ms'), epic_dt)
 
-    epic_dt = [ref_time_dt + datetime.timedelta(int(a),int(c)) for a,c in zip(delta_days,delta_seconds)]
+    if epic_dt.ndim == 0:
+        return(epic_dt[()])
+    epic_dt = pd.DatetimeIndex(epic_dt.ravel())
 
     return(epic_dt)
 
@@ -104,6 +128,7 @@ def get_UDUNITS(epic_dt, time_since_str='days since 1900-1-1'):
     -------
     Outputs : array_like
               numerical value of date since reference time in units specified
+              (NaN for NaT)
 
     Notes
     -----
@@ -111,6 +136,13 @@ def get_UDUNITS(epic_dt, time_since_str='days since 1900-1-1'):
     See netCDF4.date2num for full examples.  This program is just a wrapper to provide a fixed
     string date in case not provided.
     """
+    if isinstance(epic_dt, (pd.DatetimeIndex, np.ndarray, np.datetime64)):
+        epic_dt = pd.DatetimeIndex(np.atleast_1d(epic_dt))
+        valid = epic_dt.notna()
+        udnum = np.full(len(epic_dt), np.nan)
+        if valid.any():
+            udnum[valid] = date2num(epic_dt[valid].to_pydatetime(), time_since_str)
+        return(udnum)
     udnum = date2num(epic_dt, time_since_str)
 
     return(udnum)
@@ -126,8 +158,9 @@ def Datetime2EPIC(epic_dt):
 
     Parameters
     ----------
-    epic_dt : array of datetime objects
-              Python datetime structure representing the EPIC datetime
+    epic_dt : datetime, list of datetimes, numpy.datetime64 array or DatetimeIndex
+              datetimes to convert (millisecond precision is kept, timezone aware
+              values are converted to UTC)
 
 
     Returns
@@ -135,22 +168,26 @@ def Datetime2EPIC(epic_dt):
     Outputs : array_like    (time, time1)
               time: array of integer values representing true julian day
               time1: array of integer values representing milliseconds since 00:00 UTC
+              ints for a scalar input, lists for a list input, int64 arrays otherwise
+              NaT gives the fill value EPIC_INT_FILL in both words
 
     """
+    scalar = isinstance(epic_dt, (datetime.datetime, np.datetime64))
+    as_list = isinstance(epic_dt, list)
+
+    epic_dt = pd.DatetimeIndex(np.atleast_1d(epic_dt) if scalar else epic_dt)
+    if epic_dt.tz is not None:
+        epic_dt = epic_dt.tz_convert('UTC').tz_localize(None)
+
+    missing = np.asarray(epic_dt.isna())
+    msec = (epic_dt.values.astype('datetime64[ms]') - EPIC_REF_TIME).astype(np.int64)
+    days, time1 = np.divmod(msec, MS_PER_DAY)
+    time = np.where(missing, EPIC_INT_FILL, days + EPIC_REF_DAY)
+    time1 = np.where(missing, EPIC_INT_FILL, time1)
+
+    if scalar:
+        return(int(time[0]), int(time1[0]))
+    if as_list:
+        return(time.tolist(), time1.tolist())
 
-    ref_time_py = datetime.datetime.toordinal(datetime.datetime(1968, 5, 23))
-    ref_time_epic = 2440000
-    offset = ref_time_epic - ref_time_py
-
-    if not isinstance(epic_dt, list):
-        time = offset + epic_dt.toordinal()
-        time1 = int((epic_dt.hour * (60. * 60. * 1000.)) +
-                    (epic_dt.minute * (60. * 1000.)) +
-                    (epic_dt.second * (1000.)))
-    else:
-        time = [offset + x.toordinal() for x in epic_dt]
-        time1 = [int((x.hour * (60. * 60. * 1000.)) +
-                     (x.minute * (60. * 1000.)) +
-                     (x.second * (1000.))) for x in epic_dt]
-
-    return(time, time1 )
+    return(time, time1)
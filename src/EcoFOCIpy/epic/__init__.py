@@ -0,0 +1,12 @@
+"""PMEL-EPIC time conversion and EPIC to CF conversion
+
+Submodules are imported on first access.
+"""
+from .._lazy import lazy_submodules
+
+__all__ = [
+    "EPIC_timeconvert",
+    "epic2cf",
+]
+
+__getattr__, __dir__ = lazy_submodules(__name__, __all__)
@@ -0,0 +1,210 @@
+r"""Convert legacy PMEL-EPIC netCDF files to CF files
+
+EPIC files carry the two word time (time, time2), dimensions named lat/lon with
+longitude positive west, and variables named by EPIC code (eg T_20).  The instrument
+yaml files in staticdata/instr_metaconfig give the EPIC code of each CF variable
+(`epic_key`), which is used to rename the variables and attach their attributes.
+
+    >>> report = epic2cf.batch_convert(glob.glob('archive/*.nc'), 'cf/',
+    ...                                instrument_yaml='staticdata/instr_metaconfig/sbe37_cf.yaml',
+    ...                                max_workers=8)
+
+A manifest (json) in the output directory records each converted file, so an
+interrupted run can be restarted and only converts the remaining or changed files.
+
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import xarray as xr
+
+from ..io import ncCFsave
+from ..metaconfig import load_config
+from .EPIC_timeconvert import EPIC2Datetime
+
+EPIC_DIMS = {'lat': 'latitude', 'lon': 'longitude', 'dep': 'depth'}
+# Conventions of the converted files, as in staticdata/institutional_meta_example.yaml
+CF_CONVENTIONS = 'CF-1.6'
+# global attributes describing the EPIC file layout, dropped on conversion (PROG_CMNT*
+# program comments too); descriptive ones (MOORING, WATER_DEPTH, INST_TYPE, ...) are kept
+EPIC_GLOBALS = ('CREATION_DATE', 'EPIC_FILE_GENERATOR', 'DATA_TYPE', 'DATA_SUBTYPE',
+                'COORD_SYSTEM', 'FILL_FLAG', 'VAR_FILL', 'POS_CONST', 'DEPTH_CONST',
+                'COMPOSITE', 'DRIFTER')
+MANIFEST = 'epic2cf_manifest.json'
+
+
+def epic_cf_names(instrument_yaml):
+    """EPIC variable name and EPIC code lookups of the CF variable names in an instrument yaml
+
+    Returns:
+        ({'T_20': 'temperature', ...}, {20: 'temperature', ...})
+    """
+    by_name, by_code = {}, {}
+    for cf_name, meta in instrument_yaml.items():
+        epic_key = (meta or {}).get('epic_key') if isinstance(meta, dict) else None
+        if not epic_key:
+            continue
+        by_name[epic_key] = cf_name
+        code = epic_key.rsplit('_', 1)[-1]
+        if code.isdigit():
+            by_code[int(code)] = cf_name
+    return by_name, by_code
+
+
+def epic_to_cf(xdf, instrument_yaml, drop_missing=True):
+    """Convert an (open, lazily loaded) EPIC dataset to the EcoFOCI CF layout
+
+    Args:
+        xdf (xarray.Dataset): EPIC dataset opened with decode_times=False
+        instrument_yaml (dict): CF variable attributes with `epic_key` entries
+        drop_missing (bool, optional): drop variables not in the yaml. Defaults to True.
+
+    Returns:
+        xarray.Dataset with a datetime64 time and CF variable names and attributes,
+        `Conventions` set to CF_CONVENTIONS and the EPIC_GLOBALS removed
+    """
+    time = EPIC2Datetime(xdf['time'].values, xdf['time2'].values)
+    xdf = xdf.drop_vars('time2').assign_coords(time=time.to_numpy())
+    xdf = xdf.rename({k: v for k, v in EPIC_DIMS.items() if k in xdf.variables})
+
+    if 'longitude' in xdf.variables and 'west' in xdf['longitude'].attrs.get('units', ''):
+        xdf = xdf.assign_coords(longitude=-1 * xdf['longitude'])
+
+    by_name, by_code = epic_cf_names(instrument_yaml)
+    rename, drop = {}, []
+    for name, var in xdf.data_vars.items():
+        cf_name = by_name.get(name) or by_code.get(_epic_code(var.attrs.get('epic_code')))
+        if cf_name:
+            rename[name] = cf_name
+        elif drop_missing:
+            drop.append(name)
+    xdf = xdf.drop_vars(drop).rename(rename)
+
+    for name in xdf.variables:
+        if name in instrument_yaml:
+            attrs, packing = ncCFsave.packing_encoding(instrument_yaml[name])
+            xdf[name].attrs = attrs
+            xdf[name].encoding = packing
+
+    xdf.attrs = {k: v for k, v in xdf.attrs.items()
+                 if k not in EPIC_GLOBALS and not k.startswith('PROG_CMNT')}
+    xdf.attrs['Conventions'] = CF_CONVENTIONS
+
+    return xdf.transpose(*[d for d in ('time', 'depth', 'latitude', 'longitude')
+                           if d in xdf.dims], ...)
+
+
+def _epic_code(code):
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None
+
+
+def convert_epic_file(filename, output_dir, instrument_yaml, drop_missing=True):
+    """Convert one EPIC file, written as <output_dir>/<same name>. Returns the output path"""
+    if not isinstance(instrument_yaml, dict):
+        instrument_yaml = load_config.load_config(instrument_yaml)
+
+    output = os.path.join(output_dir, os.path.basename(filename))
+    if os.path.abspath(output) == os.path.abspath(filename):
+        raise ValueError(f"{filename} would be overwritten, choose another output_dir")
+    with xr.open_dataset(filename, decode_times=False) as epic:
+        xdf = epic_to_cf(epic, instrument_yaml, drop_missing=drop_missing)
+
+        nc = ncCFsave.EcoFOCI_CFnc(df=xdf, instrument_yaml=instrument_yaml)
+        nc.var_qcflag_init()
+        history = epic.attrs.get('history', '')
+        nc.history(history_text=(history + '\n' if history else '')
+                   + f"Converted from PMEL-EPIC {os.path.basename(filename)}.")
+        nc.xarray2netcdf_save(nc.get_xdf(), filename=output, format='NETCDF4')
+
+    return output
+
+
+def _convert_task(task):
+    filename, output_dir, instrument_yaml, drop_missing = task
+    try:
+        return filename, convert_epic_file(filename, output_dir, instrument_yaml,
+                                           drop_missing), None
+    except Exception as e:
+        return filename, None, f"{type(e).__name__}: {e}"
+
+
+def _file_state(filename):
+    """Size and modification time, None for a missing or unreadable file"""
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def batch_convert(filenames, output_dir, instrument_yaml, max_workers=None,
+                  drop_missing=True, overwrite=False):
+    """Convert EPIC files to CF in a process pool
+
+    Files already converted in an earlier run (same size and modification time,
+    output present) are skipped unless overwrite=True.
+
+    Args:
+        filenames (list): EPIC netCDF files
+        output_dir (str): directory for the CF files and the manifest, created if missing
+        instrument_yaml (dict or str): instrument yaml (or its path) with `epic_key` entries
+        max_workers (int, optional): worker processes, 1 converts in this process
+        drop_missing (bool, optional): drop variables not in the yaml. Defaults to True.
+        overwrite (bool, optional): convert every file again. Defaults to False.
+
+    Returns:
+        DataFrame with the file, output, status ('converted', 'skipped', 'failed') and error
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if not isinstance(instrument_yaml, dict):
+        instrument_yaml = load_config.load_config(instrument_yaml)
+    instrument_yaml = json.loads(json.dumps(instrument_yaml))  # plain dicts for the workers
+
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path) and not overwrite:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    rows, tasks = [], []
+    for filename in sorted(os.path.abspath(f) for f in filenames):
+        entry = manifest.get(filename, {})
+        state = _file_state(filename)
+        if (state is not None and entry.get('status') == 'converted'
+                and entry.get('state') == state and os.path.exists(entry.get('output', ''))):
+            rows.append((filename, entry['output'], 'skipped', None))
+        else:
+            tasks.append((filename, output_dir, instrument_yaml, drop_missing))
+
+    if max_workers == 1:
+        results = map(_convert_task, tasks)
+        rows += _record(results, manifest, manifest_path)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            rows += _record(executor.map(_convert_task, tasks), manifest, manifest_path)
+
+    report = pd.DataFrame(rows, columns=['file', 'output', 'status', 'error'])
+    counts = report['status'].value_counts()
+    print(f"[INFO] EPIC to CF: {counts.get('converted', 0)} converted, "
+          f"{counts.get('skipped', 0)} skipped, {counts.get('failed', 0)} failed")
+    return report
+
+
+def _record(results, manifest, manifest_path):
+    """Write each result to the manifest as it completes"""
+    rows = []
+    for filename, output, error in results:
+        status = 'failed' if error else 'converted'
+        manifest[filename] = {'output': output, 'status': status, 'error': error,
+                              'state': _file_state(filename)}
+        tmp_path = manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+        rows.append((filename, output, status, error))
+    return rows
@@ -0,0 +1,31 @@
+"""Instrument parsers, netCDF/zarr writers and erddap access
+
+Submodules are imported on first access.  ``open_instrument`` identifies the
+instrument of a data file and reads it with the matching parser.
+"""
+from .._lazy import lazy_submodules
+
+__all__ = [
+    "adcp_parser",
+    "erddap",
+    "mtr_parser",
+    "ncCFsave",
+    "nitrates_parser",
+    "prawler_parser",
+    "prooceanus_parser",
+    "rbr_parser",
+    "rcm_parser",
+    "registry",
+    "sbe_ctd_parser",
+    "sbe_parser",
+    "wetlabs_parser",
+    "wpak_parser",
+    "open_instrument",
+    "open_instruments",
+    "sniff",
+]
+
+__getattr__, __dir__ = lazy_submodules(__name__, __all__,
+                                       attributes={"open_instrument": "registry",
+                                                   "open_instruments": "registry",
+                                                   "sniff": "registry"})
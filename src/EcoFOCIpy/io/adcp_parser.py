@@ -14,6 +14,8 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 import numpy as np
 import pandas as pd
 
+from ..profiling import profiled
+
 try:
     import EcoFOCIpy.math.geomag.geomag.geomag as geomag
     import EcoFOCIpy.math.geotools as geotools
@@ -104,6 +106,7 @@ class adcp(object):
 
         return df
 
+    @profiled()
     def load_vel_file(
         self, file_path: Optional[Union[str, Path]] = None, datetime_index: bool = True
     ) -> pd.DataFrame:
@@ -120,6 +123,7 @@ class adcp(object):
         self.vel_df = self._load_data_file(".VEL", cols, file_path, datetime_index)
         return self.vel_df
 
+    @profiled()
     def load_pg_file(
         self, file_path: Optional[Union[str, Path]] = None, datetime_index: bool = True
     ) -> pd.DataFrame:
@@ -144,6 +148,7 @@ class adcp(object):
         self.pg_df = self._load_data_file(".PG", cols, file_path, datetime_index)
         return self.pg_df
 
+    @profiled()
     def load_ein_file(
         self, file_path: Optional[Union[str, Path]] = None, datetime_index: bool = True
     ) -> pd.DataFrame:
@@ -152,6 +157,7 @@ class adcp(object):
         self.ein_df = self._load_data_file(".EIN", cols, file_path, datetime_index)
         return self.ein_df
 
+    @profiled()
     def load_scal_file(
         self, file_path: Optional[Union[str, Path]] = None, datetime_index: bool = True
     ) -> pd.DataFrame:
@@ -201,6 +207,7 @@ class adcp(object):
 
         return lines, self.setup
 
+    @profiled(rows='self.vel_df')
     def mag_dec_corr(
         self, lat: float, lon_w: float, deployment_date: pd.Timestamp
     ) -> float:
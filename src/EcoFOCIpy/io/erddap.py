@@ -1,8 +1,34 @@
 """Contains a collection erddap access tools
 
+Selections (profile_id, time range, bounding box and variables) are sent to the
+server as tabledap constraints so only the requested rows and columns are
+transferred, by default as a netCDF (.nc) table rather than text.
+
+Responses can be kept in a local ErddapCache (see below).
+
 """
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import netCDF4
+import pandas as pd
 import requests
+import xarray as xr
 from erddapy import ERDDAP
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# tabledap file types understood by erddap_read
+ERDDAP_RESPONSES = ['nc', 'csvp', 'parquet']
+
+# seconds a cached response is used before revalidation, None never expires
+ERDDAP_CACHE_TTL = {'final': None, 'preliminary': 3600}
 
 
 def test_erddap_connection(url=''):
@@ -12,54 +38,426 @@ def test_erddap_connection(url=''):
     assert r.raise_for_status() is None
 
 
-def erddapCruiseretrieve(url=None, cruiseid=None, qclevel='final'):
-    """Retrieve a single cast from a FOCI cruise hosted via erddap
+def erddap_constraints(profile_id=None, timeseries_id=None, time_range=None, bbox=None):
+    """Build tabledap constraints
 
     Args:
-        url (str, optional): url to foci hosted erddap. Defaults to ''.
-        cruiseid (str, optional): standard foci cruise id without hyphens. eg dy2103 Defaults to ''.
-        qclevel (str, optional): preliminary or final. Defaults to 'final'.
+        profile_id (str, optional): matched anywhere in profile_id, eg '001'
+        timeseries_id (str, optional): exact timeseries_id, eg '19bs2c_s37_0064m'
+        time_range (tuple, optional): (start, end) as strings or datetimes, either may be None
+        bbox (tuple, optional): (min lon, max lon, min lat, max lat)
+
+    Returns:
+        dict of erddapy constraints
     """
+    constraints = {}
+    if profile_id:
+        constraints['profile_id=~'] = f".*{profile_id}.*"
+    if timeseries_id:
+        constraints['timeseries_id='] = timeseries_id
+    if time_range:
+        start, end = time_range
+        if start is not None:
+            constraints['time>='] = pd.Timestamp(start).strftime('%Y-%m-%dT%H:%M:%SZ')
+        if end is not None:
+            constraints['time<='] = pd.Timestamp(end).strftime('%Y-%m-%dT%H:%M:%SZ')
+    if bbox:
+        constraints.update({'longitude>=': bbox[0], 'longitude<=': bbox[1],
+                            'latitude>=': bbox[2], 'latitude<=': bbox[3]})
+    return constraints
+
+
+def erddap_request_url(url=None, dataset_id=None, constraints=None, variables=None,
+                       response='nc'):
+    """tabledap download url with the constraints and variables applied by the server"""
+    assert response in ERDDAP_RESPONSES, f"response must be one of {ERDDAP_RESPONSES}"
 
     e = ERDDAP(
       server=url,
       protocol="tabledap",
+      response=response,
     )
+    e.dataset_id = dataset_id
+    e.constraints = constraints or {}
+    e.variables = variables
+
+    return e.get_download_url()
+
+
+def erddap_read(content, response='nc'):
+    """Convert a tabledap response body (bytes) or a downloaded file (path) to a DataFrame
+
+    Columns are named as in the csvp response, eg 'time (UTC)' and
+    'temperature (degree_C)', so the result matches erddapy's to_pandas().
+    Times are returned as (timezone naive, UTC) datetimes for every response.
+    """
+    is_bytes = isinstance(content, bytes)
+    if response == 'csvp':
+        df = pd.read_csv(io.BytesIO(content) if is_bytes else content)
+        for column in df.columns:
+            if column.endswith('(UTC)'):
+                df[column] = pd.to_datetime(df[column], utc=True).dt.tz_localize(None)
+        return df
+    if response == 'parquet':
+        return pd.read_parquet(io.BytesIO(content) if is_bytes else content)
+
+    if is_bytes:
+        nc = netCDF4.Dataset('erddap.nc', memory=content)
+    else:
+        nc = netCDF4.Dataset(content)
+    with xr.open_dataset(xr.backends.NetCDF4DataStore(nc)) as xdf:  # closes nc
+        xdf = xdf.load()
+
+    columns = {}
+    for name, var in xdf.variables.items():
+        if name not in xdf.dims:
+            units = 'UTC' if var.dtype.kind == 'M' else var.attrs.get('units')
+            columns[name] = f"{name} ({units})" if units else name
+    df = xdf.reset_coords().to_dataframe().reset_index(drop=True)
+
+    return df[list(columns)].rename(columns=columns)
+
+
+def _download(download_url, response='nc', session=None, timeout=300, headers=None):
+    """GET a tabledap url, returns (DataFrame or None if not modified, response headers)"""
+    r = (session or requests).get(download_url, timeout=timeout, headers=headers)
+    if r.status_code == 304:
+        return None, r.headers
+    if r.status_code == 404 and 'no matching results' in r.text.lower():
+        return pd.DataFrame(), r.headers
+    r.raise_for_status()
+
+    return erddap_read(r.content, response), r.headers
+
 
-    e.dataset_id = f'CTD_{cruiseid}_{qclevel}'
+def erddap_retrieve(url=None, dataset_id=None, constraints=None, variables=None,
+                    response='nc', session=None, timeout=300, cache=None, qclevel=None):
+    """Download a constrained tabledap subset as a DataFrame
 
-    df = e.to_pandas(parse_dates=True)
+    Args:
+        url (str): erddap server url, eg 'https://host/erddap'
+        dataset_id (str): erddap dataset id
+        constraints (dict, optional): erddapy constraints, see erddap_constraints
+        variables (list, optional): variables to return. Defaults to all.
+        response (str, optional): 'nc', 'csvp' or 'parquet'. Defaults to 'nc'.
+        session (requests.Session, optional): reuse a connection pool
+        timeout (int, optional): seconds. Defaults to 300.
+        cache (ErddapCache, optional): local response cache
+        qclevel (str, optional): 'final' or 'preliminary', sets the cache lifetime
+
+    Returns:
+        DataFrame, empty if nothing matched the constraints
+    """
+    download_url = erddap_request_url(url, dataset_id, constraints, variables, response)
+    if cache is not None:
+        return cache.retrieve(download_url, response=response, qclevel=qclevel,
+                              session=session, timeout=timeout)
 
+    df, _ = _download(download_url, response, session, timeout)
     return df
 
-def erddapCTDretrieve(url=None, cruiseid=None, concastno='001', qclevel='final'):
+
+def erddap_session(max_connections=8, retries=3, backoff_factor=0.5):
+    """requests Session with a connection pool and retries on connection errors and 429/5xx"""
+    retry = Retry(total=retries, backoff_factor=backoff_factor,
+                  status_forcelist=[429, 500, 502, 503, 504], allowed_methods=['GET', 'HEAD'])
+    adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections,
+                          max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _stream_to_file(download_url, path, session, timeout=300, chunk_size=2**20):
+    """Stream a tabledap response to path, returns False if nothing matched"""
+    with session.get(download_url, timeout=timeout, stream=True) as r:
+        if r.status_code == 404 and 'no matching results' in r.text.lower():
+            return False
+        r.raise_for_status()
+        with open(path, 'wb') as f:
+            for chunk in r.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+    return True
+
+
+def _request_name(dataset_id, constraints=None):
+    """'datasets_Mooring_19bs2c_final:19bs2c_s37_0064m' for unnamed bulk requests"""
+    return ':'.join([dataset_id] + [str(v) for v in (constraints or {}).values()])
+
+
+def erddap_bulk_retrieve(url=None, datasets=None, variables=None, response='nc',
+                         max_workers=4, retries=3, output_dir=None, timeout=300, cache=None):
+    """Retrieve many tabledap subsets concurrently over one pooled session
+
+    Args:
+        url (str): erddap server url
+        datasets (list or dict): [(dataset_id, constraints), ...] or
+            {name: (dataset_id, constraints)}, constraints may be None
+        variables (list, optional): variables to return. Defaults to all.
+        response (str, optional): 'nc', 'csvp' or 'parquet'. Defaults to 'nc'.
+        max_workers (int, optional): concurrent requests (and pooled connections). Defaults to 4.
+        retries (int, optional): retries per request on connection errors/429/5xx. Defaults to 3.
+        output_dir (str, optional): keep the downloaded files here, named `<name>.<response>`.
+            Defaults to a temporary directory that is removed.
+        timeout (int, optional): seconds per request. Defaults to 300.
+        cache (ErddapCache, optional): serve and store responses through a cache
+            (responses are then held in memory rather than streamed to disk).
+
+    Returns:
+        dict of {name: DataFrame}, names are the dict keys or `dataset_id:constraint values`
+
+    Example:
+    --------
+    >>> moorings = {inst: (f'datasets_Mooring_{inst[:6]}_final', {'timeseries_id=': inst})
+    ...             for inst in ['19bs2c_s37_0064m', '20bs2c_s37_0064m']}
+    >>> data = erddap_bulk_retrieve(url, moorings, max_workers=8)
+    """
+    if not isinstance(datasets, dict):
+        datasets = {_request_name(d, c): (d, c) for d, c in datasets}
+
+    session = erddap_session(max_connections=max_workers, retries=retries)
+    tmp_dir = None
+    if output_dir is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        output_dir = tmp_dir.name
+    os.makedirs(output_dir, exist_ok=True)
+
+    def fetch(name):
+        dataset_id, constraints = datasets[name]
+        if cache is not None:
+            return erddap_retrieve(url, dataset_id, constraints, variables, response,
+                                   session=session, timeout=timeout, cache=cache,
+                                   qclevel=dataset_id.rsplit('_', 1)[-1])
+        download_url = erddap_request_url(url, dataset_id, constraints, variables, response)
+        path = os.path.join(output_dir, f"{name.replace(os.sep, '_')}.{response}")
+        if not _stream_to_file(download_url, path, session, timeout):
+            return pd.DataFrame()
+        return erddap_read(path, response)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = dict(zip(datasets, executor.map(fetch, datasets)))
+    finally:
+        session.close()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    return results
+
+
+def default_cache_dir():
+    """Response cache location, ``$ECOFOCIPY_ERDDAP_CACHE`` or ~/.cache/EcoFOCIpy/erddap"""
+    return os.environ.get('ECOFOCIPY_ERDDAP_CACHE',
+                          os.path.join(os.path.expanduser('~'), '.cache', 'EcoFOCIpy',
+                                       'erddap'))
+
+
+class ErddapCache(object):
+    """
+    On disk cache of tabledap responses.
+
+    Entries are keyed on the download url, which holds the dataset_id, constraints,
+    variables and response type, and stored as parquet (pickle if pyarrow is not
+    installed) with an ``index.json``.  An entry is used without contacting the
+    server for the TTL of its QC level (``final`` never expires), "no matching
+    results" responses for at most ``negative_ttl`` seconds so data added to a
+    dataset later are found.  Expired entries are revalidated with If-None-Match/If-Modified-Since when the server sent an
+    ETag or Last-Modified header, and the least recently used entries are
+    removed once the cache is larger than ``max_bytes``.
+
+    Example:
+    --------
+    >>> cache = ErddapCache()
+    >>> df = erddapCTDretrieve(url, cruiseid='dy1805', concastno='001', cache=cache)
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=2 * 1024**3, ttl=None, default_ttl=3600,
+                 negative_ttl=3600):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.ttl = dict(ERDDAP_CACHE_TTL, **(ttl or {}))
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+        self.index_path = os.path.join(self.cache_dir, 'index.json')
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index = self._read_index()
+        self._lock = threading.RLock()
+        try:
+            import pyarrow  # noqa: F401
+            self.suffix = '.parquet'
+        except ImportError:
+            self.suffix = '.pkl'
+
+    def _read_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        with open(self.index_path, 'r') as f:
+            return json.load(f)
+
+    def _write_index(self):
+        tmp_path = f"{self.index_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def key(download_url):
+        return hashlib.sha256(download_url.encode('utf-8')).hexdigest()
+
+    def _path(self, entry):
+        return os.path.join(self.cache_dir, entry['file'])
+
+    def size(self):
+        """Bytes used by the cached responses"""
+        with self._lock:
+            return sum(entry['size'] for entry in self.index.values())
+
+    def is_fresh(self, entry):
+        ttl = self.ttl.get(entry.get('qclevel'), self.default_ttl)
+        if entry.get('empty'):
+            ttl = self.negative_ttl if ttl is None else min(ttl, self.negative_ttl)
+        return ttl is None or time.time() - entry['fetched'] < ttl
+
+    def get(self, download_url):
+        """Cached DataFrame for a url (regardless of age) or None"""
+        with self._lock:
+            entry = self.index.get(self.key(download_url))
+            if entry is None or not os.path.exists(self._path(entry)):
+                return None
+            entry['accessed'] = time.time()
+        if self.suffix == '.parquet':
+            return pd.read_parquet(self._path(entry))
+        return pd.read_pickle(self._path(entry))
+
+    def put(self, download_url, df, qclevel=None, headers=None):
+        """Store a DataFrame for a url"""
+        headers = headers or {}
+        digest = self.key(download_url)
+        filename = digest + self.suffix
+        path = os.path.join(self.cache_dir, filename)
+        if self.suffix == '.parquet':
+            df.to_parquet(path)
+        else:
+            df.to_pickle(path)
+
+        now = time.time()
+        with self._lock:
+            self.index[digest] = {
+                'url': download_url, 'file': filename, 'qclevel': qclevel,
+                'fetched': now, 'accessed': now, 'size': os.path.getsize(path),
+                'etag': headers.get('ETag'), 'last_modified': headers.get('Last-Modified'),
+                'empty': df.empty,
+            }
+            self.evict()
+            self._write_index()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            for digest, entry in sorted(self.index.items(), key=lambda e: e[1]['accessed']):
+                if self.size() <= self.max_bytes:
+                    break
+                if os.path.exists(self._path(entry)):
+                    os.remove(self._path(entry))
+                del self.index[digest]
+
+    def clear(self):
+        with self._lock:
+            for entry in self.index.values():
+                if os.path.exists(self._path(entry)):
+                    os.remove(self._path(entry))
+            self.index = {}
+            self._write_index()
+
+    def retrieve(self, download_url, response='nc', qclevel=None, session=None, timeout=300):
+        """Cached DataFrame if fresh or not modified on the server, otherwise download it"""
+        digest = self.key(download_url)
+        with self._lock:
+            entry = self.index.get(digest)
+            entry = dict(entry) if entry is not None else None
+        headers = {}
+        if entry is not None:
+            if self.is_fresh(entry):
+                df = self.get(download_url)
+                if df is not None:
+                    return df
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        df, response_headers = _download(download_url, response, session, timeout,
+                                         headers=headers or None)
+        if df is None:
+            df = self.get(download_url)
+            if df is not None:
+                with self._lock:
+                    if digest in self.index:
+                        self.index[digest]['fetched'] = time.time()
+                        self._write_index()
+                return df
+            df, response_headers = _download(download_url, response, session, timeout)
+
+        self.put(download_url, df, qclevel=qclevel or (entry or {}).get('qclevel'),
+                 headers=response_headers)
+        return df
+
+
+def erddapCruiseretrieve(url=None, cruiseid=None, qclevel='final', variables=None,
+                         time_range=None, bbox=None, response='nc', cache=None):
     """Retrieve a single cast from a FOCI cruise hosted via erddap
 
     Args:
         url (str, optional): url to foci hosted erddap. Defaults to ''.
         cruiseid (str, optional): standard foci cruise id without hyphens. eg dy2103 Defaults to ''.
-        concastno (str, optional): three digit foci consecutive cast number. Defaults to '001'.
         qclevel (str, optional): preliminary or final. Defaults to 'final'.
+        variables (list, optional): variables to return. Defaults to all.
+        time_range (tuple, optional): (start, end) of the casts to return.
+        bbox (tuple, optional): (min lon, max lon, min lat, max lat) of the casts to return.
+        response (str, optional): 'nc', 'csvp' or 'parquet'. Defaults to 'nc'.
+        cache (ErddapCache, optional): local response cache, see ErddapCache.
     """
 
-    e = ERDDAP(
-      server=url,
-      protocol="tabledap",
-    )
+    df = erddap_retrieve(url=url,
+                         dataset_id=f'CTD_{cruiseid}_{qclevel}',
+                         constraints=erddap_constraints(time_range=time_range, bbox=bbox),
+                         variables=variables,
+                         response=response,
+                         cache=cache,
+                         qclevel=qclevel)
+
+    return df
 
-    e.dataset_id = f'CTD_{cruiseid}_{qclevel}'
+def erddapCTDretrieve(url=None, cruiseid=None, concastno='001', qclevel='final',
+                      variables=None, response='nc', cache=None):
+    """Retrieve a single cast from a FOCI cruise hosted via erddap
 
-    df = e.to_pandas(parse_dates=True)
+    Only the rows of the requested cast are downloaded (profile_id is matched by the server).
 
-    try:
-        df = df[df.profile_id.str.contains(concastno)]
-    except:
-        df = df.dropna()[df.dropna().profile_id.str.contains(concastno)]
+    Args:
+        url (str, optional): url to foci hosted erddap. Defaults to ''.
+        cruiseid (str, optional): standard foci cruise id without hyphens. eg dy2103 Defaults to ''.
+        concastno (str, optional): three digit foci consecutive cast number. Defaults to '001'.
+        qclevel (str, optional): preliminary or final. Defaults to 'final'.
+        variables (list, optional): variables to return. Defaults to all.
+        response (str, optional): 'nc', 'csvp' or 'parquet'. Defaults to 'nc'.
+        cache (ErddapCache, optional): local response cache, see ErddapCache.
+    """
+
+    df = erddap_retrieve(url=url,
+                         dataset_id=f'CTD_{cruiseid}_{qclevel}',
+                         constraints=erddap_constraints(profile_id=concastno),
+                         variables=variables,
+                         response=response,
+                         cache=cache,
+                         qclevel=qclevel)
 
     return df
 
 
-def erddapMooredInstretrieve(url=None, mooringid=None, qclevel='final', instrid=None):
+def erddapMooredInstretrieve(url=None, mooringid=None, qclevel='final', instrid=None,
+                             variables=None, time_range=None, response='nc', cache=None):
     """Retrieve a single instrument from a FOCI mooring hosted via erddap
 
     Args:
@@ -67,23 +465,19 @@ def erddapMooredInstretrieve(url=None, mooringid=None, qclevel='final', instrid=
         cruiseid (str, optional): standard foci mooring id without hyphens. eg 19bs2c Defaults to ''.
         instrid (str, optional): full instrument reference - 19bs2c_s37_0064m - usually the archived filenmame.
         qclevel (str, optional): preliminary or final. Defaults to 'final'.
+        variables (list, optional): variables to return. Defaults to all.
+        time_range (tuple, optional): (start, end) of the records to return.
+        response (str, optional): 'nc', 'csvp' or 'parquet'. Defaults to 'nc'.
+        cache (ErddapCache, optional): local response cache, see ErddapCache.
     """
 
-    e = ERDDAP(
-      server=url,
-      protocol="tabledap",
-    )
-
-    e.dataset_id = f'datasets_Mooring_{mooringid}_{qclevel}'
+    df = erddap_retrieve(url=url,
+                         dataset_id=f'datasets_Mooring_{mooringid}_{qclevel}',
+                         constraints=erddap_constraints(timeseries_id=instrid,
+                                                        time_range=time_range),
+                         variables=variables,
+                         response=response,
+                         cache=cache,
+                         qclevel=qclevel)
 
-    if instrid:
-        e.constraints = {'timeseries_id=': instrid}
-
-    df = e.to_pandas(parse_dates=True)
-
-    try:
-        df = df[df['timeseries_id'] == instrid].dropna(how='all', axis=1)
-    except:
-        df = df
-
-    return df
+    return df.dropna(how='all', axis=1)
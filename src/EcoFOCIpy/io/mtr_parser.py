@@ -10,6 +10,8 @@ import datetime
 import numpy as np
 import pandas as pd
 
+from ..profiling import profiled
+
 
 class MTR(object):
     """
@@ -26,6 +28,7 @@ class MTR(object):
                        legacy MTR files. It is `None` for MTRduino files.
     """
 
+    @profiled(name='mtr_parser.MTR', rows='self.data')
     def __init__(self, filename, version, mtr_coef=None, model_factor=4.0e+08):
         """
         Initializes the MTR object by loading and parsing the data file.
@@ -7,14 +7,498 @@ These include:
 * adding variable attributes
 * adding metadata
 * saving to netcdf
+* saving to zarr
 
 """
 
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 
+import netCDF4
 import numpy as np
+import pandas as pd
 import xarray as xr
 
+from ..profiling import profiled
+
+
+QC_FILL_VALUE = -127
+QC_FLAG_MEANINGS = (
+    "no_qc_performed good_data probably_good_data bad_data_potentially_correctable "
+    "bad_data value_changed not_used nominal_value interpolated_value missing_value"
+)
+
+# netCDF packing keys accepted from the instrument yaml `encoding` block
+PACKING_KEYS = ("dtype", "scale_factor", "add_offset", "_FillValue")
+# values per compressed chunk (~8MB of float64)
+CHUNK_ELEMENTS = 2**20
+# values per zarr chunk (~512kB of float64), smaller so a deployment record is split
+# over several chunks that the xarray2zarr threads write concurrently
+ZARR_CHUNK_ELEMENTS = 2**16
+
+
+def qcflag_to_bitmask(flags):
+    """Convert QC flag values (0-9) to bit field values, flag n -> 2**n"""
+    return np.left_shift(1, np.asarray(flags, dtype=np.int16))
+
+
+def qcflag_encoding(xdf):
+    """netCDF encoding for the `_QC` variables of a dataset
+
+    Flags are written as int8 (int16 for bit fields with `flag_masks`), even if they were
+    promoted to int64 or float along the way (eg by concatenation or assignment).
+    """
+    encoding = {}
+    for name in xdf.variables:
+        if "_QC" not in str(name):
+            continue
+        encoding[name] = {
+            "dtype": np.int16 if "flag_masks" in xdf[name].attrs else np.int8,
+            "_FillValue": QC_FILL_VALUE,
+        }
+    return encoding
+
+
+def packing_encoding(attrs):
+    """Split an instrument yaml variable entry into attributes and netCDF packing
+
+    A variable entry may carry an `encoding` block, eg
+
+        nitrate:
+          long_name: ...
+          encoding:
+            dtype: float32
+
+        absorbance_254nm:
+          long_name: ...
+          encoding:
+            dtype: int16
+            scale_factor: 0.0001
+            add_offset: 0.0
+            _FillValue: -32768
+
+    Returns:
+        (attrs without the `encoding` block, packing dict limited to PACKING_KEYS)
+    """
+    attrs = dict(attrs)
+    packing = attrs.pop("encoding", None) or {}
+    return attrs, {k: v for k, v in packing.items() if k in PACKING_KEYS}
+
+
+def time_chunksizes(shape, dims, time_dim="time", chunk_elements=CHUNK_ELEMENTS):
+    """Chunk shape for time series access
+
+    Non-time dimensions (depth, latitude, longitude, spectral bins...) are kept whole so
+    a chunk holds complete records, and as many time steps as fit in `chunk_elements`.
+    """
+    other = int(np.prod([n for d, n in zip(dims, shape) if d != time_dim]))
+    ntime = max(1, chunk_elements // max(other, 1))
+    return tuple(
+        min(n, ntime) if d == time_dim else n for d, n in zip(dims, shape)
+    )
+
+
+def plan_encoding(xdf, format="NETCDF4", complevel=4, shuffle=True, compress=True,
+                  time_dim="time", chunk_elements=CHUNK_ELEMENTS):
+    """Build the `to_netcdf` encoding for a dataset
+
+    * time is written as float64 days since 1900-01-01
+    * `_QC` variables are int8 (see `qcflag_encoding`)
+    * packing (float32 or scale_factor/add_offset) from the variable encoding, usually set
+      from the instrument yaml by `EcoFOCI_CFnc.variable_meta_data`
+    * zlib/shuffle compression with time aligned chunks (netCDF4 formats only)
+
+    Args:
+        xdf (xarray dataset): dataset to be written
+        format (str, optional): netCDF format. Defaults to 'NETCDF4'.
+        complevel (int, optional): zlib level 1-9. Defaults to 4.
+        shuffle (bool, optional): byte shuffle filter. Defaults to True.
+        compress (bool, optional): compress and chunk variables. Defaults to True.
+        time_dim (str, optional): record dimension. Defaults to 'time'.
+        chunk_elements (int, optional): max values per chunk. Defaults to CHUNK_ELEMENTS.
+    """
+    compress = compress and str(format).upper().startswith("NETCDF4")
+
+    encoding = {}
+    for name, var in xdf.variables.items():
+        enc = {k: v for k, v in var.encoding.items() if k in PACKING_KEYS}
+        if name == time_dim:
+            enc.update({"units": "days since 1900-01-01", "dtype": "float64"})
+        if compress and var.ndim and var.size and var.dtype.kind in "biufcM":
+            enc.update({"zlib": True, "complevel": complevel, "shuffle": shuffle,
+                        "chunksizes": time_chunksizes(var.shape, var.dims, time_dim,
+                                                      chunk_elements)})
+        if enc:
+            encoding[name] = enc
+
+    for name, enc in qcflag_encoding(xdf).items():
+        encoding.setdefault(name, {}).update(enc)
+    return encoding
+
+
+def record_time_chunk(xdf, time_dim="time", chunk_elements=ZARR_CHUNK_ELEMENTS):
+    """Time steps per chunk shared by every time varying variable of a dataset
+
+    Sized so a chunk of the widest record (ADCP bins, spectra...) holds at most
+    `chunk_elements` values.
+    """
+    chunk = xdf.sizes[time_dim]
+    for var in xdf.variables.values():
+        if time_dim in var.dims and var.size:
+            chunks = time_chunksizes(var.shape, var.dims, time_dim, chunk_elements)
+            chunk = min(chunk, chunks[var.dims.index(time_dim)])
+    return max(chunk, 1)
+
+
+def zarr_encoding(xdf, time_dim="time", chunk_elements=ZARR_CHUNK_ELEMENTS):
+    """`plan_encoding` for zarr stores
+
+    Same time units, packing and int8 QC flags as the netCDF files, with `chunks`
+    holding the same time steps (`record_time_chunk`) for every time varying variable,
+    so concurrent region writes never share a chunk (compression is left to the zarr
+    default compressor).
+    """
+    encoding = plan_encoding(xdf, compress=False, time_dim=time_dim)
+    ntime = record_time_chunk(xdf, time_dim, chunk_elements) if time_dim in xdf.dims else None
+    for name, var in xdf.variables.items():
+        if var.ndim and var.size:
+            encoding.setdefault(name, {})["chunks"] = tuple(
+                ntime if d == time_dim else n for d, n in zip(var.dims, var.shape)
+            )
+    return encoding
+
+
+def _zarr_template(xdf, time_dim="time"):
+    """Dataset with the same layout as xdf where the time varying data are constant fill
+
+    Writing it creates the arrays (and the non time varying coordinates) without
+    writing the data chunks, which are then filled in by region writes.
+    """
+    template = xdf.copy(deep=False)
+    for name, var in xdf.data_vars.items():
+        if time_dim not in var.dims:
+            continue
+        if var.dtype.kind in "fc":
+            fill = np.nan
+        elif var.dtype.kind in "mM":
+            fill = np.array("NaT", dtype=var.dtype)
+        else:
+            fill = var.encoding.get("_FillValue", 0)
+        template[name] = var.copy(data=np.broadcast_to(np.asarray(fill, dtype=var.dtype),
+                                                       var.shape))
+    return template
+
+
+def _store_time_chunk(store_xdf, time_dim="time"):
+    """Time steps that are a whole number of chunks of every time varying variable"""
+    chunks = [var.encoding["chunks"][var.dims.index(time_dim)]
+              for var in store_xdf.variables.values()
+              if time_dim in var.dims and var.encoding.get("chunks")]
+    return int(np.lcm.reduce(chunks)) if chunks else store_xdf.sizes[time_dim]
+
+
+def _zarr_regions(ntime, chunk, offset=0):
+    """Slices of 0..ntime that map onto whole store chunks once shifted by offset"""
+    edges = np.arange((offset // chunk + 1) * chunk, offset + ntime, chunk) - offset
+    edges = np.concatenate([[0], edges, [ntime]])
+    return [slice(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:])]
+
+
+def xarray2zarr(xdf, store, append=False, time_dim="time", max_workers=None,
+                chunk_elements=ZARR_CHUNK_ELEMENTS):
+    """Write (or append along time) a dataset to a zarr store
+
+    The store layout and metadata are written first, then the data are written
+    chunk by chunk from a thread pool.  Every time varying variable has the same time
+    chunks, and each worker writes whole chunks of all of them so the writes don't
+    overlap (appends to stores with mixed time chunks are split on a multiple of all
+    of them).
+
+    Args:
+        xdf (xarray dataset): dataset to write, usually `EcoFOCI_CFnc.get_xdf()`
+        store (str or MutableMapping): zarr store
+        append (bool, optional): append xdf after the last time step of an existing
+            store. Defaults to False.
+        time_dim (str, optional): record dimension. Defaults to 'time'.
+        max_workers (int, optional): writer threads. Defaults to the executor default.
+        chunk_elements (int, optional): max values per chunk. Defaults to
+            ZARR_CHUNK_ELEMENTS.
+    """
+    if append:
+        with xr.open_zarr(store) as existing:
+            offset = existing.sizes[time_dim]
+            chunk = _store_time_chunk(existing, time_dim)
+            last_time = existing[time_dim].values[-1]
+        if xdf[time_dim].values[0] <= last_time:
+            raise ValueError(
+                f"New data starts at {xdf[time_dim].values[0]}, "
+                f"at or before the end of the store ({last_time})"
+            )
+        _zarr_template(xdf, time_dim).to_zarr(store, mode="a", append_dim=time_dim)
+    else:
+        encoding = zarr_encoding(xdf, time_dim=time_dim, chunk_elements=chunk_elements)
+        offset, chunk = 0, encoding[time_dim]["chunks"][0]
+        _zarr_template(xdf, time_dim).to_zarr(store, mode="w", encoding=encoding)
+
+    static = [name for name, var in xdf.variables.items() if time_dim not in var.dims]
+    records = xdf.drop_vars(static)
+    records.attrs = {}
+
+    def write_region(region):
+        store_region = slice(region.start + offset, region.stop + offset)
+        records.isel({time_dim: region}).to_zarr(
+            store, mode="r+", region={time_dim: store_region}
+        )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(write_region, _zarr_regions(xdf.sizes[time_dim], chunk, offset)))
+
+
+def netcdf_append(xdf, filename, time_dim="time", history_text=None,
+                  check_attrs=("units", "scale_factor", "add_offset")):
+    """Append the new time steps of a dataset to an existing netCDF file
+
+    Only the time steps after the last one in the file are written (earlier ones
+    are assumed to be already archived), existing data are not rewritten.  The file
+    must have been written with an unlimited time dimension, eg
+    `EcoFOCI_CFnc.xarray2netcdf_save(..., unlimited_time=True)`.
+
+    The dataset must hold the same time varying variables with the same dimensions,
+    encoded dtype and `check_attrs` attributes (looked up in the attrs, then the
+    encoding, where packing is kept), and the same values for the other coordinates
+    (depth, latitude, longitude) as the file.  `date_modified` and `history` are
+    updated.
+
+    Args:
+        xdf (xarray dataset): xarray dataset with the (new) records
+        filename (str): existing netCDF file
+        time_dim (str, optional): unlimited record dimension. Defaults to 'time'.
+        history_text (str, optional): appended to the history attribute.
+            Defaults to a note of the number of records appended.
+        check_attrs (tuple, optional): variable attributes or encoding keys that
+            must match.
+
+    Returns:
+        int: number of time steps appended
+    """
+    with netCDF4.Dataset(filename, "a") as nc:
+        if time_dim not in nc.dimensions or not nc.dimensions[time_dim].isunlimited():
+            raise ValueError(f"{filename} has no unlimited '{time_dim}' dimension")
+        _check_append_compatible(nc, xdf, time_dim, check_attrs)
+
+        ntime = len(nc.dimensions[time_dim])
+        units = nc[time_dim].units
+        calendar = getattr(nc[time_dim], "calendar", "standard")
+        timeindex = pd.DatetimeIndex(xdf[time_dim].values)
+        new = np.ones(len(timeindex), dtype=bool)
+        if ntime:
+            last = netCDF4.num2date(nc[time_dim][-1], units, calendar,
+                                    only_use_cftime_datetimes=False,
+                                    only_use_python_datetimes=True)
+            new = timeindex > pd.Timestamp(last).round("ms")
+        if not new.any():
+            return 0
+        times = netCDF4.date2num(timeindex[new].to_pydatetime(), units, calendar)
+
+        records = xdf.isel({time_dim: np.flatnonzero(new)})
+        region = slice(ntime, ntime + int(new.sum()))
+        nc[time_dim][region] = times
+        for name, ncvar in nc.variables.items():
+            if name == time_dim or time_dim not in ncvar.dimensions:
+                continue
+            data = records[name].transpose(*ncvar.dimensions).values
+            if data.dtype.kind in "fc":
+                data = np.ma.masked_invalid(data)
+            index = tuple(region if d == time_dim else slice(None) for d in ncvar.dimensions)
+            ncvar[index] = data
+
+        if history_text is None:
+            history_text = f"Appended {int(new.sum())} records."
+        now = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        history = getattr(nc, "history", "")
+        nc.setncatts({
+            "date_modified": now,
+            "history": f"{history}\n{now} {history_text}" if history else f"{now} {history_text}",
+        })
+    return int(new.sum())
+
+
+def _check_append_compatible(nc, xdf, time_dim, check_attrs):
+    """Raise ValueError if xdf can't be appended to the open netCDF4 Dataset nc"""
+    for name, ncvar in nc.variables.items():
+        if name == time_dim:
+            continue
+        if name not in xdf.variables:
+            if time_dim in ncvar.dimensions:
+                raise ValueError(f"'{name}' is missing from the data to append")
+            continue
+        var = xdf[name]
+        if set(var.dims) != set(ncvar.dimensions):
+            raise ValueError(
+                f"'{name}' has dimensions {var.dims}, the file has {ncvar.dimensions}"
+            )
+        for attr in check_attrs:
+            # packing (scale_factor, add_offset) lives in the encoding, not the attrs
+            value = var.attrs.get(attr, var.encoding.get(attr))
+            if value is not None and attr in ncvar.ncattrs():
+                if np.any(np.asarray(value) != np.asarray(ncvar.getncattr(attr))):
+                    raise ValueError(f"'{name}' attribute '{attr}' does not match the file")
+        if "dtype" in var.encoding and np.dtype(var.encoding["dtype"]) != ncvar.dtype:
+            raise ValueError(
+                f"'{name}' is encoded as {np.dtype(var.encoding['dtype'])}, "
+                f"the file has {ncvar.dtype}"
+            )
+        if time_dim not in ncvar.dimensions:
+            stored = ncvar[:]
+            if var.shape != stored.shape or not np.allclose(
+                var.values, np.ma.filled(stored, np.nan), equal_nan=True
+            ):
+                raise ValueError(f"'{name}' values do not match the file")
+
+    extra = [name for name, var in xdf.data_vars.items()
+             if time_dim in var.dims and name not in nc.variables]
+    if extra:
+        raise ValueError(f"Variables {extra} are not in the file")
+
+
+def dataframe_to_xarray(df):
+    """Convert a DataFrame to an xarray Dataset without copying the columns
+
+    Equivalent to `df.to_xarray()`.  For a single level index each column's
+    numpy array is wrapped directly (dtypes such as float32 are kept),
+    MultiIndex frames need unstacking and use `to_xarray`.
+
+    Args:
+        df (DataFrame): measurement data
+
+    Returns:
+        xarray.Dataset
+    """
+    if isinstance(df.index, pd.MultiIndex):
+        return df.to_xarray()
+
+    dim = df.index.name if df.index.name is not None else "index"
+    data_vars = {name: (dim, df[name].to_numpy()) for name in df.columns}
+
+    return xr.Dataset(data_vars, coords={dim: df.index.to_numpy()})
+
+
+def expand_dataset(xdf, dim_names, fill_value=1e35, rename=None, order=None):
+    """Add singleton dimensions to every data variable and reorder in one step
+
+    Replaces the chain `expand_dims` -> `rename` -> `assign_coords` -> `transpose`;
+    the new variables are reshaped/transposed views of the original arrays.
+
+    Args:
+        xdf (xarray.Dataset): dataset to expand
+        dim_names (list): new dimensions, each gets a single coordinate of `fill_value`
+        fill_value (float, optional): coordinate value of the new dimensions. Defaults to 1e35.
+        rename (dict, optional): existing dimensions to rename. Defaults to None.
+        order (tuple, optional): dimension order of the result, dimensions not listed
+            follow in their current order. Defaults to new dims first.
+
+    Returns:
+        xarray.Dataset
+    """
+    rename = rename or {}
+    dim_names = list(dim_names)
+
+    def new_name(dim):
+        return rename.get(dim, dim)
+
+    coords = {}
+    for name, coord in xdf.coords.items():
+        coords[new_name(name)] = xr.Variable(
+            [new_name(d) for d in coord.dims], coord.values, coord.attrs, coord.encoding
+        )
+    for dn in dim_names:
+        coords[dn] = xr.Variable((dn,), np.array([fill_value]))
+
+    data_vars = {}
+    for name, var in xdf.data_vars.items():
+        dims = dim_names + [new_name(d) for d in var.dims]
+        data = np.asarray(var.data).reshape((1,) * len(dim_names) + var.shape)
+        if order is not None:
+            target = [d for d in order if d in dims] + [d for d in dims if d not in order]
+            data = data.transpose([dims.index(d) for d in target])
+            dims = target
+        data_vars[name] = xr.Variable(dims, data, var.attrs, var.encoding)
+
+    return xr.Dataset(data_vars, coords=coords, attrs=xdf.attrs)
+
+
+def extrapolate_to_surface(xdf, novars=["par"], profile_dim=None):
+    """Extend a cast (or stacked casts) to the surface in 1m steps
+
+    The depth axis is extended from the shallowest bin to the surface with a single
+    `reindex`, the new bins copy the shallowest bin. Filled values get a QC flag of 8
+    (interpolated), variables in `novars` are left missing with a QC flag of 9
+    (as bits 8 and 9 for bit field `_QC` variables with `flag_masks`).
+
+    When casts are stacked along `profile_dim` on a common depth grid, each profile's
+    missing values above its first good bin are filled from that bin as well.
+
+    Args:
+        xdf (xarray.Dataset): cast data with an ascending `depth` dimension
+        novars (list, optional): variables to not fill. Defaults to ['par'].
+        profile_dim (str, optional): dimension of stacked casts. Defaults to None.
+
+    Returns:
+        xarray.Dataset
+    """
+    depth = xdf["depth"].values
+    nsfc = int(np.ceil(depth[0])) if depth[0] > 0 else 0
+    new_depths = depth[0] - np.arange(nsfc, 0, -1)
+
+    xdf = xdf.reindex(depth=np.concatenate([new_depths, depth]), method="bfill")
+    is_new = xr.DataArray(np.arange(xdf.sizes["depth"]) < nsfc, dims="depth")
+
+    for varname in list(xdf.data_vars):
+        if ("_QC" in varname) or ("depth" not in xdf[varname].dims):
+            continue
+        filled = is_new
+        if profile_dim is not None and profile_dim in xdf[varname].dims:
+            var = xdf[varname]
+            leading = var.isnull() & (var.notnull().cumsum("depth") == 0)
+            if varname not in novars:
+                xdf[varname] = var.where(~leading, var.bfill("depth"))
+            filled = is_new | leading
+        if varname in novars:
+            xdf[varname] = xdf[varname].where(~filled)
+
+        qcname = varname + "_QC"
+        if qcname in xdf:
+            flag = 9 if varname in novars else 8
+            if "flag_masks" in xdf[qcname].attrs:
+                flag = qcflag_to_bitmask(flag)
+            xdf[qcname] = xdf[qcname].where(~filled, flag)
+
+    return xdf
+
+
+def cast_position_time(operation_yaml, conscastno="CTD001", positiveE=True):
+    """Cast time, latitude and longitude from the cruise yaml `CTDCasts` entry
+
+    Args:
+        operation_yaml (dict): cruise yaml
+        conscastno (str, optional): consecutive cast number. Defaults to 'CTD001'.
+        positiveE (bool, optional): longitude positive east. Defaults to True.
+
+    Returns:
+        (datetime, latitude, longitude)
+    """
+    cast = operation_yaml["CTDCasts"][conscastno.upper()]
+
+    GMTDateTime = datetime.datetime.strptime(
+        f"{cast['GMTYear']}-{cast['GMTMonth']}-{cast['GMTDay']}", "%Y-%b-%d"
+    ) + datetime.timedelta(seconds=cast["GMTTime"])  # GMTMonth as 3char name, GMTTime in seconds
+    longitude = float(cast["LongitudeDeg"]) + float(cast["LongitudeMin"]) / 60
+    latitude = float(cast["LatitudeDeg"]) + float(cast["LatitudeMin"]) / 60
+
+    if not positiveE:
+        longitude = -1 * longitude
+    return GMTDateTime, latitude, longitude
+
 
 class EcoFOCI_CFnc(object):
     """
@@ -41,7 +525,7 @@ class EcoFOCI_CFnc(object):
         """[summary]
 
         Args:
-            df (DataFrame): Pandas DataFrame of mesurement data.
+            df (DataFrame): Pandas DataFrame of mesurement data (or an xarray Dataset).
             instrument_yaml (str, optional): yaml file with instrumentation meta attributes. Defaults to ''.
             operation_yaml (str, optional): yaml file with cruise or mooring meta attributes. Defaults to ''.
             operation_type (str, optional): Choose from 'mooring','ctd',''. Defaults to 'mooring'.
@@ -53,7 +537,7 @@ class EcoFOCI_CFnc(object):
             "ctd",
         ], "Operation type must be either 'mooring' or 'ctd'"
 
-        self.xdf = df.to_xarray()
+        self.xdf = df if isinstance(df, xr.Dataset) else dataframe_to_xarray(df)
         self.instrument_yaml = instrument_yaml
         self.operation_yaml = operation_yaml
         self.operation_type = operation_type
@@ -152,6 +636,7 @@ class EcoFOCI_CFnc(object):
 
         self.xdf.attrs.update(attributes)
 
+    @profiled(rows='self.xdf')
     def expand_dimensions(
         self,
         dim_names=[
@@ -166,17 +651,14 @@ class EcoFOCI_CFnc(object):
         For moorings, this adds lat,lon,depth
 
         also rename the time dimension from `date_time` to `time`
-        """
-        self.xdf = self.xdf.expand_dims(dim_names)
-        if self.operation_type == "mooring":
-            self.xdf = self.xdf.rename({time_dim_name: "time"})
 
-        # fill new dims
-        for dn in dim_names:
-            self.xdf = self.xdf.assign_coords({dn: (dn, [1e35])})
+        The expanded dataset is built in one step from views of the existing
+        arrays (see `expand_dataset`), no data is copied.
+        """
+        rename = {time_dim_name: "time"} if self.operation_type == "mooring" else {}
+        order = ("time", "depth", "latitude", "longitude") if geophys_sort else None
 
-        if geophys_sort:
-            self.xdf = self.xdf.transpose("time", "depth", "latitude", "longitude")
+        self.xdf = expand_dataset(self.xdf, dim_names, rename=rename, order=order)
 
     def add_variable(self, variable_names=None, dupvar=None):
         """Add new empty variables"""
@@ -197,13 +679,16 @@ class EcoFOCI_CFnc(object):
 
         self.xdf[variable_names] = data
 
+    @profiled(rows='self.xdf')
     def variable_meta_data(self, variable_keys=None, drop_missing=True):
         """Add CF meta_data to each known variable"""
         assert variable_keys != None, "Must provide a list of variable names"
 
         for var in variable_keys:
             try:
-                self.xdf[var].attrs = self.instrument_yaml[var]
+                attrs, packing = packing_encoding(self.instrument_yaml[var])
+                self.xdf[var].attrs = attrs
+                self.xdf[var].encoding.update(packing)
             except:
                 if drop_missing:
                     self.xdf = self.xdf.drop_vars(var)
@@ -217,6 +702,7 @@ class EcoFOCI_CFnc(object):
         for var in variable_keys:
             self.xdf[var].attrs = self.instrument_yaml[var]
 
+    @profiled(rows='self.xdf')
     def temporal_geospatioal_meta_data_ctd(self, positiveE=True, conscastno="CTD001"):
         """Add cast lat, lon and time
 
@@ -226,44 +712,15 @@ class EcoFOCI_CFnc(object):
         """
         assert self.operation_type == "ctd", "Function only relevant for ctds"
 
-        GMTYear = self.operation_yaml["CTDCasts"][conscastno.upper()]["GMTYear"]
-        GMTMonth = self.operation_yaml["CTDCasts"][conscastno.upper()][
-            "GMTMonth"
-        ]  # as 3char name
-        GMTDay = self.operation_yaml["CTDCasts"][conscastno.upper()]["GMTDay"]
-        GMTTime = self.operation_yaml["CTDCasts"][conscastno.upper()][
-            "GMTTime"
-        ]  # in seconds
-
-        GMTDateTime = datetime.datetime.strptime(
-            f"{GMTYear}-{GMTMonth}-{GMTDay}", "%Y-%b-%d"
-        ) + datetime.timedelta(seconds=GMTTime)
-        longitude = (
-            float(self.operation_yaml["CTDCasts"][conscastno.upper()]["LongitudeDeg"])
-            + (
-                float(
-                    self.operation_yaml["CTDCasts"][conscastno.upper()]["LongitudeMin"]
-                )
-            )
-            / 60
-        )
-        latitude = (
-            float(self.operation_yaml["CTDCasts"][conscastno.upper()]["LatitudeDeg"])
-            + (
-                float(
-                    self.operation_yaml["CTDCasts"][conscastno.upper()]["LatitudeMin"]
-                )
-            )
-            / 60
+        GMTDateTime, latitude, longitude = cast_position_time(
+            self.operation_yaml, conscastno, positiveE=positiveE
         )
 
-        if not positiveE:
-            self.xdf["longitude"] = [-1 * longitude]
-        else:
-            self.xdf["longitude"] = [longitude]
+        self.xdf["longitude"] = [longitude]
         self.xdf["latitude"] = [latitude]
         self.xdf["time"] = [GMTDateTime]
 
+    @profiled(rows='self.xdf')
     def temporal_geospatioal_meta_data(self, positiveE=True, depth="designed"):
         """
         Moored Data only, CTD data has a similar function but castid must be passed
@@ -323,21 +780,46 @@ class EcoFOCI_CFnc(object):
         }
         self.xdf.attrs.update(attributes)
 
-    def var_qcflag_init(self, dim_names=["depth", "latitude", "longitude", "time"]):
+    @profiled(rows='self.xdf')
+    def var_qcflag_init(
+        self,
+        dim_names=["depth", "latitude", "longitude", "time"],
+        bitmask=False,
+    ):
         """Skipping over dimensions (assumed profile if no dim_names passed), create qc_flag variables with autofil of 0
 
+        Flags are stored as int8 (missing data gets the `QC_FILL_VALUE` fill value) instead of
+        the data's float64.  With `bitmask=True` each `_QC` variable is an int16 CF bit field
+        where flag n is bit n (see `qcflag_to_bitmask`), so several flags can be set at once.
+
         Args:
             dim_names (list, optional): [list of variables that do not get qc_flags]. Defaults to ['depth','latitude','longitude','time'].
+            bitmask (bool, optional): pack flags into a bit field. Defaults to False.
 
         """
-        for i in self.xdf.variables:
+        for i in list(self.xdf.variables):
             if (i not in dim_names) and ("_QC" not in i):
-                self.xdf[i + "_QC"] = self.xdf[i] * 0
-                self.xdf[i + "_QC"].attrs = {
-                    "QCFlag_Value": "0,1,2,3,4,5,6,7,8,9",
-                    "QCFlag_Meaning": """No QC performed,Good Data,Probably Good Data,
+                missing = self.xdf[i].isnull()
+                if bitmask:
+                    flags = xr.where(missing, QC_FILL_VALUE, qcflag_to_bitmask(0))
+                    flags = flags.astype(np.int16)
+                    attrs = {
+                        "flag_masks": qcflag_to_bitmask(np.arange(10)).astype(np.int16),
+                        "flag_meanings": QC_FLAG_MEANINGS,
+                    }
+                else:
+                    flags = xr.where(missing, QC_FILL_VALUE, 0).astype(np.int8)
+                    attrs = {
+                        "QCFlag_Value": "0,1,2,3,4,5,6,7,8,9",
+                        "QCFlag_Meaning": """No QC performed,Good Data,Probably Good Data,
                  Bad Data that are Potentially Correctable, 
                  Bad Data, Value Changed,,Nominal Value, Interpolated Value, Missing Value""",
+                    }
+                self.xdf[i + "_QC"] = flags
+                self.xdf[i + "_QC"].attrs = attrs
+                self.xdf[i + "_QC"].encoding = {
+                    "dtype": flags.dtype,
+                    "_FillValue": QC_FILL_VALUE,
                 }
 
     ### Break out following methods for modification to existing data
@@ -352,26 +834,21 @@ class EcoFOCI_CFnc(object):
         self.xdf.attrs.update(attributes)
 
     ###
-    def interp2sfc(self, novars=["par"]):
+    @profiled(rows='self.xdf')
+    def interp2sfc(self, novars=["par"], profile_dim=None):
         """Interpolate CTD files to suface, skip listed vars in novars, change QC_Flag to 8 or 9 if skipped
 
+        See `extrapolate_to_surface`, casts stacked along `profile_dim` are filled per profile.
+
         Args:
             novars (list, optional): [Variables to not fill with values]. Defaults to ['par'].
+            profile_dim (str, optional): [dimension of stacked casts]. Defaults to None.
         """
         assert self.operation_type == "ctd", "Function only relevant for ctds"
 
-        tmpdata = self.xdf.isel({"depth": 0})
-        while tmpdata.depth > 0:
-            tmpdata["depth"] = tmpdata.depth - 1
-            for varname in list(self.xdf.keys()):
-                if "_QC" in varname:
-                    tmpdata[varname] = 8
-            for varname in novars:
-                if varname in list(self.xdf.keys()):
-                    tmpdata[varname] = np.nan
-                    tmpdata[varname + "_QC"] = 9
-            self.xdf = xr.concat([tmpdata, self.xdf], "depth")
+        self.xdf = extrapolate_to_surface(self.xdf, novars=novars, profile_dim=profile_dim)
 
+    @profiled(rows='self.xdf')
     def autotrim_time(self):
         """Only used for moored data
 
@@ -396,13 +873,182 @@ class EcoFOCI_CFnc(object):
 
         return self.xdf
 
-    def xarray2netcdf_save(self, xdf, filename="temp.nc", **kwargs):
+    @profiled(rows='xdf')
+    def xarray2netcdf_save(self, xdf, filename="temp.nc", compress=True, complevel=4,
+                           unlimited_time=False, **kwargs):
         """Save xarray to netcdf
 
+        Variables are zlib compressed and chunked along time (netCDF4 formats), packed as
+        given in the instrument yaml `encoding` blocks and QC flags are int8.
+        See `plan_encoding`.
+
         Args:
             xdf (xarray dataset): xarray dataset
             filename (str, optional): Filename. Defaults to 'temp.nc'.
+            compress (bool, optional): zlib compress and chunk variables. Defaults to True.
+            complevel (int, optional): zlib compression level. Defaults to 4.
+            unlimited_time (bool, optional): make time an unlimited dimension so new
+                records can be added with `xarray2netcdf_append`. Defaults to False.
+            format (str, optional): netCDF format. Defaults to 'NETCDF4'.
         """
-        xdf.to_netcdf(filename,format=kwargs['format'],
-                      encoding={'time': {'units': 'days since 1900-01-01',
-                                         'dtype': 'float64'}})
+        format = kwargs.get("format", "NETCDF4")
+        encoding = plan_encoding(xdf, format=format, complevel=complevel, compress=compress)
+
+        xdf.to_netcdf(filename,format=format,
+                      encoding=encoding,
+                      unlimited_dims=["time"] if unlimited_time else None)
+
+    @profiled(rows='xdf')
+    def xarray2netcdf_append(self, xdf, filename="temp.nc", history_text=None):
+        """Append new time steps to a netcdf file saved with `unlimited_time=True`
+
+        Records at or before the last time in the file are skipped. See `netcdf_append`.
+
+        Args:
+            xdf (xarray dataset): xarray dataset
+            filename (str, optional): Filename. Defaults to 'temp.nc'.
+            history_text (str, optional): added to the history attribute.
+
+        Returns:
+            int: number of time steps appended
+        """
+        return netcdf_append(xdf, filename, history_text=history_text)
+
+    @profiled(rows='xdf')
+    def xarray2zarr_save(self, xdf, store="temp.zarr", append=False, max_workers=None):
+        """Save xarray to a zarr store
+
+        Uses the same attributes, packing and int8 QC flags as `xarray2netcdf_save` with
+        time aligned chunks written concurrently. See `xarray2zarr`.
+
+        Args:
+            xdf (xarray dataset): xarray dataset
+            store (str, optional): zarr store path. Defaults to 'temp.zarr'.
+            append (bool, optional): append along time to an existing store. Defaults to False.
+            max_workers (int, optional): writer threads. Defaults to the executor default.
+        """
+        xarray2zarr(xdf, store, append=append, max_workers=max_workers)
+
+
+### CF discrete sampling geometry, contiguous ragged array profiles
+PROFILE_META = ("StationNameID", "StationNo_altname", "BottomDepth", "MaxDepth")
+
+
+def _cast_table(cast):
+    """Cast data as a DataFrame indexed by depth/pressure"""
+    if isinstance(cast, xr.Dataset):
+        cast = cast.squeeze(drop=True).to_dataframe()
+    return cast
+
+
+def casts_to_ragged(casts, operation_yaml, instrument_yaml=None, positiveE=True,
+                    profile_meta=PROFILE_META):
+    """Combine the casts of a cruise into a CF contiguous ragged array of profiles
+
+    All observations are stacked along `obs` in cast order and `rowSize(profile)` holds
+    the number of observations of each cast (CF featureType profile).  Time and
+    position, plus the `profile_meta` entries, come from the cruise yaml `CTDCasts`
+    (numeric entries missing from a cast are NaN, text entries are empty).  The
+    observed variables get a `coordinates` attribute naming time, position and the
+    vertical coordinate.
+
+    Args:
+        casts (dict): {conscastno: DataFrame indexed by depth/pressure (eg sbe9_11p
+            output) or a single cast EcoFOCI_CFnc dataset}
+        operation_yaml (dict): cruise yaml
+        instrument_yaml (dict, optional): variable attributes and packing
+        positiveE (bool, optional): longitude positive east. Defaults to True.
+        profile_meta (tuple, optional): cast yaml entries stored per profile
+
+    Returns:
+        xarray.Dataset
+    """
+    tables = {name: _cast_table(cast) for name, cast in casts.items()}
+    data = pd.concat(tables.values())
+    vertical = data.index.name or "depth"
+
+    position = [cast_position_time(operation_yaml, name, positiveE) for name in tables]
+    cast_meta = [operation_yaml["CTDCasts"][name.upper()] for name in tables]
+
+    xdf = xr.Dataset(
+        {name: ("obs", data[name].to_numpy()) for name in data.columns},
+        coords={vertical: ("obs", data.index.to_numpy())},
+    )
+    xdf["profile_id"] = ("profile", np.array([name.upper() for name in tables]))
+    xdf["profile_id"].attrs = {"cf_role": "profile_id", "long_name": "consecutive cast number"}
+    xdf["rowSize"] = ("profile", np.array([len(t) for t in tables.values()], dtype=np.int32))
+    xdf["rowSize"].attrs = {"long_name": "number of obs for this profile",
+                            "sample_dimension": "obs"}
+    xdf = xdf.assign_coords(
+        time=("profile", pd.to_datetime([p[0] for p in position]).to_numpy()),
+        latitude=("profile", np.array([p[1] for p in position])),
+        longitude=("profile", np.array([p[2] for p in position])),
+    )
+    for key in profile_meta:
+        values = [meta.get(key) for meta in cast_meta]
+        present = [v for v in values if v is not None]
+        if not present:
+            continue
+        if all(isinstance(v, (int, float, np.number)) and not isinstance(v, bool)
+               for v in present):
+            xdf[key] = ("profile", np.array([np.nan if v is None else v for v in values],
+                                            dtype=np.float64))
+        else:
+            xdf[key] = ("profile", np.array(["" if v is None else str(v) for v in values]))
+
+    coordinates = f"time latitude longitude {vertical}"
+    for name in data.columns:
+        xdf[name].encoding["coordinates"] = coordinates
+
+    for name in xdf.variables:
+        if instrument_yaml and name in instrument_yaml:
+            attrs, packing = packing_encoding(instrument_yaml[name])
+            xdf[name].attrs.update(attrs)
+            xdf[name].encoding.update(packing)
+    xdf.attrs["featureType"] = "profile"
+    return xdf
+
+
+def ragged_profile_save(xdf, filename="cruise.nc", compress=True, complevel=4,
+                        format="NETCDF4"):
+    """Save a `casts_to_ragged` dataset, observations chunked along `obs`"""
+    encoding = plan_encoding(xdf, format=format, complevel=complevel, compress=compress,
+                             time_dim="obs")
+    encoding.setdefault("time", {}).update({"units": "days since 1900-01-01",
+                                            "dtype": "float64"})
+    xdf.to_netcdf(filename, format=format, encoding=encoding)
+
+
+class RaggedProfiles(object):
+    """Read single casts from a contiguous ragged array profile file
+
+    Only `rowSize` and `profile_id` are read on open, a cast is a lazy slice of the
+    `obs` dimension located from the row offsets.
+
+        >>> with RaggedProfiles("DY1805_ctd.nc") as cruise:
+        ...     ctd001 = cruise.cast("CTD001")
+    """
+
+    def __init__(self, filename):
+        self.xdf = xr.open_dataset(filename)
+        self.offsets = np.concatenate([[0], np.cumsum(self.xdf["rowSize"].values)])
+        self.profile_ids = [str(p) for p in self.xdf["profile_id"].values]
+        self._index = {p: i for i, p in enumerate(self.profile_ids)}
+
+    def __len__(self):
+        return len(self.profile_ids)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.xdf.close()
+
+    def cast(self, profile):
+        """One cast by profile_id (eg 'CTD001') or position, as an xarray Dataset"""
+        i = self._index[profile.upper()] if isinstance(profile, str) else int(profile)
+        obs = slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+        return self.xdf.isel(profile=i, obs=obs)
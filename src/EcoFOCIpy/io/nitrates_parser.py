@@ -9,15 +9,21 @@ These include:
 
 
 """
+import copy
+import hashlib
+import itertools
+import json
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import requests
 
+from ..profiling import profiled
+
 
 # Satlantic Suna CSV
 class Suna(object):
@@ -35,6 +41,7 @@ class Suna(object):
         """
         self.data_frame = []
 
+    @profiled()
     def parse(self,filename=None):
         """
         Basic Method to open and read SUNA csv files.
@@ -84,6 +91,8 @@ class Suna(object):
         title : str
             Title of the plot.
         """
+        import matplotlib.pyplot as plt
+
         if self.data_frame.empty:
             raise ValueError("Data frame is empty. Please parse a file first.")
 
@@ -168,16 +177,23 @@ LAST_COL = ['Check Sum']
 
 # --- ISUS conversion functions ---
 
+ISUS_HEADER_LINES = 12
+
 def get_bandwidth_names(file_path):
-    """Extract the 256 bandwidth names from the header line (line 12)."""
+    """Extract the 256 bandwidth names from the header line (line 12).
+
+    Only the header lines are read, not the whole file.
+    """
     with open(file_path, 'r') as f:
-        lines = f.readlines()
-    header_line = lines[11].strip()
-    header_items = header_line.split(',')
+        header_lines = list(itertools.islice(f, ISUS_HEADER_LINES))
+    if len(header_lines) < ISUS_HEADER_LINES:
+        raise ValueError(f"{file_path} is too short to contain an ISUS header")
+    header_items = header_lines[-1].strip().split(',')
     return header_items[2:]  # Skip Instrument name + 'L'
 
-def process_isus_file(file_path, output_dir):
-    """Process a single .DAT file and save as .csv"""
+@profiled()
+def read_isus_file(file_path):
+    """Read a single ISUS .DAT file into a DataFrame with the full 277 column layout."""
     middle_cols = get_bandwidth_names(file_path)
     if len(middle_cols) != 256:
         print(f"[WARNING] Expected 256 bandwidth names, got {len(middle_cols)} in {file_path}")
@@ -187,12 +203,47 @@ def process_isus_file(file_path, output_dir):
 
     df = pd.read_csv(
         file_path,
-        skiprows=12,
+        skiprows=ISUS_HEADER_LINES,
         sep=',',
         names=full_columns,
         engine='c',          
         on_bad_lines='warn'  # optional, helps survive other weird rows
     )
+    return df
+
+def isus_datetime(yyyyddd, hhhhh):
+    """
+    Vectorized conversion of the ISUS YYYYDDD / HH.HHHHH time words.
+
+    Parameters:
+    ----------
+    yyyyddd : array_like
+        Year and day of year (e.g. 2014123). Non-numeric entries become NaT.
+    hhhhh : array_like
+        Fractional hours of the day.
+
+    Returns:
+    -------
+    ndarray
+        datetime64[ns] array.
+    """
+    yyyyddd = pd.to_numeric(pd.Series(np.asarray(yyyyddd).ravel()), errors='coerce').to_numpy(dtype=float)
+    hhhhh = pd.to_numeric(pd.Series(np.asarray(hhhhh).ravel()), errors='coerce').to_numpy(dtype=float)
+
+    good = ~(np.isnan(yyyyddd) | np.isnan(hhhhh))
+    date_time = np.full(yyyyddd.shape, np.datetime64('NaT'), dtype='datetime64[ns]')
+
+    yyyyddd_int = yyyyddd[good].astype(np.int64)
+    years = (yyyyddd_int // 1000 - 1970).astype('datetime64[Y]')
+    days = (yyyyddd_int % 1000 - 1).astype('timedelta64[D]')
+    hours = np.round(hhhhh[good] * 3600e9).astype('timedelta64[ns]')
+    date_time[good] = years.astype('datetime64[D]') + days + hours
+
+    return date_time
+
+def process_isus_file(file_path, output_dir):
+    """Process a single .DAT file and save as .csv"""
+    df = read_isus_file(file_path)
 
     base_name = os.path.basename(file_path)
     new_name = os.path.splitext(base_name)[0] + '.csv'
@@ -202,6 +253,11 @@ def process_isus_file(file_path, output_dir):
     print(f"[INFO] Processed {file_path} --> {output_path} | Rows: {df.shape[0]}")
     return output_path
 
+def list_isus_files(input_dir):
+    """Sorted list of the .DAT files in a folder"""
+    return sorted(os.path.join(input_dir, f) for f in os.listdir(input_dir)
+                  if f.lower().endswith('.dat'))
+
 def batch_process_isus_files(input_dir, output_dir):
     """Process all .DAT files in a folder"""
     if not os.path.exists(output_dir):
@@ -219,6 +275,89 @@ def batch_process_isus_files(input_dir, output_dir):
     print(f"[INFO] All files processed. Output saved in {output_dir}")
     return output_csvs
 
+@profiled(files=('input_dir',))
+def batch_ingest_isus_files(input_dir, output_path, max_workers=None):
+    """
+    Parse every .DAT file in a folder in a process pool and write a single
+    merged, time sorted columnar file. No intermediate CSVs are written.
+
+    Parameters:
+    -----------
+    input_dir : str
+        Folder containing the ISUS .DAT files.
+    output_path : str
+        Merged output file. The format is chosen from the extension:
+        '.parquet' (requires pyarrow or fastparquet) or '.nc' (netCDF).
+    max_workers : int, optional
+        Number of worker processes. Defaults to the executor default.
+
+    Returns:
+    -------
+    DataFrame
+        The merged data, with the original YYYYDDD and HH.HHHHH columns and a
+        ``date_time`` column.
+    """
+    ext = os.path.splitext(output_path)[1].lower()
+    if ext not in ('.parquet', '.nc'):
+        raise ValueError(f"Unsupported output format '{ext}', use '.parquet' or '.nc'")
+
+    dat_files = list_isus_files(input_dir)
+    print(f"[INFO] Found {len(dat_files)} .DAT files in {input_dir}")
+    if not dat_files:
+        raise ValueError(f"No .DAT files found in {input_dir}")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        df_list = list(executor.map(read_isus_file, dat_files))
+
+    merged_df = pd.concat(df_list, ignore_index=True)
+    merged_df['date_time'] = isus_datetime(merged_df['YYYYDDD'], merged_df['HH.HHHHH'])
+
+    bad = merged_df['date_time'].isna()
+    if bad.any():
+        print(f"[WARNING] Dropping {bad.sum()} rows with non-numeric YYYYDDD/HH.HHHHH")
+        merged_df = merged_df.loc[~bad]
+
+    merged_df = merged_df.sort_values('date_time', kind='stable').reset_index(drop=True)
+    merged_df['YYYYDDD'] = pd.to_numeric(merged_df['YYYYDDD']).astype(np.int64)
+    merged_df['HH.HHHHH'] = pd.to_numeric(merged_df['HH.HHHHH'])
+
+    if ext == '.parquet':
+        merged_df.to_parquet(output_path, index=False)
+    else:
+        _isus_to_netcdf(merged_df, output_path)
+
+    print(f"[INFO] Merged {len(dat_files)} .DAT files --> {output_path} | Rows: {merged_df.shape[0]}")
+    return merged_df
+
+def _isus_to_netcdf(df, output_path):
+    """Write merged ISUS data to netCDF along a 'date_time' dimension.
+
+    netCDF names may not contain '/', so those columns are renamed and the original
+    column name is kept in the 'long_name' attribute.
+    """
+    import xarray as xr
+
+    xdf = xr.Dataset.from_dataframe(df.set_index('date_time'))
+    renames = {name: name.replace('/', '_') for name in xdf.data_vars if '/' in name}
+    for name in renames:
+        xdf[name].attrs['long_name'] = name
+    xdf = xdf.rename(renames)
+    # object columns (e.g. instrument serial number) must be written as strings
+    for name in xdf.data_vars:
+        if xdf[name].dtype == object:
+            xdf[name] = xdf[name].astype(str)
+    xdf.to_netcdf(output_path)
+
+def _isus_from_netcdf(filename):
+    """Read a merged ISUS netCDF file written by batch_ingest_isus_files."""
+    import xarray as xr
+
+    with xr.open_dataset(filename) as xdf:
+        renames = {name: xdf[name].attrs['long_name'] for name in xdf.data_vars
+                   if 'long_name' in xdf[name].attrs}
+        df = xdf.to_dataframe().rename(columns=renames).reset_index()
+    return df
+
 def merge_csvs(csv_files, merged_csv_path):
     """
     Merge multiple CSVs into a single CSV, sorted by proper date_time,
@@ -254,9 +393,7 @@ def merge_csvs(csv_files, merged_csv_path):
     merged_df["YYYYDDD"] = yyyyddd.loc[~bad].astype(int).astype(str)
     merged_df["HH.HHHHH"] = hhhhh.loc[~bad]
 
-    base_dates = pd.to_datetime(merged_df["YYYYDDD"], format="%Y%j", errors="coerce")
-    time_offset = pd.to_timedelta(merged_df["HH.HHHHH"], unit="h")
-    merged_df["date_time"] = base_dates + time_offset
+    merged_df["date_time"] = isus_datetime(merged_df["YYYYDDD"], merged_df["HH.HHHHH"])
 
     merged_df = merged_df.sort_values("date_time").reset_index(drop=True)
     merged_df.drop(columns=["date_time"], inplace=True)
@@ -280,21 +417,30 @@ class Isus(object):
     plot_data(title)
         Quick-look plots for nitrate, RMS Error, and spectra.
 
+    dark_index(method)
+        Boolean index of dark frames, cached on the instance.
+
     filter_isus(rmse_cutoff)
         Basic QC filter on RMS Error, then resamples to hourly median.
     """
 
     def __init__(self):
         self.data_frame = []
+        self._dark_index = None
+        self._dark_index_key = None
 
+    @profiled()
     def parse(self, filename=None):
         """
-        Parse merged ISUS CSV file and build datetime index.
+        Parse merged ISUS file and build datetime index.
+
+        Merged CSVs (``merge_csvs``), the Parquet or netCDF output of
+        ``batch_ingest_isus_files`` and single raw .DAT files are accepted.
     
         Parameters:
         ----------
         filename : str
-            Path to the CSV file.
+            Path to the .csv, .parquet, .nc or .dat file.
     
         Returns:
         -------
@@ -302,15 +448,22 @@ class Isus(object):
         """
         assert filename is not None, "Must provide a data file"
     
-        # Read merged CSV
-        rawdata_df = pd.read_csv(filename)
+        ext = os.path.splitext(filename)[1].lower()
+        if ext == '.parquet':
+            rawdata_df = pd.read_parquet(filename)
+        elif ext == '.nc':
+            rawdata_df = _isus_from_netcdf(filename)
+        elif ext == '.dat':
+            rawdata_df = read_isus_file(filename)
+        else:
+            rawdata_df = pd.read_csv(filename)
     
         # Build datetime index from YYYYDDD + HH.HHHHH
-        yyyyddd = rawdata_df['YYYYDDD'].astype(str)
-        fractional_hours = rawdata_df['HH.HHHHH'].astype(float)
-        
-        base_dates = pd.to_datetime(yyyyddd, format='%Y%j')
-        datetimes = base_dates + pd.to_timedelta(fractional_hours, unit='h')
+        if 'date_time' in rawdata_df.columns:
+            datetimes = pd.DatetimeIndex(rawdata_df.pop('date_time'))
+        else:
+            datetimes = pd.DatetimeIndex(isus_datetime(rawdata_df['YYYYDDD'],
+                                                       rawdata_df['HH.HHHHH']))
         
         rawdata_df.index = datetimes
         rawdata_df.index.name = 'date_time'
@@ -320,13 +473,67 @@ class Isus(object):
         return self.data_frame
 
 
-    def plot_data(self, title="ISUS Data", savepath=None):
+    def dark_index(self, method='auto'):
+        """
+        Boolean Series, True for dark frames, built in one vectorized pass.
+
+        The result is cached on the instance and rebuilt only when
+        ``data_frame`` is replaced (e.g. by parse or FilterIsus).
+
+        Parameters:
+        ----------
+        method : str
+            'frame'  - use the frame type in the 'S/N' column (SATxDF = dark, SATxLF = light)
+            'hourly' - the first sample of every hour is the dark frame
+                       (hours with a single sample are kept as light)
+            'no3'    - rows with NO3_conc == 0
+            'auto'   - 'frame' if the 'S/N' column has frame types, else 'hourly'
+
+        Returns:
+        -------
+        Series
+        """
+        df = self.data_frame
+        if method == 'auto':
+            method = 'frame' if self._has_frame_types(df) else 'hourly'
+
+        if (self._dark_index is not None and self._dark_index_key[0] is df
+                and self._dark_index_key[1] == method):
+            return self._dark_index
+
+        if method == 'frame':
+            is_dark = df['S/N'].astype(str).str[4:6].eq('DF')
+        elif method == 'hourly':
+            hours = df.index.floor('h')
+            grouped = df.groupby(hours, sort=False)
+            is_dark = (grouped.cumcount() == 0) & (grouped['NO3_conc'].transform('size') > 1)
+        elif method == 'no3':
+            is_dark = df['NO3_conc'] == 0
+        else:
+            raise ValueError(f"Unknown dark frame method '{method}'")
+
+        self._dark_index = is_dark.astype(bool)
+        self._dark_index_key = (df, method)
+        return self._dark_index
+
+    @staticmethod
+    def _has_frame_types(df):
+        """True if the 'S/N' column carries Satlantic frame headers (e.g. SATNLF0204)"""
+        if 'S/N' not in df.columns or df.empty:
+            return False
+        frame_types = df['S/N'].astype(str).str[:6]
+        return bool(frame_types.str.match(r'SAT.[LD]F').all())
+
+    def plot_data(self, title="ISUS Data", savepath=None, dark_method='auto'):
         """
         Quick plots for ISUS:
           - Nitrate concentration
           - RMS Error
           - Spectral data
+
+        Dark frames are removed with ``dark_index(dark_method)``.
         """
+        import matplotlib.pyplot as plt
 
         if self.data_frame.empty:
             raise ValueError("Data frame is empty. Please parse a file first.")
@@ -334,11 +541,7 @@ class Isus(object):
         df = self.data_frame
     
         # 1. Smart drop of dark fiber
-        df_no_dark = (
-            df.groupby(pd.Grouper(freq='h'))
-              .apply(lambda g: g.iloc[1:] if len(g) > 1 else g)
-              .droplevel(0)
-        )
+        df_no_dark = df[~self.dark_index(dark_method).to_numpy()]
     
         if df_no_dark.empty:
             print("[INFO] All data removed after dropping dark fiber readings.")
@@ -404,10 +607,10 @@ class Isus(object):
             fig.savefig(savepath, dpi=150, bbox_inches='tight')
         plt.show()
 
-    def FilterIsus(self, rmse_cutoff=0.003):
+    def FilterIsus(self, rmse_cutoff=0.003, dark_method='auto'):
         """
         Filter ISUS data:
-          - Remove dark current readings (NO3_conc == 0).
+          - Remove dark current readings (see ``dark_index``).
           - Keep rows with RMS Error > 0 and <= cutoff.
           - Resample to hourly median.
     
@@ -421,7 +624,7 @@ class Isus(object):
         df = self.data_frame
     
         # Drop dark current readings robustly
-        df_no_dark = df[df['NO3_conc'] != 0]
+        df_no_dark = df[~self.dark_index(dark_method).to_numpy()]
     
         # Apply RMS Error filter
         filtered_df = df_no_dark[
@@ -479,7 +682,40 @@ instrument_files = {
     # Add more instruments and their calibration file URLs here
 }
 
-def get_calibration_file(instrument, data_year, user_provided_file=None):
+def _calibration_year(path):
+    """Year found in the last few segments of a calibration file path or URL, else None."""
+    for segment in re.split(r'[/\\]', str(path))[-4:]:
+        try:
+            possible_year = int(segment)
+        except ValueError:
+            continue
+        if 1900 <= possible_year <= datetime.now().year:
+            return possible_year
+    return None
+
+def _select_by_year(candidates, data_year):
+    """
+    Pick the calibration that applies to data_year.
+
+    candidates is a list of (year, item) pairs, year may be None for undated files.
+    The newest calibration not after data_year is used, falling back to the newest
+    calibration, or an undated one when none are dated.
+    """
+    cal_years = sorted(((year, item) for year, item in candidates if year), reverse=True)
+    undated = [item for year, item in candidates if not year]
+
+    if not cal_years:
+        return undated[-1] if undated else None
+
+    selected = cal_years[0][1]
+    for year, item in cal_years:
+        if int(data_year) >= year:
+            selected = item
+            break
+    return selected
+
+def get_calibration_file(instrument, data_year, user_provided_file=None, cal_store=None,
+                         offline=False):
     """
     Retrieve the appropriate calibration file for a specified instrument and data year.
     If the user provides a file, it is used instead of retrieving one from the online mapping.
@@ -492,6 +728,11 @@ def get_calibration_file(instrument, data_year, user_provided_file=None):
         The year the data was collected.
     user_provided_file : str, optional
         Path to a user-provided calibration file.
+    cal_store : CalibrationStore, optional
+        Local calibration store that is searched before the online mapping.
+        Files that have to be downloaded are added to it.
+    offline : bool, optional
+        Never go to the network, raise if the store can not resolve the file.
 
     Returns:
     -------
@@ -502,6 +743,15 @@ def get_calibration_file(instrument, data_year, user_provided_file=None):
     if user_provided_file:
         with open(user_provided_file, 'r') as file:
             return file.read()
+
+    if cal_store is not None:
+        content = cal_store.get(instrument, data_year)
+        if content is not None:
+            return content
+
+    if offline:
+        raise ValueError(f"No local calibration file for instrument '{instrument}' "
+                         f"and data year '{data_year}'.")
     
     # Otherwise, retrieve the calibration file from the instrument mapping
     urls = instrument_files.get(instrument)
@@ -509,39 +759,15 @@ def get_calibration_file(instrument, data_year, user_provided_file=None):
         raise ValueError(f"Instrument '{instrument}' not found in the mapping.")
     
     # Extract the year from each URL and find the most appropriate calibration file
-    cal_years = []
-    default_url = None
-    for url in urls:
-        segments = url.split('/')
-        year = None
-        for segment in segments[-4:]:
-            try:
-                possible_year = int(segment)
-                if 1900 <= possible_year <= datetime.now().year:
-                    year = possible_year
-                    break
-            except ValueError:
-                continue
-        if year:
-            cal_years.append((year, url))
-        else:
-            default_url = url
-    
-    if not cal_years:
-        if default_url:
-            selected_url = default_url
-        else:
-            raise ValueError(f"No suitable calibration file found for the instrument '{instrument}' and data year '{data_year}'.")
-    else:
-        cal_years.sort(reverse=True)
-        selected_url = cal_years[0][1]
-        for year, url in cal_years:
-            if data_year >= year:
-                selected_url = url
-                break
+    selected_url = _select_by_year([(_calibration_year(url), url) for url in urls], data_year)
+    if selected_url is None:
+        raise ValueError(f"No suitable calibration file found for the instrument '{instrument}' and data year '{data_year}'.")
 
     response = requests.get(selected_url)
     if response.status_code == 200:
+        if cal_store is not None:
+            cal_store.add(instrument, response.text, year=_calibration_year(selected_url),
+                          source=selected_url)
         return response.text
     else:
         raise ValueError(f"Failed to retrieve file from {selected_url}")
@@ -696,3 +922,158 @@ def try_parse_float(value):
         return float(value)
     except ValueError:
         return np.nan
+
+
+# ------------------------------------------------------------------------
+# Local calibration file store
+# ------------------------------------------------------------------------
+
+def default_calibration_dir():
+    """Calibration store location, ``$ECOFOCIPY_CAL_DIR`` or ~/.cache/EcoFOCIpy/calibrations"""
+    return os.environ.get('ECOFOCIPY_CAL_DIR',
+                          os.path.join(os.path.expanduser('~'), '.cache', 'EcoFOCIpy',
+                                       'calibrations'))
+
+def instrument_from_cal_filename(filename):
+    """
+    Guess the instrument name from a vendor calibration file name.
+
+    Example: 'SNA1471B.cal' -> 'SUNA 1471', 'ISUS204D.CAL' -> 'ISUS 204'
+    """
+    base = os.path.basename(filename)
+    match = re.match(r'SNA0*(\d+)[A-Z]*\.cal$', base, re.IGNORECASE)
+    if match:
+        return f"SUNA {match.group(1)}"
+    match = re.match(r'ISUS0*(\d+)[A-Z]*\.cal$', base, re.IGNORECASE)
+    if match:
+        return f"ISUS {match.group(1)}"
+    return None
+
+
+class CalibrationStore(object):
+    """
+    Content addressed, on disk store of nitrate calibration files.
+
+    Files are kept as ``objects/<sha256>.cal`` and an ``index.json`` lists the
+    calibrations of each instrument by year.  Parsed calibrations
+    (``parse_no3_cal``/``parse_isus_cal``) are kept next to the raw files so
+    repeated processing runs do not parse or download anything.
+
+    Example:
+    --------
+    >>> store = CalibrationStore('/data/calibrations')
+    >>> store.preload('EcoFOCI_FieldOps_Documentation/CalibrationsByVendor/Satlantic')
+    >>> content = get_calibration_file('SUNA 1471', 2021, cal_store=store, offline=True)
+    >>> ncal = store.parsed(content, parser=parse_no3_cal)
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or default_calibration_dir()
+        self.objects_dir = os.path.join(self.cache_dir, 'objects')
+        self.index_path = os.path.join(self.cache_dir, 'index.json')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.index = self._read_index()
+        self._parsed = {}
+
+    def _read_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        with open(self.index_path, 'r') as f:
+            return json.load(f)
+
+    def _write_index(self):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def _object_path(self, digest, suffix='.cal'):
+        return os.path.join(self.objects_dir, digest + suffix)
+
+    def add(self, instrument, content, year=None, source=None):
+        """Add calibration content for an instrument, returns the content hash."""
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            with open(object_path, 'w') as f:
+                f.write(content)
+
+        entries = self.index.setdefault(instrument, [])
+        entry = {'year': year, 'sha256': digest, 'source': source}
+        if not any(e['sha256'] == digest and e['year'] == year for e in entries):
+            entries.append(entry)
+            self._write_index()
+        return digest
+
+    def add_file(self, filename, instrument=None, year=None):
+        """Add a calibration file, the instrument and year are guessed from the path if not given."""
+        instrument = instrument or instrument_from_cal_filename(filename)
+        if instrument is None:
+            raise ValueError(f"Can not identify the instrument for {filename}, pass instrument=")
+        if year is None:
+            year = _calibration_year(os.path.dirname(os.path.abspath(filename)))
+        with open(filename, 'r', errors='ignore') as f:
+            content = f.read()
+        return self.add(instrument, content, year=year, source=os.path.abspath(filename))
+
+    def preload(self, directory, instrument=None):
+        """Recursively add every .cal file under a directory, returns the number added."""
+        count = 0
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                if not name.lower().endswith('.cal'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    self.add_file(path, instrument=instrument)
+                except ValueError as e:
+                    print(f"[WARNING] {e}")
+                    continue
+                count += 1
+        print(f"[INFO] Loaded {count} calibration files from {directory}")
+        return count
+
+    def preload_urls(self, mapping=None):
+        """Download every file in an instrument -> [urls] mapping (defaults to instrument_files)."""
+        mapping = instrument_files if mapping is None else mapping
+        for instrument, urls in mapping.items():
+            for url in urls:
+                response = requests.get(url)
+                if response.status_code != 200:
+                    print(f"[WARNING] Failed to retrieve file from {url}")
+                    continue
+                self.add(instrument, response.text, year=_calibration_year(url), source=url)
+
+    def lookup(self, instrument, data_year):
+        """Content hash of the calibration that applies to data_year, or None."""
+        entries = self.index.get(instrument, [])
+        return _select_by_year([(e['year'], e['sha256']) for e in entries], data_year)
+
+    def get(self, instrument, data_year):
+        """Calibration file content for an instrument and data year, or None if not stored."""
+        digest = self.lookup(instrument, data_year)
+        if digest is None:
+            return None
+        with open(self._object_path(digest), 'r') as f:
+            return f.read()
+
+    def parsed(self, content, parser=None):
+        """
+        Parsed calibration for the given file content, computed once per parser.
+
+        parser is ``parse_no3_cal`` (default) or ``parse_isus_cal``.
+        """
+        parser = parser or parse_no3_cal
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        key = (digest, parser.__name__)
+        if key not in self._parsed:
+            parsed_path = self._object_path(digest, suffix=f'.{parser.__name__}.json')
+            if os.path.exists(parsed_path):
+                with open(parsed_path, 'r') as f:
+                    ncal = json.load(f)
+            else:
+                ncal = parser(content)
+                with open(parsed_path, 'w') as f:
+                    json.dump(ncal, f)
+            self._parsed[key] = ncal
+        return copy.deepcopy(self._parsed[key])
@@ -16,6 +16,8 @@ from typing import List, Optional, Tuple
 
 import pandas as pd
 
+from ..profiling import profiled
+
 
 class tdgp(object):
     r"""
@@ -32,6 +34,7 @@ class tdgp(object):
         """Initializes the tdgp parser."""
         self.rawdata_df: Optional[pd.DataFrame] = None
 
+    @profiled()
     def parse(self, filename: str, datetime_index: bool = True) -> Tuple[pd.DataFrame, List[str]]:
         r"""
         Opens and reads a TDGP text file.
@@ -11,6 +11,8 @@ These include:
 import numpy as np
 import pandas as pd
 
+from ..profiling import profiled
+
 
 class rcm_excel(object):
     r"""Anderaa instruments (RCM 4, 7, 9, 11's
@@ -23,6 +25,7 @@ class rcm_excel(object):
     TODO: This should be a replacement of the original rcm mooring analyis software"""
 
     @staticmethod
+    @profiled()
     def parse_excel(filename=None, datetime_index=True):
         r"""
         Basic Method to open and read rcm excel files
@@ -51,6 +54,7 @@ class rcm(object):
     Pressure, Turb, Cond/Sal, Temp have a transfer equation and coefs that need to be applied and these are unique to each unit (oxy are cal'd on instrument ad output a scaled value that is rcm independent, U/V comps are cal'd to the board and also output a alue that is already scaled)
     """
 
+    @profiled()
     def parse(
         self, filename=None, number_of_channels=8, time_format=0, datetime_index=True
     ):
@@ -142,6 +146,7 @@ class rcm(object):
             self.rawdata_df["ident"] == ident
         ]  # <-- there is a value that represents data and one that represents headers, drop all the headers
 
+    @profiled(rows='self.rawdata_df')
     def engr2sci_curr(self):
         """
         Convert speed/dir
@@ -158,6 +163,7 @@ class rcm(object):
             np.deg2rad(self.rawdata_df["current_direction_uncorrected"])
         )
 
+    @profiled(rows='self.rawdata_df')
     def engr2sci_oxy(self, channel="chan8"):
         """
         Convert oxygen
@@ -170,6 +176,7 @@ class rcm(object):
             self.rawdata_df["oxy_conc"] = self.rawdata_df["chan7"] * 0.4883
             self.rawdata_df["oxy_percentsat"] = self.rawdata_df["chan7"] * 0.1465
 
+    @profiled(rows='self.rawdata_df')
     def engr2sci_temp(self, coefA=0, coefB=0, coefC=0, coefD=0):
         """
         Convert temperature
@@ -182,6 +189,7 @@ class rcm(object):
             + coefD * (self.rawdata_df["temp_engr"] ** 3)
         )
 
+    @profiled(rows='self.rawdata_df')
     def engr2sci_pres(self, coefA=0, coefB=0, coefC=0, equationType="low", units="kPa"):
         """
         Convert pressure
@@ -198,6 +206,7 @@ class rcm(object):
             elif units == "kPa":
                 self.rawdata_df["pressure"] = self.rawdata_df["pressure"] / 10 - 10
 
+    @profiled()
     def mag_dec_corr(self, lat, lonW, dep_date, apply_correction=True):
         """Calculate mag declinatin correction based on lat, lon (+ West) and date.
 
@@ -244,6 +253,7 @@ class rcm_sg(object):
     TODO: This should be a replacement of the original rcm mooring analyis software"""
 
     @staticmethod
+    @profiled()
     def parse_excel(filename=None, datetime_index=True):
         r"""
         Basic Method to open and read rcm excel files
@@ -272,6 +282,7 @@ class rcm_sg(object):
         return rawdata_df
 
     @staticmethod
+    @profiled()
     def parse(filename=None, datetime_index=True):
         r"""
         Basic Method to open and read rcm text files
@@ -316,6 +327,7 @@ class rcm_sg(object):
         """Load the data into the rawdata_df attribute."""
         self.rawdata_df = data
 
+    @profiled()
     def mag_dec_corr(self, lat, lonW, dep_date, apply_correction=True):
         """Calculate mag declination correction based on lat, lon (+ West) and date.
 
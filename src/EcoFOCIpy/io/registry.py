@@ -0,0 +1,384 @@
+"""
+registry.py
+
+One entry point for the instrument parsers.
+
+Each parser has its own calling convention (static `parse` returning a tuple,
+instance `parse`, MTR parsing in `__init__`, ADCP `load_*_file`...).
+`open_instrument` identifies the instrument from the file extension and the
+first few KB of the file, calls the matching parser and returns an
+`InstrumentData` with the data, the header lines and metadata.
+
+    >>> from EcoFOCIpy.io import open_instrument
+    >>> sbe37 = open_instrument('sbe37_2355.cnv')
+    >>> sbe37.kind, sbe37.data.columns
+    ('sbe37', Index(['temperature', 'conductivity', 'pressure', 'salinity'], dtype='object'))
+    >>> mtr = open_instrument('mtr4051.txt', mtr_coef=[1.1e-3, 2.4e-4, 1.0e-7])
+
+    >>> results = open_instruments(glob.glob('16bsm2a/*'), max_workers=8, errors='skip')
+
+Parser specific keyword arguments are passed through.  Formats are tried in
+registration order, additional formats can be added with `register`.  Parsers
+are imported when a file of their kind is opened, so process pool workers only
+import what they read.
+"""
+import importlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+# bytes read from the start of a file to identify the instrument
+SNIFF_BYTES = 4096
+
+FORMATS = {}
+
+
+class InstrumentData(object):
+    """Parsed instrument file
+
+    Attributes:
+        kind (str): registered format name, eg 'sbe37'
+        filename (str): the file read
+        data (DataFrame): the parsed data, datetime indexed where the parser allows
+        header (list): header lines of the file, empty if the format has none
+        metadata (dict): kind, filename, bytes and parser specific information
+            (eg start_time, number_of_channels, the ADCP setup)
+        parser: the parser instance for follow up methods (engr2sci, mag_dec_corr...),
+            None for the static parsers
+    """
+
+    def __init__(self, kind, filename, data, header=None, metadata=None, parser=None):
+        self.kind = kind
+        self.filename = filename
+        self.data = data
+        self.header = list(header) if header is not None else []
+        self.metadata = {'kind': kind, 'filename': filename,
+                         'bytes': os.path.getsize(filename)}
+        self.metadata.update(metadata or {})
+        self.parser = parser
+
+    def __repr__(self):
+        shape = getattr(self.data, 'shape', None)
+        return f"InstrumentData(kind={self.kind!r}, filename={self.filename!r}, shape={shape})"
+
+
+class InstrumentFormat(object):
+    """A registered format: how to recognise a file and how to read it"""
+
+    def __init__(self, kind, reader, sniffer=None, extensions=()):
+        self.kind = kind
+        self.reader = reader
+        self.sniffer = sniffer
+        self.extensions = tuple(e.lower() for e in extensions)
+
+    def matches(self, ext, head):
+        if self.extensions and ext not in self.extensions:
+            return False
+        if self.sniffer is None:
+            return bool(self.extensions)
+        return bool(self.sniffer(ext, head))
+
+
+def register(kind, sniffer=None, extensions=()):
+    """Decorator registering `reader(filename, **kwargs) -> InstrumentData` for a format
+
+    Args:
+        kind (str): format name, also accepted as `kind=` by open_instrument
+        sniffer (callable, optional): `sniffer(ext, head)` true for files of this format,
+            ext is the lower case extension and head the first SNIFF_BYTES as text
+        extensions (tuple, optional): only files with these extensions match; a
+            format with extensions and no sniffer matches on the extension alone
+
+    Re-registering a kind replaces its reader and keeps its place in the sniffing order.
+    """
+    def decorator(reader):
+        FORMATS[kind] = InstrumentFormat(kind, reader, sniffer, extensions)
+        return reader
+
+    return decorator
+
+
+def _parser(module):
+    return importlib.import_module(f"{__package__}.{module}")
+
+
+def read_head(filename, nbytes=SNIFF_BYTES):
+    """First nbytes of a file as text (undecodable bytes replaced)"""
+    with open(filename, 'rb') as f:
+        return f.read(nbytes).decode('utf-8', errors='replace')
+
+
+def sniff(filename):
+    """Kind of instrument file, from its extension and the first SNIFF_BYTES
+
+    Raises:
+        ValueError: no registered format matches
+    """
+    ext = os.path.splitext(str(filename))[1].lower()
+    head = read_head(filename)
+    for fmt in FORMATS.values():
+        if fmt.matches(ext, head):
+            return fmt.kind
+    raise ValueError(f"Could not identify the instrument of {filename}, "
+                     f"pass kind= one of {sorted(FORMATS)}")
+
+
+def open_instrument(path, kind=None, **kwargs):
+    """Read an instrument data file with the matching parser
+
+    Args:
+        path (str): data file
+        kind (str, optional): registered format name, sniffed from the file if None
+        **kwargs: passed to the parser (eg datetime_index, mtr_coef, number_of_channels)
+
+    Returns:
+        InstrumentData
+    """
+    filename = os.fspath(path)
+    if not os.path.isfile(filename):
+        raise FileNotFoundError(f"No such instrument file: {filename}")
+    if kind is None:
+        kind = sniff(filename)
+    elif kind not in FORMATS:
+        raise ValueError(f"Unknown instrument kind {kind!r}, choose one of {sorted(FORMATS)}")
+    return FORMATS[kind].reader(filename, **kwargs)
+
+
+def _open_task(task):
+    filename, kind, kwargs = task
+    try:
+        return filename, open_instrument(filename, kind=kind, **kwargs), None
+    except Exception as e:
+        return filename, None, e
+
+
+def open_instruments(filenames, kind=None, max_workers=None, errors='raise', **kwargs):
+    """open_instrument for many files in a process pool
+
+    Args:
+        filenames (list): data files, each sniffed unless kind is given
+        kind (str, optional): format of all the files
+        max_workers (int, optional): worker processes, 1 reads in this process
+        errors (str, optional): 'raise' the first failure or 'skip' failed files
+            with a warning. Defaults to 'raise'.
+        **kwargs: passed to every parser
+
+    Returns:
+        dict of filename: InstrumentData in the order of filenames
+    """
+    if errors not in ('raise', 'skip'):
+        raise ValueError("errors must be 'raise' or 'skip'")
+    tasks = [(os.fspath(f), kind, kwargs) for f in filenames]
+
+    if max_workers == 1:
+        results = list(map(_open_task, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_open_task, tasks))
+
+    opened = {}
+    for filename, result, error in results:
+        if error is None:
+            opened[filename] = result
+        elif errors == 'raise':
+            raise error
+        else:
+            print(f"[WARNING] Skipping {filename}: {type(error).__name__}: {error}")
+    return opened
+
+
+# --- sniffers ---
+
+def _first_line(head):
+    return head.lstrip('\ufeff').split('\n', 1)[0].strip()
+
+
+def _has(pattern, flags=0):
+    regex = re.compile(pattern, flags)
+    return lambda ext, head: regex.search(head) is not None
+
+
+# profiling CTDs (SBE 9/11+, 19, 25) read with the ctd package
+_sbe_profile = _has(r'Sea-Bird SBE ?(9|19|25)\w* +Data File|SBE ?11plus')
+
+_SUNA_LINE = re.compile(r'^\w+,\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}')
+_MTRDUINO_LINE = re.compile(r'^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(,\s*-?[\d.]+){6}$')
+_RCM_LINE = re.compile(r'^\d+\s+(\d{2}/\d{2}/\d{4}|\d{2}\.\d{2}\.\d{4})\s+\d{2}:\d{2}:\d{2}'
+                       r'((\s+\S+){6,8})$')
+
+
+def _suna(ext, head):
+    line = _first_line(head)
+    return _SUNA_LINE.match(line) is not None and line.count(',') >= 200
+
+
+def _isus(ext, head):
+    if ext == '.dat':
+        return re.search(r'^\w+,L,', head, re.MULTILINE) is not None
+    return _first_line(head).startswith('S/N,YYYYDDD,HH.HHHHH')
+
+
+def _mtr(ext, head):
+    return _mtr_version(head) is not None
+
+
+def _mtr_version(head):
+    if (re.search(r'READ\s*$', head, re.MULTILINE)
+            and re.search(r'^[0-9A-Fa-f]{16,}\s*$', head, re.MULTILINE)):
+        return 'legacy'
+    if _MTRDUINO_LINE.match(_first_line(head)):
+        return 'mtrduino'
+    return None
+
+
+def _wpak(ext, head):
+    return _first_line(head).split()[:2] == ['DATE', 'TIME']
+
+
+def _rcm_sg(ext, head):
+    return '\t' in head and ('Time tag (Gmt)' in head or 'Record Time' in head)
+
+
+def _rcm(ext, head):
+    return _RCM_LINE.match(_first_line(head)) is not None
+
+
+# --- readers, in sniffing order ---
+
+@register('sbe9_11p', sniffer=_sbe_profile, extensions=('.cnv',))
+def _read_sbe9_11p(filename, **kwargs):
+    sbe_ctd_parser = _parser('sbe_ctd_parser')
+    df_dic, header_dic = sbe_ctd_parser.sbe9_11p.parse([filename], **kwargs)
+    (key,) = df_dic
+    header = header_dic[key]
+    return InstrumentData('sbe9_11p', filename, df_dic[key], header.pop('header'),
+                          metadata=header)
+
+
+# manual_parse, ctd.from_btl does not read the EcoFOCI bottle files
+@register('sbe_btl', extensions=('.btl',))
+def _read_sbe_btl(filename, **kwargs):
+    sbe_ctd_parser = _parser('sbe_ctd_parser')
+    (data,) = sbe_ctd_parser.sbe_btl.manual_parse([filename], **kwargs).values()
+    return InstrumentData('sbe_btl', filename, data)
+
+
+@register('sbe56', sniffer=_has(r'SBE ?56'), extensions=('.cnv',))
+def _read_sbe56(filename, **kwargs):
+    data, header, start_time = _parser('sbe_parser').sbe56.parse(filename, **kwargs)
+    return InstrumentData('sbe56', filename, data, header, {'start_time': start_time})
+
+
+# the SBE37/39 uploads are csv, whatever the extension
+@register('sbe37', sniffer=_has(r'Sea-Bird SBE ?37|^\* SBE ?37', re.MULTILINE))
+def _read_sbe37(filename, **kwargs):
+    data, header = _parser('sbe_parser').sbe37.parse(filename, **kwargs)
+    return InstrumentData('sbe37', filename, data, header)
+
+
+@register('sbe39', sniffer=_has(r'Sea-Bird SBE ?39|^\* SBE ?39', re.MULTILINE))
+def _read_sbe39(filename, **kwargs):
+    data, header = _parser('sbe_parser').sbe39.parse(filename, **kwargs)
+    return InstrumentData('sbe39', filename, data, header)
+
+
+# any other moored Sea-Bird cnv
+@register('sbe16', extensions=('.cnv',))
+def _read_sbe16(filename, **kwargs):
+    data, header = _parser('sbe_parser').sbe16.parse(filename, **kwargs)
+    return InstrumentData('sbe16', filename, data, header)
+
+
+@register('sbe26', extensions=('.tid',))
+def _read_sbe26(filename, **kwargs):
+    data = _parser('sbe_parser').sbe26.parse(filename, **kwargs)
+    return InstrumentData('sbe26', filename, data, [read_head(filename, 200).split('\n')[0]])
+
+
+ADCP_LOADERS = {'.vel': 'load_vel_file', '.pg': 'load_pg_file', '.ein': 'load_ein_file',
+                '.sca': 'load_scal_file'}
+
+
+@register('adcp', extensions=tuple(ADCP_LOADERS))
+def _read_adcp(filename, serial_no=None, **kwargs):
+    """One of the .VEL/.PG/.EIN/.SCA files, the setup is read from a .RPT file next to it"""
+    stem, ext = os.path.splitext(filename)
+    adcp = _parser('adcp_parser').adcp(serial_no=serial_no or os.path.basename(stem))
+    data = getattr(adcp, ADCP_LOADERS[ext.lower()])(filename, **kwargs)
+
+    header = []
+    for rpt in (stem + '.RPT', stem + '.rpt'):
+        if os.path.exists(rpt):
+            header, _ = adcp.load_rpt_file(rpt)
+            break
+    return InstrumentData('adcp', filename, data, header,
+                          {'serial_no': adcp.serial_no, 'setup': dict(adcp.setup)}, parser=adcp)
+
+
+@register('isus', sniffer=_isus, extensions=('.dat', '.csv'))
+def _read_isus(filename, **kwargs):
+    isus = _parser('nitrates_parser').Isus()
+    data = isus.parse(filename, **kwargs)
+    return InstrumentData('isus', filename, data, parser=isus)
+
+
+@register('suna', sniffer=_suna)
+def _read_suna(filename, **kwargs):
+    suna = _parser('nitrates_parser').Suna()
+    data = suna.parse(filename, **kwargs)
+    return InstrumentData('suna', filename, data, parser=suna)
+
+
+@register('mtr', sniffer=_mtr)
+def _read_mtr(filename, version=None, **kwargs):
+    """Legacy (v3/v4) or MTRduino (v5), pass mtr_coef for the temperature conversion"""
+    version = version or _mtr_version(read_head(filename)) or 'legacy'
+    mtr = _parser('mtr_parser').MTR(filename, version, **kwargs)
+    return InstrumentData('mtr', filename, mtr.data, mtr.header, {'version': version},
+                          parser=mtr)
+
+
+@register('wetlabs', sniffer=_has(r'^\$get', re.MULTILINE))
+def _read_wetlabs(filename, **kwargs):
+    wetlabs = _parser('wetlabs_parser').wetlabs()
+    data, header = wetlabs.parse(filename, **kwargs)
+    return InstrumentData('wetlabs', filename, data, header,
+                          {'channels': list(data.columns)}, parser=wetlabs)
+
+
+@register('tdgp', sniffer=_has(r'File Contents:'))
+def _read_tdgp(filename, **kwargs):
+    tdgp = _parser('prooceanus_parser').tdgp()
+    data, header = tdgp.parse(filename, **kwargs)
+    return InstrumentData('tdgp', filename, data, header, parser=tdgp)
+
+
+@register('wpak', sniffer=_wpak)
+def _read_wpak(filename, **kwargs):
+    wpak = _parser('wpak_parser').wpak()
+    data = wpak.parse(filename, **kwargs)
+    return InstrumentData('wpak', filename, data, parser=wpak)
+
+
+@register('rcm_sg', sniffer=_rcm_sg)
+def _read_rcm_sg(filename, **kwargs):
+    data, header = _parser('rcm_parser').rcm_sg.parse(filename, **kwargs)
+    return InstrumentData('rcm_sg', filename, data, header)
+
+
+@register('rcm', sniffer=_rcm)
+def _read_rcm(filename, number_of_channels=None, time_format=None, **kwargs):
+    """Converted dsu file, the channel count and date format are taken from the first line"""
+    match = _RCM_LINE.match(_first_line(read_head(filename)))
+    if number_of_channels is None:
+        # ident, speed, dir, temp, cond, press and up to two more channels
+        ncolumns = len(match.group(2).split()) if match else 6
+        number_of_channels = ncolumns if ncolumns in (7, 8) else 6
+    if time_format is None:
+        time_format = 1 if match and '.' in match.group(1) else 0
+    rcm = _parser('rcm_parser').rcm()
+    data = rcm.parse(filename, number_of_channels=number_of_channels,
+                     time_format=time_format, **kwargs)
+    return InstrumentData('rcm', filename, data,
+                          metadata={'number_of_channels': number_of_channels,
+                                    'time_format': time_format}, parser=rcm)
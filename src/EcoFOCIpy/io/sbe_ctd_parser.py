@@ -15,6 +15,8 @@ import sys
 import ctd
 import pandas as pd
 
+from ..profiling import profiled
+
 
 def seabird_header(filename=None):
     r""" Seabird Instruments have a header usually defined by *END with a significant amount of
@@ -99,6 +101,7 @@ class sbe_btl(object):
         return df_dic
 
     @staticmethod
+    @profiled()
     def parse(file_list=[None]):
         """Use the CTD python package to read and process .btl files
 
@@ -131,6 +134,7 @@ class sbe9_11p(object):
 
 
     @staticmethod
+    @profiled()
     def parse(file_list=[None], datetime_index=True):
         r"""
         Basic Method to open and read sbe9_11 .cnv files
@@ -12,6 +12,8 @@ import sys
 
 import pandas as pd
 
+from ..profiling import profiled
+
 
 def sbetime_conversion(time_type='timeJ',data=None):
     """Seabird offers multiple time output options:
@@ -54,6 +56,7 @@ class sbe16(object):
 
 
     @staticmethod
+    @profiled()
     def parse(filename=None, return_header=True, datetime_index=True):
         r"""
         Basic Method to open and read sbe16 .cnv files
@@ -123,6 +126,7 @@ class sbe26(object):
     """
 
     @staticmethod
+    @profiled()
     def parse(filename=None, datetime_index=True):
         r"""
         Basic Method to open and read sbe26 .tid files
@@ -159,6 +163,7 @@ class sbe37(object):
     """
 
     @staticmethod
+    @profiled()
     def parse(filename=None, return_header=True, datetime_index=True):
         r"""
         Basic Method to open and read sbe37 csv files
@@ -213,6 +218,7 @@ class sbe39(object):
     """
 
     @staticmethod
+    @profiled()
     def parse(filename=None, return_header=True, datetime_index=True):
         r"""
         Basic Method to open and read sbe39 csv files
@@ -262,6 +268,7 @@ class sbe56(object):
     """
 
     @staticmethod
+    @profiled()
     def parse(filename=None, return_header=True, datetime_index=True):
         r"""
         Basic Method to open and read sbe56 cnv files
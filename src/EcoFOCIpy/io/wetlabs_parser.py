@@ -17,6 +17,8 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
 
+from ..profiling import profiled
+
 
 class wetlabs(object):
     r""" Wetlabs Unified parser
@@ -36,6 +38,7 @@ class wetlabs(object):
         """
         self.rawdata_df: Optional[pd.DataFrame] = None
 
+    @profiled()
     def parse(self, filename: str) -> Tuple[pd.DataFrame, List[str]]:
         r"""
         Opens and reads Wetlabs data files.
@@ -100,6 +103,7 @@ class wetlabs(object):
         self.rawdata_df = pd.DataFrame(data).set_index('date_time')
         return self.rawdata_df, header_lines
 
+    @profiled()
     def engr2sci(self, cal_coef: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
         """
         Converts engineering units (counts) to scientific units.
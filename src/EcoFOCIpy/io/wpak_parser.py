@@ -2,6 +2,8 @@ from typing import Optional
 
 import pandas as pd
 
+from ..profiling import profiled
+
 
 class wpak(object):
     r"""
@@ -17,6 +19,7 @@ class wpak(object):
         """Initializes the parser instance."""
         self.data: Optional[pd.DataFrame] = None
 
+    @profiled()
     def parse(self, filename: str, datetime_index: bool = True) -> pd.DataFrame:
         r"""
         Opens and reads WPAK data files from a given path.
@@ -0,0 +1,18 @@
+"""Oceanographic calculations and transformations
+
+Submodules are imported on first access.
+"""
+from .._lazy import lazy_submodules
+
+__all__ = [
+    "aandopt_oxy_corr",
+    "cleaning",
+    "geomag",
+    "geotools",
+    "haversine",
+    "lanzcos",
+    "nitrates_corr",
+    "profile_binning",
+]
+
+__getattr__, __dir__ = lazy_submodules(__name__, __all__)
@@ -8,11 +8,13 @@ These include:
 * ISUS
 
 """
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+from ..profiling import profiled
 
+
+@profiled()
 def calc_nitrate_concentration(nitrate_data_filtered, s16_interpolated, ncal, inst_shortname='suna', WL_offset=210, pres_coef=0.026, sat_value=64500):
     """
     Calculate nitrate concentration from SUNA/ISUS data with necessary corrections. 
@@ -251,7 +253,8 @@ def plot_corrected_data(WL_UV, E_S_interp, E_N_interp, ESW_in_situ, ESW_in_situ_
     savepath : str or Path, optional
         File path to save the figure. If None (default), the plot is displayed but not saved.
     """
-    
+    import matplotlib.pyplot as plt
+
     fig, axes = plt.subplots(2, 2, figsize=(10, 7))
     titles = ['Total absorbance', 'Bromide absorbance', 'Absorbance (Nitrate and baseline)']
     data = [ABS_SW, ABS_Br_tcor, ABS_cor]
@@ -305,7 +308,8 @@ def plot_intensity(ncal, nitrate_data_filtered, timestamps, mooring_config, inst
     savepath : str or Path, optional
         File path to save the figure. If None (default), the plot is displayed but not saved.
     """
-    
+    import matplotlib.pyplot as plt
+
     # === Instrument-specific dark value and slice ===
     if inst_shortname.lower() == 'suna':
         dark_col = 'Dark value used for fit'
@@ -356,7 +360,8 @@ def plot_nitrate_and_rmse(nitrate_data_filtered, no3_concentration, ylim=(0, 30)
     savepath : str or Path, optional
         File path to save the figure. If None (default), the plot is displayed but not saved.
     """
-    
+    import matplotlib.pyplot as plt
+
     # === Dynamic column names ===
     if inst_shortname.lower() == 'suna':
         nitrate_col = 'Nitrate concentration, μM'
@@ -414,6 +419,7 @@ def qc_nitrate(no3_concentration, nitrate_data_filtered, rmse_cutoff=0.0035,
     savepath : str or Path, optional
         File path to save the figure. If None (default), the plot is displayed but not saved.
     """
+    import matplotlib.pyplot as plt
 
     # === Dynamic column names ===
     if inst_shortname.lower() == 'suna':
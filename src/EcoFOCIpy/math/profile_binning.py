@@ -0,0 +1,144 @@
+"""
+profile_binning.py
+
+Bin CTD casts (eg sbe9_11p.parse output) to standard pressure levels.
+
+Every cast is split into downcast and upcast at its maximum pressure and the
+selected half is averaged into bins of `bin_size` dbar centred on the levels
+(the 1 dbar bin for 10 dbar holds 9.5 <= p < 10.5).  All casts are binned
+together: each scan gets a flat (profile, bin) index and the sums are built
+with np.bincount, so there is no per-cast or per-bin python loop.
+
+    >>> casts, headers = sbe_ctd_parser.sbe9_11p.parse(file_list)
+    >>> binned = profile_binning.bin_casts(casts, bin_size=1.0, direction='down')
+    >>> binned['t090C'].sel(profile='ctd001.cnv')
+
+"""
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+
+def split_cast(pressure):
+    """Downcast mask for one cast, True up to and including the maximum pressure
+
+    Args:
+        pressure (array): pressure in scan order
+
+    Returns:
+        np.array of bool, the upcast is the inverse
+    """
+    pressure = np.asarray(pressure, dtype=float)
+    downcast = np.zeros(len(pressure), dtype=bool)
+    if len(pressure) and not np.isnan(pressure).all():
+        downcast[: np.nanargmax(pressure) + 1] = True
+    return downcast
+
+
+def bin_statistics(profile_index, bin_index, values, nprofiles, nbins, ddof=1):
+    """Mean, count and standard deviation of values for each (profile, bin)
+
+    NaNs are ignored.  The deviations are summed about the bin means (two pass)
+    rather than from the sum of squares to avoid cancellation.
+
+    Args:
+        profile_index (np.array): profile number of each value
+        bin_index (np.array): bin number of each value
+        values (np.array): data
+        nprofiles (int): number of profiles
+        nbins (int): number of bins
+        ddof (int, optional): delta degrees of freedom of the std. Defaults to 1.
+
+    Returns:
+        (mean, count, std) arrays of shape (nprofiles, nbins)
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    flat = (profile_index * nbins + bin_index)[valid]
+    values = values[valid]
+    size = nprofiles * nbins
+
+    count = np.bincount(flat, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.bincount(flat, weights=values, minlength=size) / count
+        sumsq = np.bincount(flat, weights=(values - mean[flat]) ** 2, minlength=size)
+        std = np.sqrt(sumsq / (count - ddof))
+    std[count <= ddof] = np.nan
+
+    shape = (nprofiles, nbins)
+    return mean.reshape(shape), count.reshape(shape).astype(np.int32), std.reshape(shape)
+
+
+def bin_casts(casts, bin_size=1.0, direction="down", variables=None, pressure=None,
+              pressure_range=None, stats=("mean", "count", "std")):
+    """Bin one or more casts to a (profile, pressure) grid
+
+    Args:
+        casts (DataFrame or dict): one cast or {cast name: DataFrame} as returned by
+            sbe9_11p.parse, rows in scan order
+        bin_size (float, optional): bin width in dbar. Defaults to 1.0.
+        direction (str, optional): 'down' or 'up' cast. Defaults to 'down'.
+        variables (list, optional): columns to bin. Defaults to all numeric columns.
+        pressure (str, optional): pressure column, defaults to the index (python-ctd
+            puts 'Pressure [dbar]' in the index)
+        pressure_range (tuple, optional): (min, max) bin centres of the output grid.
+            Defaults to the range of the data.
+        stats (tuple, optional): any of 'mean', 'count', 'std'. The mean keeps the
+            variable name, the others get a `_count`/`_std` suffix.
+
+    Returns:
+        xarray.Dataset with dimensions (profile, pressure)
+    """
+    assert direction in ["down", "up"], "direction must be 'down' or 'up'"
+
+    if isinstance(casts, pd.DataFrame):
+        casts = {"profile": casts}
+    names = list(casts)
+    frames = [casts[name] for name in names]
+
+    if variables is None:
+        variables = [
+            col for col in frames[0].columns
+            if col != pressure and pd.api.types.is_numeric_dtype(frames[0][col])
+        ]
+
+    press = [
+        np.asarray(df[pressure] if pressure else df.index, dtype=float) for df in frames
+    ]
+    keep = [split_cast(p) if direction == "down" else ~split_cast(p) for p in press]
+
+    profile_index = np.concatenate(
+        [np.full(k.sum(), i) for i, k in enumerate(keep)]
+    ).astype(np.intp)
+    levels = np.floor(np.concatenate([p[k] for p, k in zip(press, keep)]) / bin_size + 0.5)
+
+    if pressure_range is None:
+        lo, hi = np.nanmin(levels), np.nanmax(levels)
+    else:
+        lo, hi = np.round(np.asarray(pressure_range, dtype=float) / bin_size)
+    nbins = int(hi - lo) + 1
+    bin_index = levels - lo
+    inside = (bin_index >= 0) & (bin_index < nbins)  # also drops NaN pressure
+    profile_index, bin_index = profile_index[inside], bin_index[inside].astype(np.intp)
+
+    data_vars = {}
+    for var in variables:
+        values = np.concatenate([df[var].to_numpy()[k] for df, k in zip(frames, keep)])
+        mean, count, std = bin_statistics(
+            profile_index, bin_index, values[inside], len(names), nbins
+        )
+        if "mean" in stats:
+            data_vars[var] = (("profile", "pressure"), mean)
+        if "count" in stats:
+            data_vars[var + "_count"] = (("profile", "pressure"), count)
+        if "std" in stats:
+            data_vars[var + "_std"] = (("profile", "pressure"), std)
+
+    xdf = xr.Dataset(
+        data_vars,
+        coords={"profile": names, "pressure": (lo + np.arange(nbins)) * bin_size},
+    )
+    xdf["pressure"].attrs = {"units": "dbar", "bin_size": bin_size}
+    xdf.attrs["cast_direction"] = direction
+    return xdf
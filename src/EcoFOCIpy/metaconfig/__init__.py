@@ -0,0 +1,11 @@
+"""yaml configuration loading
+
+Submodules are imported on first access.
+"""
+from .._lazy import lazy_submodules
+
+__all__ = [
+    "load_config",
+]
+
+__getattr__, __dir__ = lazy_submodules(__name__, __all__)
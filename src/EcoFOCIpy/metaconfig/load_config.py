@@ -1,9 +1,21 @@
+import copy
+import os
 from collections import OrderedDict
+from functools import lru_cache
+from types import MappingProxyType
 
 import yaml
 
+# libyaml's C loader is several times faster than the pure python one
+DefaultLoader = getattr(yaml, "CLoader", yaml.Loader)
 
-def ordered_load(stream, Loader=yaml.Loader, object_pairs_hook=OrderedDict):
+# {abspath: (mtime_ns, size, config, read-only view or None)}
+_CONFIG_CACHE = {}
+
+
+@lru_cache(maxsize=None)
+def ordered_loader(Loader=DefaultLoader, object_pairs_hook=OrderedDict):
+    """Loader subclass constructing mappings with object_pairs_hook, built once per pair"""
     class OrderedLoader(Loader):
         pass
 
@@ -14,22 +26,67 @@ def ordered_load(stream, Loader=yaml.Loader, object_pairs_hook=OrderedDict):
     OrderedLoader.add_constructor(
         yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG, construct_mapping
     )
-    return yaml.load(stream, OrderedLoader)
+    return OrderedLoader
+
+
+def ordered_load(stream, Loader=DefaultLoader, object_pairs_hook=OrderedDict):
+    return yaml.load(stream, ordered_loader(Loader, object_pairs_hook))
+
+
+def _readonly(obj):
+    """Read-only view of a parsed config: mappings become MappingProxyType, lists tuples"""
+    if isinstance(obj, dict):
+        return MappingProxyType(type(obj)((k, _readonly(v)) for k, v in obj.items()))
+    if isinstance(obj, list):
+        return tuple(_readonly(v) for v in obj)
+    return obj
+
+
+def load_config(filename, cache=True, readonly=False):
+    """Load a yaml config file (in file order)
 
-def load_config(filename):
-    """TODO: deprecate since py38 orderes inherently"""
+    Parsed files are kept keyed on path and modification time, so loading the same
+    config again only copies it (or returns the shared read-only view) until the
+    file changes.
 
+    Args:
+        filename (str): yaml file
+        cache (bool, optional): use/keep the parsed file in the cache. Defaults to True.
+        readonly (bool, optional): return a shared read-only view (MappingProxyType)
+            instead of a copy that can be modified. Defaults to False.
+    """
     try:
-        d = ordered_load(open(filename))
-    except:
+        path = os.path.abspath(str(filename))
+        stat = os.stat(path)
+        cached = _CONFIG_CACHE.get(path) if cache else None
+        if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+            with open(path) as f:
+                d = ordered_load(f)
+            cached = (stat.st_mtime_ns, stat.st_size, d, None)
+            if cache:
+                _CONFIG_CACHE[path] = cached
+    except OSError:
         raise RuntimeError(f"{filename} not found")
 
-    return d
+    if readonly:
+        if cached[3] is None:
+            cached = cached[:3] + (_readonly(cached[2]),)
+            if cache:
+                _CONFIG_CACHE[path] = cached
+        return cached[3]
+
+    return copy.deepcopy(cached[2]) if cache else cached[2]
+
+
+def clear_config_cache():
+    """Forget all parsed configs"""
+    _CONFIG_CACHE.clear()
+
 
 def write_config(infile, data):
     """ Input - full path to config file
         Dictionary of parameters to write
-        
+
         Output - None
     """
     infile = str(infile)
@@ -37,6 +94,7 @@ def write_config(infile, data):
     assert 'yaml' in infile, 'File possibly not a yaml config file'
 
     try:
-        yaml.safe_dump(data, open(infile, "w"), default_flow_style=False, sort_keys=False)
+        with open(infile, "w") as f:
+            yaml.safe_dump(data, f, default_flow_style=False, sort_keys=False)
     except:
         raise RuntimeError("{0} not found".format(infile))
@@ -10,9 +10,82 @@ import matplotlib as mpl
 import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker
 import numpy as np
+import pandas as pd
 from matplotlib.dates import DateFormatter, MonthLocator
 
-__all__ = ["Timeseries1dStickPlot"]
+__all__ = ["Timeseries1dStickPlot", "aggregation_interval", "vector_average"]
+
+# candidate aggregation intervals for decimated stick plots
+AGGREGATION_INTERVALS = ['1h', '2h', '3h', '6h', '12h', '1D', '2D', '3D', '7D', '14D', '30D']
+
+
+def aggregation_interval(timedata, pixel_width, pixels_per_stick=2):
+    """Choose an aggregation interval so there is no more than one stick per
+    `pixels_per_stick` pixels of the figure.
+
+    Parameters
+    ----------
+    timedata : array_like
+      times of the samples
+    pixel_width : float
+      width of the figure in pixels (figure width in inches * dpi)
+    pixels_per_stick : float
+      minimum horizontal spacing between sticks in pixels
+
+    Returns
+    -------
+    str or None
+      pandas offset alias from AGGREGATION_INTERVALS, None if the record
+      is already sparse enough to draw at full resolution
+    """
+    timedata = pd.DatetimeIndex(timedata)
+    max_sticks = max(int(pixel_width / pixels_per_stick), 1)
+    if len(timedata) <= max_sticks:
+        return None
+
+    span = timedata.max() - timedata.min()
+    needed = span / max_sticks
+    for interval in AGGREGATION_INTERVALS:
+        if pd.Timedelta(interval) >= needed:
+            return interval
+    return AGGREGATION_INTERVALS[-1]
+
+
+def vector_average(timedata, udata, vdata, interval):
+    """Vector average u/v into time bins and keep the min/max envelopes
+
+    Parameters
+    ----------
+    timedata : array_like
+      times of the samples
+    udata, vdata : array_like
+      east and north components
+    interval : str
+      pandas offset alias for the bins
+
+    Returns
+    -------
+    DataFrame
+      indexed by the mean sample time of each bin with columns
+      u, v (component means), mag_min, mag_max, u_min, u_max, v_min, v_max.
+      Empty bins are dropped.
+    """
+    df = pd.DataFrame({'u': np.asarray(udata, dtype=float),
+                       'v': np.asarray(vdata, dtype=float)},
+                      index=pd.DatetimeIndex(timedata))
+    df['mag'] = np.sqrt(df['u']**2 + df['v']**2)
+    t0 = df.index.min()
+    df['t'] = (df.index - t0) / pd.Timedelta(seconds=1)
+
+    binned = df.resample(interval)
+    agg = pd.DataFrame({'u': binned['u'].mean(), 'v': binned['v'].mean(),
+                        'mag_min': binned['mag'].min(), 'mag_max': binned['mag'].max(),
+                        'u_min': binned['u'].min(), 'u_max': binned['u'].max(),
+                        'v_min': binned['v'].min(), 'v_max': binned['v'].max(),
+                        't': binned['t'].mean()})
+    agg = agg.dropna(subset=['t'])
+    agg.index = pd.DatetimeIndex(t0 + pd.to_timedelta(agg.pop('t'), unit='s'), name='date_time')
+    return agg
 
 class Timeseries1dStickPlot(object):
 
@@ -80,9 +153,29 @@ class Timeseries1dStickPlot(object):
       return ptitle
 
 
-    def plot(self, timedata=None, udata=None, vdata=None, ylabel=None, linescale=1, **kwargs):
+    def plot(self, timedata=None, udata=None, vdata=None, ylabel=None, linescale=1,
+             decimate=False, resample=None, **kwargs):
+      """Stick plot of u/v with the current magnitude and a u/v timeseries panel
+
+      Parameters
+      ----------
+      timedata : array_like
+        times of the samples
+      udata, vdata : array_like
+        east and north current components
+      linescale : float
+        width scale of the sticks
+      decimate : bool
+        aggregate to an interval chosen from the figure's pixel width
+        (see `aggregation_interval`) so long records render in constant time
+      resample : str
+        explicit aggregation interval (pandas offset alias, eg '6h' or '1D'),
+        overrides decimate
+      rotate : float
+        (kwarg) rotate the vectors by this many degrees
+      """
 
-      if kwargs['rotate'] != 0.0:
+      if kwargs.get('rotate', 0.0) != 0.0:
           #when rotating vectors - positive(+) rotation is equal to cw of the axis (ccw of vector)
           #                      - negative(+) rotation is equal to ccw of the axis (cw of the vector)
           print("rotating vectors")
@@ -94,11 +187,27 @@ class Timeseries1dStickPlot(object):
 
       fig, (ax1,ax2) = plt.subplots(2,1,sharex='col',figsize=(11,4.25))
 
+      # full resolution series for the u/v panel, replaced by min/max pairs when aggregating
+      vtime, vline, uline = timedata, vdata, udata
+      # magnitude is shaded from 0, or over the min/max envelope of each bin when aggregating
+      mag_floor = 0
+
+      interval = resample
+      if interval is None and decimate:
+          interval = aggregation_interval(timedata, fig.get_figwidth() * fig.dpi)
+      if interval is not None:
+          agg = vector_average(timedata, udata, vdata, interval)
+          timedata, udata, vdata, magnitude = (agg.index, agg['u'].to_numpy(),
+                                               agg['v'].to_numpy(), agg['mag_max'].to_numpy())
+          mag_floor = agg['mag_min'].to_numpy()
+          vtime = np.repeat(agg.index.to_numpy(), 2)
+          vline = agg[['v_min', 'v_max']].to_numpy().ravel()
+          uline = agg[['u_min', 'u_max']].to_numpy().ravel()
 
       # Plot u and v components
       # Plot quiver
       ax1.set_ylim(-1*np.nanmax(magnitude), np.nanmax(magnitude))
-      fill1 = ax1.fill_between(timedata, magnitude, 0, color='k', alpha=0.1)
+      fill1 = ax1.fill_between(timedata, magnitude, mag_floor, color='k', alpha=0.1)
 
       # Fake 'box' to be able to insert a legend for 'Magnitude'
       """
@@ -120,8 +229,8 @@ class Timeseries1dStickPlot(object):
       ax1.axes.get_xaxis().set_visible(False)
       ax1.set_xlim(timedata.min(),timedata.max())
       ax1.set_ylabel("Velocity (cm/s)")
-      ax2.plot(timedata, vdata, 'b-', linewidth=0.25)
-      ax2.plot(timedata, udata, 'g-', linewidth=0.25)
+      ax2.plot(vtime, vline, 'b-', linewidth=0.25)
+      ax2.plot(vtime, uline, 'g-', linewidth=0.25)
       ax2.set_xlim(timedata.min(),timedata.max())
       ax2.set_xlabel("Date (UTC)")
       ax2.set_ylabel("Velocity (cm/s)")
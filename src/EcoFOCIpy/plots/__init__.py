@@ -0,0 +1,13 @@
+"""Plotting tools
+
+Submodules are imported on first access.
+"""
+from .._lazy import lazy_submodules
+
+__all__ = [
+    "TimeSeriesStickPlot",
+    "batch_plots",
+    "sbe_ctd_plots",
+]
+
+__getattr__, __dir__ = lazy_submodules(__name__, __all__)
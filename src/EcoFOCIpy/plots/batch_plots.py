@@ -0,0 +1,239 @@
+"""
+EcoFOCI batch figure rendering
+
+Render the cruise/mooring quicklook figures (profile, TS and stick plots)
+headless in a process pool and write them to an output directory.
+
+Jobs are plain dictionaries so they can be built by hand or with the
+helpers below from parsed datasets:
+
+    {'name': 'ctd001_TempSalSigmaT',   # output file name (no extension)
+     'kind': 'plot3var',               # plot2var, plot3var, salvtemp or stick
+     'kwargs': {...},                  # passed to the plotting routine
+     'height_scale': 3}                # optional, stretch the figure height
+
+Example:
+
+    >>> jobs = batch_plots.profile_jobs(cruise_data, kind='plot3var',
+    ...                                 varname=['temperature_ch1','temperature_ch2',
+    ...                                          'salinity_ch1','salinity_ch2',
+    ...                                          'sigma_t_ch1','sigma_t_ch2'],
+    ...                                 xlabel=['Temperature','Salinity','SigmaT'],
+    ...                                 suffix='TempSalSigmaT')
+    >>> jobs += batch_plots.salvtemp_jobs(cruise_data)
+    >>> report = batch_plots.render_figures(jobs, 'figures/', max_workers=4)
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib as mpl
+import numpy as np
+import pandas as pd
+
+__all__ = ["profile_jobs", "salvtemp_jobs", "stick_jobs", "render_figures"]
+
+PLOT_KINDS = ['plot2var', 'plot3var', 'salvtemp', 'stick']
+
+# plotter instance and rcParams snapshot per plot kind, built once per worker process
+_TEMPLATES = {}
+
+
+def profile_jobs(casts, varname, xlabel=None, suffix='profile', kind='plot3var',
+                 depth_level='depth', secondary=True, height_scale=3):
+    """Build CTDProfilePlot jobs for a set of casts
+
+    Parameters
+    ----------
+    casts : dict
+        {cast name: DataFrame} e.g. the output of sbe9_11p.parse or
+        EcoFOCI_CFnc datasets converted with to_dataframe()
+    varname : list
+        variable names passed to plot2var/plot3var, missing or empty names
+        are plotted as empty arrays
+    xlabel : list
+        axis labels
+    suffix : str
+        appended to the cast name to build the file name
+    kind : str
+        'plot2var' or 'plot3var'
+    depth_level : str
+        index level (or column) holding depth/pressure, falls back to the index
+
+    Returns
+    -------
+    list of job dictionaries
+    """
+    assert kind in ['plot2var', 'plot3var'], "kind must be 'plot2var' or 'plot3var'"
+
+    jobs = []
+    for cast, df in casts.items():
+        xdata = [df[v].to_numpy() if (v and v in df.columns) else np.array([]) for v in varname]
+        if depth_level in df.columns:
+            ydata = df[depth_level].to_numpy()
+        elif depth_level in (df.index.names or []):
+            ydata = df.index.get_level_values(depth_level).to_numpy()
+        else:
+            ydata = df.index.to_numpy()
+
+        jobs.append({'name': f"{_cast_name(cast)}_{suffix}",
+                     'kind': kind,
+                     'kwargs': {'varname': varname, 'xdata': xdata, 'ydata': ydata,
+                                'xlabel': xlabel, 'secondary': secondary},
+                     'height_scale': height_scale})
+    return jobs
+
+
+def salvtemp_jobs(casts, salt='salinity_ch1', temp='temperature_ch1', press=None,
+                  srange=[28, 34], trange=[-2, 15], suffix='TS', cruise=None):
+    """Build plot_salvtemp jobs for a set of casts
+
+    press defaults to the cast index (pressure/depth) when not a column name.
+    """
+    jobs = []
+    for cast, df in casts.items():
+        if press and press in df.columns:
+            pressure = df[press].to_numpy()
+        else:
+            pressure = np.asarray(df.index.get_level_values(0), dtype=float)
+
+        jobs.append({'name': f"{_cast_name(cast)}_{suffix}",
+                     'kind': 'salvtemp',
+                     'kwargs': {'cruise': cruise, 'cast': cast,
+                                'salt': df[salt].to_numpy(), 'temp': df[temp].to_numpy(),
+                                'press': pressure, 'srange': srange, 'trange': trange,
+                                'ptitle': f"{cruise or ''} {_cast_name(cast)}".strip()}})
+    return jobs
+
+
+def stick_jobs(instruments, ucomp='u_curr_comp', vcomp='v_curr_comp', rotate=0.0,
+               suffix='stick', **kwargs):
+    """Build Timeseries1dStickPlot jobs for a set of current meter records
+
+    Parameters
+    ----------
+    instruments : dict
+        {instrument name: DataFrame with a DatetimeIndex and u/v columns}
+    rotate : float
+        vector rotation passed to Timeseries1dStickPlot.plot
+    kwargs :
+        any other Timeseries1dStickPlot.plot arguments
+    """
+    jobs = []
+    for name, df in instruments.items():
+        plot_kwargs = {'timedata': df.index, 'udata': df[ucomp].to_numpy(),
+                       'vdata': df[vcomp].to_numpy(), 'rotate': rotate}
+        plot_kwargs.update(kwargs)
+        jobs.append({'name': f"{name}_{suffix}", 'kind': 'stick', 'kwargs': plot_kwargs})
+    return jobs
+
+
+def render_figures(jobs, output_dir, max_workers=None, fmt='png', dpi=150):
+    """Render figure jobs with the non-interactive Agg backend
+
+    With max_workers=1 the figures are rendered in this process with interactive
+    mode off, and the backend of the session (notebook, GUI) is left as it is.
+
+    Parameters
+    ----------
+    jobs : list
+        job dictionaries (see module docstring)
+    output_dir : str
+        directory for the image files, created if missing
+    max_workers : int, optional
+        worker processes, 1 renders in this process
+    fmt : str
+        image format/extension passed to savefig
+    dpi : int
+        resolution passed to savefig
+
+    Returns
+    -------
+    DataFrame
+        one row per job with the output path, render time in seconds and any error
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(job, output_dir, fmt, dpi) for job in jobs]
+
+    if max_workers == 1:
+        import matplotlib.pyplot as plt
+
+        with plt.ioff():
+            results = [_render_job(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+            results = list(executor.map(_render_job, tasks))
+
+    report = pd.DataFrame(results, columns=['name', 'kind', 'path', 'render_time', 'error'])
+    failed = report['error'].notna().sum()
+    print(f"[INFO] Rendered {len(report) - failed}/{len(report)} figures to {output_dir} "
+          f"in {report['render_time'].sum():.2f}s")
+    return report
+
+
+def _cast_name(cast):
+    """'ctd001.cnv' -> 'ctd001'"""
+    return os.path.splitext(os.path.basename(str(cast)))[0]
+
+
+def _init_worker():
+    """Select the headless backend in each worker"""
+    mpl.use('Agg', force=True)
+
+
+def _template(kind):
+    """Plotter and styled rcParams for a plot kind, created once per process"""
+    if kind not in _TEMPLATES:
+        from . import TimeSeriesStickPlot, sbe_ctd_plots
+
+        with mpl.rc_context():
+            if kind in ['plot2var', 'plot3var']:
+                plotter = sbe_ctd_plots.CTDProfilePlot()
+            elif kind == 'stick':
+                plotter = TimeSeriesStickPlot.Timeseries1dStickPlot()
+            else:
+                plotter = None
+            # the style only, restoring 'backend' would switch the session's backend
+            rc_snapshot = {k: v for k, v in mpl.rcParams.items() if k != 'backend'}
+        _TEMPLATES[kind] = (plotter, rc_snapshot)
+    return _TEMPLATES[kind]
+
+
+def _render_job(task):
+    """Render and save one job, returns a report row"""
+    import matplotlib.pyplot as plt
+
+    job, output_dir, fmt, dpi = task
+    name, kind = job['name'], job['kind']
+    path = os.path.join(output_dir, f"{name}.{fmt}")
+    start = time.perf_counter()
+    fig = None
+    try:
+        if kind not in PLOT_KINDS:
+            raise ValueError(f"Unknown plot kind '{kind}', choose from {PLOT_KINDS}")
+        plotter, rc_snapshot = _template(kind)
+
+        # restore the template style so renders don't leak settings into each other
+        with mpl.rc_context(rc=rc_snapshot):
+            if kind == 'salvtemp':
+                from .sbe_ctd_plots import plot_salvtemp
+                fig = plot_salvtemp(**job['kwargs'])
+                if fig is None:
+                    raise ValueError("plot_salvtemp returned no figure")
+            else:
+                _, fig = getattr(plotter, 'plot' if kind == 'stick' else kind)(**job['kwargs'])
+
+            height_scale = job.get('height_scale')
+            if height_scale:
+                width, height = fig.get_size_inches()
+                fig.set_size_inches((width, height * height_scale))
+            fig.savefig(path, format=fmt, dpi=dpi)
+        error = None
+    except Exception as e:
+        print(f"[WARNING] Failed to render {name}: {e}")
+        path, error = None, str(e)
+    finally:
+        if fig is not None:
+            plt.close(fig)
+
+    return (name, kind, path, time.perf_counter() - start, error)
@@ -3,6 +3,8 @@ EcoFOCI Cruise Seabird QuickLook
 
 Plots data from csv and cnv files
 """
+import functools
+
 import gsw as gsw
 import matplotlib as mpl
 import matplotlib.pyplot as plt
@@ -10,7 +12,7 @@ import numpy as np
 import pandas as pd
 import seawater as sw
 
-__all__ = ["CTDProfilePlot", "plot_salvtemp"]
+__all__ = ["CTDProfilePlot", "plot_salvtemp", "sigmat_grid"]
 
 '------------------------------------------------------------------------------'
 
@@ -332,7 +334,50 @@ class CTDProfilePlot(object):
             sp.set_visible(False)
             
 
-def plot_salvtemp(cruise=None, cast=None, salt=None, temp=None, press=None, srange=[28,34], trange=[-2,15], ptitle=""): 
+@functools.lru_cache(maxsize=32)
+def _sigmat_grid(smin, smax, tmin, tmax, sres, tres):
+    """Cached worker for sigmat_grid, arguments must be hashable"""
+    xdim = int(round((smax-smin)/sres+1,0))
+    ydim = int(round((tmax-tmin)/tres+1,0))
+
+    ti = np.linspace(0,ydim-1,ydim)*tres+tmin
+    si = np.linspace(0,xdim-1,xdim)*sres+smin
+
+    # one broadcast call over the whole grid, minus 1000 to convert to sigma-t
+    sgrid, tgrid = np.meshgrid(si, ti)
+    dens = sw.dens0(sgrid, tgrid) - 1000
+
+    # shared between calls, so don't let callers modify them
+    for arr in (si, ti, dens):
+        arr.flags.writeable = False
+
+    return si, ti, dens
+
+def sigmat_grid(srange=[28,34], trange=[-2,15], resolution=(0.1, 1.0)):
+    """Sigma-t field on a salinity/temperature grid for TS diagram contours.
+
+    Grids are memoized on (srange, trange, resolution) so plotting every cast
+    of a cruise computes the density field once.
+
+    Parameters
+    ----------
+    srange : list
+        [min, max] salinity
+    trange : list
+        [min, max] temperature
+    resolution : tuple
+        (salinity step, temperature step)
+
+    Returns
+    -------
+    si, ti, dens : ndarray
+        salinity vector, temperature vector and sigma-t grid of shape (len(ti), len(si)).
+        The arrays are read-only.
+    """
+    return _sigmat_grid(float(srange[0]), float(srange[1]), float(trange[0]), float(trange[1]),
+                        float(resolution[0]), float(resolution[1]))
+
+def plot_salvtemp(cruise=None, cast=None, salt=None, temp=None, press=None, srange=[28,34], trange=[-2,15], ptitle="", resolution=(0.1, 1.0)): 
     plt.style.use('ggplot')
     
     # Figure out boudaries (mins and maxs)
@@ -342,8 +387,8 @@ def plot_salvtemp(cruise=None, cast=None, salt=None, temp=None, press=None, sran
     tmax = trange[1]
 
     # Calculate how many gridcells we need in the x and y dimensions
-    xdim = int(round((smax-smin)/0.1+1,0))
-    ydim = int(round((tmax-tmin)+1,0))
+    xdim = int(round((smax-smin)/resolution[0]+1,0))
+    ydim = int(round((tmax-tmin)/resolution[1]+1,0))
     
     #print 'ydim: ' + str(ydim) + ' xdim: ' + str(xdim) + ' \n'
     if (xdim > 10000) or (ydim > 10000): 
@@ -351,20 +396,8 @@ def plot_salvtemp(cruise=None, cast=None, salt=None, temp=None, press=None, sran
               Likely  missing data \n'.format(cruise=cruise,cast=cast))
         return
  
-    # Create empty grid of zeros
-    dens = np.zeros((ydim,xdim))
- 
-    # Create temp and salt vectors of appropiate dimensions
-    ti = np.linspace(0,ydim-1,ydim)+tmin
-    si = np.linspace(0,xdim-1,xdim)*0.1+smin
- 
-    # Loop to fill in grid with densities
-    for j in range(0,int(ydim)):
-        for i in range(0, int(xdim)):
-            dens[j,i]=sw.dens0(si[i],ti[j])
- 
-    # Substract 1000 to convert to sigma-t
-    dens = dens - 1000
+    # sigma-t grid, reused between casts with the same ranges
+    si, ti, dens = sigmat_grid(srange, trange, resolution)
  
     # Plot data ***********************************************
     fig, ax1 = plt.subplots(figsize=(8, 8), facecolor='w', edgecolor='w')
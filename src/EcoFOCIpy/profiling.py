@@ -0,0 +1,349 @@
+"""
+profiling.py
+
+Opt-in timing and memory instrumentation of the processing pipeline.
+
+The parsers, the engr2sci*/mag_dec_corr conversions, calc_nitrate_concentration,
+run_ctd_qc and the EcoFOCI_CFnc methods are wrapped with `profiled`.  While
+profiling is off (the default) the wrapper only checks a flag.  Once enabled, each
+call records a stage with its wall time, rows processed, bytes of the file it read
+(or wrote) and peak traced memory (tracemalloc) above the memory in use when the
+stage started.  Stages can be nested and added around any code with `stage`.
+
+    >>> from EcoFOCIpy import profiling
+    >>> with profiling.profile() as run:
+    ...     df, header = sbe_parser.sbe37.parse('sbe37.cnv')
+    ...     with profiling.stage('despike', rows=len(df)):
+    ...         df['temperature'] = cleaning.despike(df['temperature'])
+    ...     nc = ncCFsave.EcoFOCI_CFnc(df=df, instrument_yaml=inst_config)
+    ...     nc.xarray2netcdf_save(nc.get_xdf(), filename='sbe37.nc')
+    >>> print(run.report())
+    >>> run.report('profile.json')
+
+A whole script can be profiled by setting the ECOFOCIPY_PROFILE environment
+variable: '1' (time and memory) or 'time' (memory tracing slows allocation-heavy
+code noticeably).  The summary table is printed at exit, or written as json to
+$ECOFOCIPY_PROFILE_REPORT.  Stages run in process pool workers (open_instruments,
+batch_convert, render_figures, ...) are not collected: profiling is switched off
+in worker processes, so they don't trace memory for a report nobody reads.  Memory
+peaks of stages running concurrently in threads overlap.
+"""
+import atexit
+import contextlib
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+# argument names holding the file a wrapped function reads or writes
+FILE_ARGS = ('filename', 'file_path', 'path', 'file_list', 'filenames', 'store')
+
+RECORD_FIELDS = ['stage', 'depth', 'wall_time', 'rows', 'bytes', 'peak_memory', 'error']
+
+_ENABLED = False
+_RUN = None
+_LOCAL = threading.local()
+
+
+class Stage(object):
+    """One timed section, `rows` and `bytes` can be set while it runs"""
+
+    def __init__(self, name, rows=None, bytes=None):
+        self.name = name
+        self.rows = rows
+        self.bytes = bytes
+        self.depth = 0
+        self.wall_time = None
+        self.peak_memory = None
+        self.error = None
+        self._start = None
+        self._memory_start = None
+        self._peak = 0
+
+    def record(self):
+        return {'stage': self.name, 'depth': self.depth, 'wall_time': self.wall_time,
+                'rows': self.rows, 'bytes': self.bytes, 'peak_memory': self.peak_memory,
+                'error': self.error}
+
+
+class Profile(object):
+    """Stage records of a run with summary table and json reports"""
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.records = []
+        self._lock = threading.Lock()
+        self._started_tracing = False
+
+    def add(self, stage):
+        with self._lock:
+            self.records.append(stage.record())
+
+    def summary(self):
+        """DataFrame of the stages (slowest first): calls, total wall time, rows, bytes,
+        the largest peak memory and the rows processed per second"""
+        import pandas as pd
+
+        records = pd.DataFrame(self.records, columns=RECORD_FIELDS)
+        summary = records.groupby('stage', sort=False).agg(
+            calls=('wall_time', 'size'),
+            wall_time=('wall_time', 'sum'),
+            rows=('rows', lambda x: x.sum(min_count=1)),
+            bytes=('bytes', lambda x: x.sum(min_count=1)),
+            peak_memory=('peak_memory', 'max'),
+            errors=('error', 'count'),
+        )
+        summary['rows_per_s'] = summary['rows'] / summary['wall_time']
+        return summary.sort_values('wall_time', ascending=False)
+
+    def to_json(self):
+        """json report with the individual stages and the summary"""
+        summary = self.summary()
+        return json.dumps({'memory': self.memory,
+                           'stages': self.records,
+                           'summary': json.loads(summary.reset_index().to_json(orient='records'))},
+                          indent=1, default=str)
+
+    def report(self, filename=None):
+        """Summary table as text, or written to filename (json for a .json extension)"""
+        if filename is None:
+            return self.summary().to_string(float_format=lambda v: f"{v:.4g}")
+        with open(filename, 'w') as f:
+            if str(filename).endswith('.json'):
+                f.write(self.to_json())
+            else:
+                f.write(self.report())
+        return filename
+
+
+def enabled():
+    return _ENABLED
+
+
+def enable(memory=True):
+    """Start recording stages into a new run, tracing memory allocations if memory=True
+
+    Returns:
+        Profile of the run
+    """
+    global _ENABLED, _RUN
+    _RUN = Profile(memory=memory)
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _RUN._started_tracing = True
+    _ENABLED = True
+    return _RUN
+
+
+def disable():
+    """Stop recording, returns the Profile of the run that was active"""
+    global _ENABLED
+    _ENABLED = False
+    run = _RUN
+    if run is not None and run._started_tracing:
+        tracemalloc.stop()
+        run._started_tracing = False
+    return run
+
+
+def current():
+    """The active (or last) Profile, None if profiling was never enabled"""
+    return _RUN
+
+
+@contextlib.contextmanager
+def profile(memory=True):
+    """Profile the stages run inside the block, restoring the previous state on exit"""
+    previous = (_ENABLED, _RUN)
+    if previous[0]:
+        disable()
+    run = enable(memory=memory)
+    try:
+        yield run
+    finally:
+        disable()
+        if previous[0]:
+            _restore(*previous)
+
+
+def _restore(was_enabled, run):
+    global _ENABLED, _RUN
+    _RUN = run
+    if run.memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        run._started_tracing = True
+    _ENABLED = was_enabled
+
+
+def _stack():
+    if not hasattr(_LOCAL, 'stack'):
+        _LOCAL.stack = []
+    return _LOCAL.stack
+
+
+@contextlib.contextmanager
+def stage(name, rows=None, bytes=None):
+    """Time (and trace the memory of) a block as a named stage
+
+    Does nothing but yield the Stage when profiling is off.
+
+    Args:
+        name (str): stage name in the report
+        rows (int, optional): rows processed, can also be set on the yielded Stage
+        bytes (int, optional): bytes read/written, can also be set on the yielded Stage
+    """
+    st = Stage(name, rows=rows, bytes=bytes)
+    run = _RUN
+    if not _ENABLED or run is None:
+        yield st
+        return
+
+    stack = _stack()
+    tracing = run.memory and tracemalloc.is_tracing()
+    if tracing:
+        current_memory, peak = tracemalloc.get_traced_memory()
+        # the peak is reset for this stage, hand it to the enclosing stages first
+        for parent in stack:
+            parent._peak = max(parent._peak, peak)
+        if hasattr(tracemalloc, 'reset_peak'):  # python >= 3.9
+            tracemalloc.reset_peak()
+        st._memory_start = st._peak = current_memory
+    st.depth = len(stack)
+    stack.append(st)
+    st._start = time.perf_counter()
+    try:
+        yield st
+    except BaseException as e:
+        st.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        st.wall_time = time.perf_counter() - st._start
+        stack.pop()
+        if tracing and tracemalloc.is_tracing():
+            st._peak = max(st._peak, tracemalloc.get_traced_memory()[1])
+            for parent in stack:
+                parent._peak = max(parent._peak, st._peak)
+            st.peak_memory = st._peak - st._memory_start
+        run.add(st)
+
+
+def count_rows(obj):
+    """Rows of a parser/calculation result: the first item of a tuple, the length of a
+    DataFrame/array (summed over a dict of them), the longest dimension of a Dataset"""
+    if isinstance(obj, tuple) and obj:
+        obj = obj[0]
+    if isinstance(obj, dict):  # eg {cast: DataFrame}
+        counts = [c for c in map(count_rows, obj.values()) if c is not None]
+        return sum(counts) if counts else None
+    if hasattr(obj, 'data_vars'):
+        return max(obj.sizes.values(), default=0)
+    shape = getattr(obj, 'shape', None)
+    if shape:
+        return int(shape[0])
+    return None
+
+
+def file_bytes(value):
+    """Size of a file, a directory tree (zarr store) or a list of files, None if unknown"""
+    if isinstance(value, (list, tuple)):
+        sizes = [file_bytes(v) for v in value]
+        return sum(s for s in sizes if s) if any(sizes) else None
+    if not isinstance(value, (str, os.PathLike)):
+        return None
+    if os.path.isfile(value):
+        return os.path.getsize(value)
+    if os.path.isdir(value):
+        return sum(os.path.getsize(os.path.join(root, f))
+                   for root, _, files in os.walk(value) for f in files)
+    return None
+
+
+def _lookup(spec, arguments, result):
+    """'name' or 'name.attribute' of the call arguments, 'result' for the return value"""
+    name, _, attribute = spec.partition('.')
+    obj = result if name == 'result' else arguments.get(name)
+    return getattr(obj, attribute, None) if attribute else obj
+
+
+def profiled(name=None, rows=None, files=FILE_ARGS):
+    """Record each call of the decorated function as a stage while profiling is enabled
+
+    Args:
+        name (str, optional): stage name, defaults to <module>.<qualified name>
+        rows (str or callable, optional): where to count rows, defaults to the result.
+            'self.rawdata_df' or 'xdf' count an attribute or argument after the call, a
+            callable gets the result and the bound arguments.
+        files (tuple, optional): argument names whose file size is recorded as bytes
+
+    When wrapping a staticmethod, apply @staticmethod on top of @profiled.
+    """
+    def decorator(func):
+        stage_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _ENABLED:
+                return func(*args, **kwargs)
+            with stage(stage_name) as st:
+                result = func(*args, **kwargs)
+                try:
+                    bound = signature.bind(*args, **kwargs)
+                    bound.apply_defaults()
+                    arguments = bound.arguments
+                except TypeError:
+                    arguments = {}
+                if callable(rows):
+                    st.rows = rows(result, arguments)
+                else:
+                    st.rows = count_rows(_lookup(rows, arguments, result) if rows else result)
+                for arg in files:
+                    if arguments.get(arg) is not None:
+                        st.bytes = file_bytes(arguments[arg])
+                        break
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def _report_at_exit():
+    run = disable()
+    if run is None or not run.records:
+        return
+    filename = os.environ.get('ECOFOCIPY_PROFILE_REPORT')
+    if filename:
+        run.report(filename)
+    else:
+        print(run.report(), file=sys.stderr)
+
+
+def _in_worker():
+    """True in a multiprocessing child (spawned workers import this module afresh)
+
+    A spawned child imports the main module before parent_process() is set, but
+    after it has been given its name.
+    """
+    mp = sys.modules.get('multiprocessing')
+    return mp is not None and (mp.parent_process() is not None
+                               or mp.current_process().name != 'MainProcess')
+
+
+def _disable_in_child():
+    # forked workers inherit the parent's run, their records would be discarded
+    global _RUN
+    disable()
+    _RUN = None
+
+
+_env = os.environ.get('ECOFOCIPY_PROFILE', '').strip().lower()
+if _env and _env not in ('0', 'false', 'no', 'off') and not _in_worker():
+    enable(memory=_env != 'time')
+    atexit.register(_report_at_exit)
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_disable_in_child)
@@ -0,0 +1,11 @@
+"""Quality control tools
+
+Submodules are imported on first access.
+"""
+from .._lazy import lazy_submodules
+
+__all__ = [
+    "ctd_qc",
+]
+
+__getattr__, __dir__ = lazy_submodules(__name__, __all__)
@@ -2,6 +2,8 @@ import gsw
 import numpy as np
 import pandas as pd
 
+from ..profiling import profiled
+
 
 def gross_range_test(data: pd.Series, config: dict) -> pd.Series:
     """
@@ -126,6 +128,7 @@ def density_inversion_test(df: pd.DataFrame, config: dict) -> pd.Series:
     flags.loc[inversion_indices] = 4
     return flags
 
+@profiled()
 def run_ctd_qc(df: pd.DataFrame, config: dict) -> pd.DataFrame:
     """
     Main function to run all CTD QC tests.
@@ -0,0 +1,11 @@
+"""Synthetic data for load testing and benchmarks
+
+Submodules are imported on first access.
+"""
+from .._lazy import lazy_submodules
+
+__all__ = [
+    "synth",
+]
+
+__getattr__, __dir__ = lazy_submodules(__name__, __all__)
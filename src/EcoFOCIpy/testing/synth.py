@@ -0,0 +1,463 @@
+"""
+synth.py
+
+Synthetic raw instrument files for load testing and benchmarks.
+
+Each writer produces a file in the layout the matching `EcoFOCIpy.io` parser
+reads (header, time word, channel columns) filled with plausible random values:
+
+* sbe_parser: SBE16/SBE56 cnv, SBE37/SBE39 ascii exports, SBE26 .tid
+* adcp_parser: .VEL/.PG/.EIN/.SCA ascii conversions and the .RPT report
+* nitrates_parser: SUNA csv and ISUS .DAT
+* mtr_parser: legacy (v3/v4) hex dumps and MTRduino csv
+* wetlabs_parser: ECO fluorometer/turbidity and PAR output
+* rcm_parser: RCM dsu conversions
+
+Rows are generated, formatted and written `chunk_rows` at a time, so memory use
+does not grow with the file size and multi-GB files (eg two years of 1 Hz SBE56)
+can be written.
+
+    >>> synth.sbe56_cnv('sbe56.cnv', nrows=2 * 365 * 86400, interval=1)
+    >>> df, header, start_time = sbe_parser.sbe56.parse('sbe56.cnv')
+
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+START = pd.Timestamp('2018-04-30 14:00:00')
+CHUNK_ROWS = 100_000
+
+SUNA_WAVELENGTHS = np.round(190 + (370 - 190) / 255 * np.arange(256), 2)
+ISUS_WAVELENGTHS = np.round(190 + 0.8 * np.arange(256), 2)
+
+# cnv channel description and value of each time word, per parser (sbe16 and sbe56
+# read timeJ/timeJV2 differently)
+SBE_TIME_NAMES = {
+    'timeJ': 'timeJ: Julian Days',
+    'timeJV2': 'timeJV2: Time, Instrument [julian days]',
+    'timeS': 'timeS: Time, Elapsed [seconds]',
+    'timeK': 'timeK: Time, Instrument [seconds]',
+}
+
+
+def _julian_days(times, start):
+    return (times - pd.Timestamp(start.year, 1, 1)) / pd.Timedelta(days=1) + 1
+
+
+def _elapsed_days(times, start):
+    return (times - start) / pd.Timedelta(days=1)
+
+
+def _elapsed_seconds(times, start):
+    return (times - start) / pd.Timedelta(seconds=1)
+
+
+def _seconds_since_2000(times, start):
+    return (times - pd.Timestamp('2000-01-01')) / pd.Timedelta(seconds=1)
+
+
+SBE16_TIME_WORDS = {'timeJ': _elapsed_days, 'timeJV2': _julian_days,
+                    'timeS': _elapsed_seconds, 'timeK': _seconds_since_2000}
+SBE56_TIME_WORDS = {'timeJ': _julian_days, 'timeJV2': _elapsed_days,
+                    'timeS': _elapsed_seconds, 'timeK': _seconds_since_2000}
+
+
+def _chunks(nrows, chunk_rows=None):
+    """(first row, number of rows) of each chunk"""
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    for first in range(0, nrows, chunk_rows):
+        yield first, min(chunk_rows, nrows - first)
+
+
+def _times(first, count, start, interval):
+    """DatetimeIndex of rows first..first+count sampled every `interval` seconds"""
+    return pd.Timestamp(start) + pd.to_timedelta((first + np.arange(count)) * interval, unit='s')
+
+
+def _join(columns, template):
+    """Format equal length columns row by row with a str.format template"""
+    return ''.join(template.format(*row) for row in zip(*columns))
+
+
+def _write(path, header, blocks):
+    """Write the header lines, then each block of data lines as it is generated"""
+    with open(path, 'w') as f:
+        f.writelines(header)
+        for block in blocks:
+            f.write(block)
+    return str(path)
+
+
+# ---- sbe_parser ----
+
+def sbe_cnv_header(instrument, names, nrows, start, interval, filename=''):
+    """Seabird cnv header with the `# name` channels and `# start_time`, ending in *END*"""
+    header = [f"* Sea-Bird {instrument} Data File:\n",
+              f"* FileName = {filename}\n",
+              "* Software Version 1.59\n",
+              f"# nquan = {len(names)}\n",
+              f"# nvalues = {nrows}\n",
+              "# units = specified\n"]
+    header += [f"# name {k} = {name}\n" for k, name in enumerate(names)]
+    header += [f"# interval = seconds: {interval}\n",
+               f"# start_time = {pd.Timestamp(start):%b %d %Y %H:%M:%S}\n",
+               "# bad_flag =  -9.990e-29\n",
+               "# file_type = ascii\n",
+               "*END*\n"]
+    return header
+
+
+def _sbe_cnv(path, instrument, time_words, time_word, channels, nrows, start, interval,
+             chunk_rows, scan=False):
+    """cnv of [scan,] a time word, then (name, values(first, n), format) channels and flag"""
+    if time_word not in time_words:
+        raise ValueError(f"time_word must be one of {list(time_words)}")
+    start = pd.Timestamp(start)
+    names = ((['scan: Scan Count'] if scan else []) + [SBE_TIME_NAMES[time_word]]
+             + [name for name, _, _ in channels] + ['flag:  0.000e+00'])
+    template = (("{:11d} " if scan else "") + "{:11.6f}"
+                + ''.join(' ' + fmt for _, _, fmt in channels) + "  0.000e+00\n")
+
+    def blocks():
+        for first, count in _chunks(nrows, chunk_rows):
+            times = _times(first, count, start, interval)
+            columns = [first + np.arange(count) + 1] if scan else []
+            yield _join(columns + [time_words[time_word](times, start)]
+                        + [values(first, count) for _, values, _ in channels], template)
+
+    return _write(path, sbe_cnv_header(instrument, names, nrows, start, interval,
+                                       os.path.basename(str(path))), blocks())
+
+
+def sbe56_cnv(path, nrows, start=START, interval=300, time_word='timeJ', seed=0,
+              chunk_rows=None):
+    """SBE56 cnv (scan, time word, temperature, flag) as read by sbe_parser.sbe56
+
+    Args:
+        path (str): output file
+        nrows (int): number of samples
+        start (str or Timestamp, optional): time of the first sample
+        interval (float, optional): seconds between samples. Defaults to 300.
+        time_word (str, optional): 'timeJ' (julian day), 'timeJV2' (days since start),
+            'timeS' (seconds since start) or 'timeK' (seconds since 2000)
+        seed (int, optional): random seed. Defaults to 0.
+        chunk_rows (int, optional): rows formatted per write. Defaults to CHUNK_ROWS.
+            The random values depend on both seed and chunk_rows.
+
+    Returns:
+        the path written
+    """
+    rng = np.random.default_rng(seed)
+    channels = [('t090C: Temperature [ITS-90, deg C]',
+                 lambda first, n: (4 + 3 * np.sin((first + np.arange(n)) / 5000)
+                                   + rng.normal(0, 0.05, n)), '{:10.4f}')]
+    return _sbe_cnv(path, 'SBE56', SBE56_TIME_WORDS, time_word, channels, nrows, start,
+                    interval, chunk_rows, scan=True)
+
+
+def sbe16_cnv(path, nrows, start=START, interval=3600, time_word='timeJV2', seed=0,
+              chunk_rows=None):
+    """SBE16 cnv with temperature, salinity, oxygen and fluorometer channels
+
+    time_word is read as sbe_parser.sbe16 does: 'timeJ' (days since start), 'timeJV2'
+    (julian day), 'timeS' (seconds since start) or 'timeK' (seconds since 2000).
+    """
+    rng = np.random.default_rng(seed)
+    channels = [
+        ('tv290C: Temperature [ITS-90, deg C]', lambda first, n: rng.normal(6, 1, n), '{:10.4f}'),
+        ('sal00: Salinity, Practical [PSU]', lambda first, n: rng.normal(32, 0.2, n), '{:10.4f}'),
+        ('sbeox0Mm/Kg: Oxygen, SBE 43 [umol/kg]', lambda first, n: rng.normal(350, 10, n),
+         '{:10.3f}'),
+        ('flECO-AFL: Fluorescence, WET Labs ECO-AFL/FL [mg/m^3]',
+         lambda first, n: rng.gamma(2, 0.5, n), '{:10.4f}'),
+    ]
+    return _sbe_cnv(path, 'SBE16plus', SBE16_TIME_WORDS, time_word, channels, nrows, start,
+                    interval, chunk_rows)
+
+
+def _sbe_ascii(path, instrument, columns, template, nrows, start, interval, chunk_rows):
+    """Seabird ascii export: '*' header, *END*, three setup lines, then values, date, time"""
+    header = [f"* Sea-Bird {instrument} Data File:\n",
+              f"* FileName = {os.path.basename(str(path))}\n",
+              "* Software Version 1.59\n",
+              "*END*\n",
+              f"start time =  {pd.Timestamp(start):%d %b %Y  %H:%M:%S}\n",
+              f"sample interval = {interval} seconds\n",
+              "start sample number = 1\n"]
+
+    def blocks():
+        for first, count in _chunks(nrows, chunk_rows):
+            times = _times(first, count, start, interval)
+            yield _join(columns(count) + [times.strftime('%d %b %Y'),
+                                          times.strftime('%H:%M:%S')], template)
+
+    return _write(path, header, blocks())
+
+
+def sbe37_csv(path, nrows, start=START, interval=30, pressure=True, seed=0, chunk_rows=None):
+    """SBE37 ascii export (temperature, conductivity, [pressure,] salinity, date, time)"""
+    rng = np.random.default_rng(seed)
+
+    def columns(n):
+        values = [rng.normal(4.4, 0.5, n), rng.normal(3.1, 0.05, n)]
+        if pressure:
+            values.append(rng.normal(45, 0.5, n))
+        return values + [rng.normal(32, 0.2, n)]
+
+    template = ("{:9.4f}, {:8.5f}, " + ("{:8.3f}, " if pressure else "")
+                + "{:8.4f}, {}, {}\n")
+    return _sbe_ascii(path, 'SBE37', columns, template, nrows, start, interval, chunk_rows)
+
+
+def sbe39_csv(path, nrows, start=START, interval=600, pressure=True, seed=0, chunk_rows=None):
+    """SBE39 ascii export (temperature, [pressure,] date, time)"""
+    rng = np.random.default_rng(seed)
+
+    def columns(n):
+        values = [rng.normal(8, 0.5, n)]
+        return values + [rng.normal(30, 0.5, n)] if pressure else values
+
+    template = "{:9.4f}, " + ("{:8.3f}, " if pressure else "") + "{}, {}\n"
+    return _sbe_ascii(path, 'SBE39', columns, template, nrows, start, interval, chunk_rows)
+
+
+def sbe26_tid(path, nrows, start=START, interval=900, seed=0, chunk_rows=None):
+    """SBE26 .tid (record, date, time, pressure, temperature) after a units line"""
+    rng = np.random.default_rng(seed)
+    header = ["                                  PSI      Deg C\n"]
+
+    def blocks():
+        for first, count in _chunks(nrows, chunk_rows):
+            times = _times(first, count, start, interval)
+            yield _join((first + np.arange(count) + 1, times.strftime('%m/%d/%Y %H:%M:%S'),
+                         rng.normal(100, 2, count), rng.normal(5, 0.5, count)),
+                        "{:6d}   {}   {:8.4f}   {:8.3f}\n")
+
+    return _write(path, header, blocks())
+
+
+# ---- adcp_parser ----
+
+ADCP_PROFILES = {
+    '.VEL': lambda rng, n: rng.integers(-500, 500, (n, 4)),
+    '.PG': lambda rng, n: rng.integers(0, 101, (n, 4)),
+    '.EIN': lambda rng, n: rng.integers(30, 200, (n, 4)),
+}
+
+
+def adcp_rpt(path, nbins=20, bin_length=2.0, distance_to_first_bin=3.06):
+    """ADCP ascii conversion report with the setup read by adcp.load_rpt_file (meters)"""
+    lines = ["\n", "REPORT FOR ASCII DATA CONVERSION\n", "--------------------------------\n",
+             "\n", "2. ADCP SETUP:\n",
+             f"   Number of bins {nbins}\n",
+             f"   Bin length {bin_length * 100:.0f} cm\n",
+             f"   Distance to first bin {distance_to_first_bin * 100:.0f} cm\n",
+             "\n", "END OF REPORT\n", "-------------\n"]
+    return _write(path, lines, [])
+
+
+def adcp_files(directory, serial_no, nensembles, nbins=20, start=START, interval=3600,
+               seed=0, chunk_rows=None):
+    """ADCP .VEL/.PG/.EIN (one line per bin, deepest first), .SCA and .RPT files
+
+    Named <serial_no>.<ext> so `adcp_parser.adcp(serial_no, deployment_dir=directory)`
+    finds them.
+
+    Returns:
+        {extension: path}
+    """
+    rng = np.random.default_rng(seed)
+    chunk = max(1, (chunk_rows or CHUNK_ROWS) // nbins)
+    prefix = os.path.join(str(directory), str(serial_no))
+
+    paths = {}
+    for ext, values in ADCP_PROFILES.items():
+        def blocks(values=values):
+            for first, count in _chunks(nensembles, chunk):
+                stamps = _times(first, count, start, interval).strftime('%y/%m/%d %H:%M:%S')
+                yield _join((np.repeat(np.asarray(stamps), nbins),
+                             np.tile(np.arange(nbins, 0, -1), count),
+                             *values(rng, count * nbins).T),
+                            "{} {:3d} {:6d} {:6d} {:6d} {:6d}\n")
+
+        paths[ext] = _write(prefix + ext, [], blocks())
+
+    def scalar_blocks():
+        for first, count in _chunks(nensembles, chunk_rows):
+            stamps = _times(first, count, start, interval).strftime('%y/%m/%d %H:%M:%S')
+            yield _join((stamps, rng.normal(4, 1, count), rng.uniform(0, 360, count),
+                         rng.normal(0, 1, count), rng.normal(0, 1, count),
+                         *rng.integers(0, 5, (3, count))),
+                        "{} 1 {:5.2f} {:6.2f} {:6.2f} {:6.2f} {:5d} {:5d} {:5d}\n")
+
+    paths['.SCA'] = _write(prefix + '.SCA', [], scalar_blocks())
+    paths['.RPT'] = adcp_rpt(prefix + '.RPT', nbins=nbins)
+    return paths
+
+
+# ---- nitrates_parser ----
+
+def nitrate_calibration(wavelengths=SUNA_WAVELENGTHS, cal_temp=20.0):
+    """Calibration dict (CalTemp, WL, ENO3, ESW, Ref) as used by calc_nitrate_concentration"""
+    wl = np.asarray(wavelengths, dtype=float)
+    return {'CalTemp': cal_temp,
+            'WL': wl,
+            'ENO3': 0.02 * np.exp(-(wl - 200) / 12),
+            'ESW': 0.002 * np.exp(-(wl - 200) / 10),
+            'Ref': 30000 * np.exp(-((wl - 260) / 60) ** 2)}
+
+
+def _spectra(rng, nitrate, wavelengths, dark):
+    """Intensity counts of a nitrate absorbance on the calibration reference"""
+    cal = nitrate_calibration(wavelengths)
+    absorbance = np.outer(nitrate, cal['ENO3']) + 0.02 * rng.random((len(nitrate), 1))
+    return np.round(cal['Ref'] * 10 ** -absorbance + dark).astype(int), absorbance
+
+
+def suna_csv(path, nrows, start=START, interval=3600, serial='SATSLF0598', seed=0,
+             chunk_rows=None):
+    """SUNA csv: serial, datetime, 8 fit values, 256 spectrum channels, 14 diagnostics"""
+    rng = np.random.default_rng(seed)
+
+    def blocks():
+        for first, count in _chunks(nrows, chunk_rows or 10_000):
+            stamps = _times(first, count, start, interval).strftime('%Y-%m-%d %H:%M:%S')
+            nitrate = rng.normal(15, 3, count)
+            spectrum, absorbance = _spectra(rng, nitrate, SUNA_WAVELENGTHS, 800)
+            fit = np.column_stack([nitrate, nitrate * 0.014, absorbance[:, 40],
+                                   absorbance[:, 200], np.full(count, 2.5), np.ones(count),
+                                   np.full(count, 800), np.ones(count)])
+            diag = np.column_stack([rng.normal(8, 1, (count, 3)), first + np.arange(count),
+                                    rng.normal(5, 1, count), np.full((count, 4), 12.0),
+                                    np.full(count, 400), rng.normal(0, 1e-3, (count, 4))])
+            yield ''.join(
+                f"{serial},{t},{','.join(f'{v:.5g}' for v in f)},"
+                f"{','.join(map(str, s))},{','.join(f'{v:.5g}' for v in d)}\n"
+                for t, f, s, d in zip(stamps, fit, spectrum, diag))
+
+    return _write(path, [], blocks())
+
+
+def isus_dat(path, nrows, start=START, interval=3600, serial='SATSLF0204', seed=0,
+             chunk_rows=None):
+    """ISUS .DAT: 12 header lines (the last naming the 256 channels) then 277 column records"""
+    rng = np.random.default_rng(seed)
+    header = [f"ISUS {serial} header line {i}\n" for i in range(11)]
+    header.append(','.join([serial, 'L'] + [f"{w:.2f}" for w in ISUS_WAVELENGTHS]) + '\n')
+
+    def blocks():
+        for first, count in _chunks(nrows, chunk_rows or 10_000):
+            times = _times(first, count, start, interval)
+            yyyyddd = times.year * 1000 + times.dayofyear
+            hours = (times - times.normalize()) / pd.Timedelta(hours=1)
+            nitrate = rng.normal(15, 3, count)
+            spectrum, _ = _spectra(rng, nitrate, ISUS_WAVELENGTHS, 700)
+            values = np.column_stack([nitrate, rng.normal(0, 1e-3, (count, 3)),
+                                      rng.normal(5e-4, 1e-4, count), rng.normal(8, 1, (count, 3)),
+                                      first + np.arange(count), rng.normal(5, 1, count),
+                                      np.full((count, 3), 12.0), spectrum.mean(axis=1),
+                                      np.full(count, 1.5), np.full(count, 700),
+                                      spectrum.mean(axis=1)])
+            yield ''.join(
+                f"{serial},{d},{h:.5f},{','.join(f'{v:.6g}' for v in vals)},"
+                f"{','.join(map(str, s))},{sum(s) % 256}\n"
+                for d, h, vals, s in zip(yyyyddd, hours, values, spectrum))
+
+    return _write(path, header, blocks())
+
+
+# ---- mtr_parser ----
+
+MTR_BLOCK = 120  # legacy samples per time word (10 lines of 12), 10 minutes apart
+
+
+def mtr_legacy(path, nsamples, start=START, seed=0, chunk_rows=None):
+    """Legacy MTR hex dump: header up to READ, then per block a time word and 10 lines of 12 counts
+
+    Args:
+        nsamples (int): number of 120 sample blocks
+    """
+    rng = np.random.default_rng(seed)
+    header = ["MTR Version 4.1\n", "Serial Number 4051\n", "mtr>READ\n"]
+
+    def blocks():
+        for first, count in _chunks(nsamples, chunk_rows or 10_000):
+            times = _times(first, count, start, MTR_BLOCK * 600)
+            counts = rng.integers(0x4000, 0xF000, (count, 10, 12))
+            yield ''.join(
+                f"{t:%m%d%y%H%M%S}0000\n"
+                + ''.join(''.join(f"{c:04X}" for c in row) + '\n' for row in block)
+                for t, block in zip(times, counts))
+        yield "mtr>\n"
+
+    return _write(path, header, blocks())
+
+
+def mtrduino_csv(path, nrows, start=START, interval=600, seed=0, chunk_rows=None):
+    """MTRduino (v5) csv: datetime, five thermistor resistances and the reference resistor"""
+    rng = np.random.default_rng(seed)
+
+    def blocks():
+        for first, count in _chunks(nrows, chunk_rows):
+            stamps = _times(first, count, start, interval).strftime('%Y-%m-%d %H:%M:%S')
+            yield _join((stamps, *rng.uniform(8000, 30000, (5, count)), np.full(count, 10000.0)),
+                        "{}" + ",{:.2f}" * 6 + "\n")
+
+    return _write(path, [], blocks())
+
+
+# ---- wetlabs_parser ----
+
+def wetlabs_txt(path, nrows, channels=(700, 695), start=START, interval=1, seed=0,
+                chunk_rows=None):
+    """WET Labs ECO output: menu/header up to `$get`, a records line, then tab separated data
+
+    Each row is date, time, (channel wavelength, counts) per channel and the thermistor
+    count; channels=None writes the three column PAR layout (date, time, PAR).
+    """
+    rng = np.random.default_rng(seed)
+    header = ["$mnu\n", "\n", "Ser FLNTUS-1234\n", "Ver FLNTUS 4.06\n", "Ave 1\n",
+              "$get\n", f"{nrows} records to read\n"]
+
+    def blocks():
+        for first, count in _chunks(nrows, chunk_rows):
+            times = _times(first, count, start, interval)
+            columns = [times.strftime('%m/%d/%y'), times.strftime('%H:%M:%S')]
+            if channels is None:
+                columns.append(np.round(rng.gamma(2, 100, count), 2))
+            else:
+                for channel in channels:
+                    columns += [np.full(count, channel), rng.integers(50, 4130, count)]
+                columns.append(rng.integers(540, 560, count))
+            yield _join(columns, '\t'.join(['{}'] * len(columns)) + '\n')
+
+    return _write(path, header, blocks())
+
+
+# ---- rcm_parser ----
+
+RCM_TIME_FORMATS = {0: ('%m/%d/%Y', '%H:%M:%S'), 1: ('%d.%m.%Y', '%H:%M:%S')}
+
+
+def rcm_dat(path, nrows, number_of_channels=8, time_format=0, start=START, interval=3600,
+            seed=0, chunk_rows=None):
+    """RCM dsu conversion: sample, date, time, reference and the channel counts
+
+    number_of_channels and time_format follow rcm_parser.rcm.parse (speed, direction,
+    temperature, conductivity and pressure, plus chan7 and chan8 for 7 and 8 channels).
+    """
+    rng = np.random.default_rng(seed)
+    nchannels = number_of_channels - 1 if number_of_channels in (7, 8) else 5
+    date_format, time_fmt = RCM_TIME_FORMATS[time_format]
+
+    def blocks():
+        for first, count in _chunks(nrows, chunk_rows):
+            times = _times(first, count, start, interval)
+            yield _join((first + np.arange(count) + 1, times.strftime(date_format),
+                         times.strftime(time_fmt), np.full(count, 512),
+                         *rng.integers(0, 1024, (nchannels, count))),
+                        "{:6d} {} {} {:4d}" + " {:4d}" * nchannels + "\n")
+
+    return _write(path, [], blocks())
@@ -0,0 +1,142 @@
+"""Minimal local tabledap stand-in for the erddap tests"""
+import re
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+
+def cruise_table():
+    """Three casts of a CTD cruise dataset"""
+    profile_id = np.repeat(["dy1805_ctd001", "dy1805_ctd002", "dy1805_ctd003"], 4)
+    return pd.DataFrame({
+        "profile_id": profile_id,
+        "time": np.repeat(pd.to_datetime(["2018-04-30", "2018-05-01", "2018-05-02"]), 4),
+        "latitude": np.repeat([56.9, 57.5, 58.0], 4),
+        "longitude": np.repeat([-164.0, -165.0, -166.0], 4),
+        "pressure": np.tile([1.0, 2.0, 3.0, 4.0], 3),
+        "temperature": np.arange(12.0),
+        "timeseries_id": np.repeat(["19bs2c_s37_0064m", "19bs2c_sc_0040m", "x"], 4),
+    })
+
+
+UNITS = {"pressure": "dbar", "temperature": "degree_C", "latitude": "degrees_north",
+         "longitude": "degrees_east"}
+
+
+def tabledap(df, query):
+    """Apply the variables and constraints of a tabledap query"""
+    parts = urllib.parse.unquote(query).split("&")
+    variables = [v for v in parts[0].split(",") if v]
+    for constraint in parts[1:]:
+        name, op, value = re.match(r"(\w+)(=~|>=|<=|=)(.*)", constraint).groups()
+        value = value.strip('"')
+        column = df[name]
+        if name == "time":
+            column = column.astype("int64") / 1e9
+            value = float(value)
+        elif column.dtype.kind == "f":
+            value = float(value)
+        if op == "=~":
+            df = df[column.str.fullmatch(value)]
+        elif op == ">=":
+            df = df[column >= value]
+        elif op == "<=":
+            df = df[column <= value]
+        else:
+            df = df[column == value]
+    return df[variables] if variables else df
+
+
+def to_nc_bytes(df):
+    xdf = xr.Dataset({c: ("row", df[c].to_numpy()) for c in df.columns})
+    for name, units in UNITS.items():
+        if name in xdf:
+            xdf[name].attrs["units"] = units
+    encoding = {"time": {"units": "seconds since 1970-01-01T00:00:00Z"}} if "time" in xdf else {}
+    return xdf.to_netcdf(format="NETCDF3_CLASSIC", encoding=encoding)
+
+
+def to_csvp_bytes(df):
+    """csvp response: units in the column names, ISO 8601 UTC times"""
+    df = df.copy()
+    if "time" in df:
+        df["time"] = df["time"].dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+    columns = {name: f"{name} ({units})" for name, units in UNITS.items()}
+    columns["time"] = "time (UTC)"
+    return df.rename(columns=columns).to_csv(index=False).encode()
+
+
+class ErddapStandIn:
+    """Serve cruise_table() for any tabledap dataset and record the requests"""
+
+    def __init__(self, etag=None, fail_first=False):
+        self.requests = []
+        self.etag = etag
+        self.fail_first = fail_first
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stand_in.requests.append(self.path)
+                path, _, query = self.path.partition("?")
+                if stand_in.fail_first and stand_in.requests.count(self.path) == 1:
+                    self.send_response(503)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if stand_in.etag and self.headers.get("If-None-Match") == stand_in.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                df = tabledap(cruise_table(), query)
+                if df.empty:
+                    body = b"Error: Your query produced no matching results."
+                    self.send_response(404)
+                else:
+                    body = to_nc_bytes(df) if path.endswith(".nc") else to_csvp_bytes(df)
+                    self.send_response(200)
+                if stand_in.etag:
+                    self.send_header("ETag", stand_in.etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/erddap"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def erddap_server():
+    with ErddapStandIn() as stand_in:
+        yield stand_in
+
+
+@pytest.fixture
+def erddap_etag_server():
+    """Stand-in that sends an ETag and answers If-None-Match with 304"""
+    with ErddapStandIn(etag='"v1"') as stand_in:
+        yield stand_in
+
+
+@pytest.fixture
+def erddap_flaky_server():
+    """Stand-in that answers the first request for each url with 503"""
+    with ErddapStandIn(fail_first=True) as stand_in:
+        yield stand_in
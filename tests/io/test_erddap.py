@@ -0,0 +1,150 @@
+import urllib.parse
+
+import pandas as pd
+import pytest
+from EcoFOCIpy.io import erddap
+
+
+def test_erddapCTDretrieve_constrained_on_server(erddap_server):
+    df = erddap.erddapCTDretrieve(url=erddap_server.url, cruiseid="dy1805", concastno="002",
+                                  variables=["profile_id", "time", "pressure", "temperature"])
+
+    assert len(erddap_server.requests) == 1
+    request = urllib.parse.unquote(erddap_server.requests[0])
+    assert request.startswith("/erddap/tabledap/CTD_dy1805_final.nc?")
+    assert 'profile_id=~".*002.*"' in request
+
+    assert df.columns.tolist() == ["profile_id", "time (UTC)", "pressure (dbar)",
+                                   "temperature (degree_C)"]
+    assert (df["profile_id"] == "dy1805_ctd002").all()
+    assert len(df) == 4
+    assert df["time (UTC)"].iloc[0] == pd.Timestamp("2018-05-01")
+
+
+def test_erddapCruiseretrieve_time_and_bbox(erddap_server):
+    df = erddap.erddapCruiseretrieve(url=erddap_server.url, cruiseid="dy1805",
+                                     time_range=("2018-05-01", None),
+                                     bbox=(-165.5, -164.5, 50, 60))
+    assert df["profile_id"].unique().tolist() == ["dy1805_ctd002"]
+
+
+def test_erddapMooredInstretrieve(erddap_server):
+    df = erddap.erddapMooredInstretrieve(url=erddap_server.url, mooringid="19bs2c",
+                                         instrid="19bs2c_s37_0064m", response="csvp")
+    assert "CTD" not in erddap_server.requests[0]
+    assert "timeseries_id=" in urllib.parse.unquote(erddap_server.requests[0])
+    assert len(df) == 4
+    assert df["time (UTC)"].dtype.kind == "M"
+    assert df["time (UTC)"].iloc[0] == pd.Timestamp("2018-04-30")
+
+
+def test_no_matching_results(erddap_server):
+    df = erddap.erddapCTDretrieve(url=erddap_server.url, cruiseid="dy1805", concastno="999")
+    assert df.empty
+
+
+def test_erddap_constraints():
+    constraints = erddap.erddap_constraints(profile_id="001",
+                                            time_range=("2018-04-30", "2018-05-10 12:00"),
+                                            bbox=(-170, -160, 55, 60))
+    assert constraints["profile_id=~"] == ".*001.*"
+    assert constraints["time<="] == "2018-05-10T12:00:00Z"
+    assert constraints["latitude>="] == 55
+
+
+def test_cache_final_is_not_refetched(erddap_server, tmp_path):
+    cache = erddap.ErddapCache(str(tmp_path / "cache"))
+    first = erddap.erddapCTDretrieve(url=erddap_server.url, cruiseid="dy1805",
+                                     concastno="001", cache=cache)
+    second = erddap.erddapCTDretrieve(url=erddap_server.url, cruiseid="dy1805",
+                                      concastno="001", cache=cache)
+    assert len(erddap_server.requests) == 1
+    pd.testing.assert_frame_equal(first, second)
+
+    # a new cache object reads the persisted index, other constraints are a new entry
+    reopened = erddap.ErddapCache(str(tmp_path / "cache"))
+    erddap.erddapCTDretrieve(url=erddap_server.url, cruiseid="dy1805", concastno="001",
+                             cache=reopened)
+    erddap.erddapCTDretrieve(url=erddap_server.url, cruiseid="dy1805", concastno="002",
+                             cache=reopened)
+    assert len(erddap_server.requests) == 2
+    assert len(reopened.index) == 2
+
+
+def test_cache_preliminary_revalidates(erddap_etag_server, tmp_path):
+    cache = erddap.ErddapCache(str(tmp_path / "cache"), ttl={"preliminary": 0})
+    first = erddap.erddapCTDretrieve(url=erddap_etag_server.url, cruiseid="dy1805",
+                                     qclevel="preliminary", cache=cache)
+    second = erddap.erddapCTDretrieve(url=erddap_etag_server.url, cruiseid="dy1805",
+                                      qclevel="preliminary", cache=cache)
+    assert len(erddap_etag_server.requests) == 2
+    pd.testing.assert_frame_equal(first, second)
+    entry = next(iter(cache.index.values()))
+    assert entry["etag"] == '"v1"'
+    assert entry["qclevel"] == "preliminary"
+
+
+def test_cache_no_matching_results_expire(erddap_server, tmp_path):
+    cache = erddap.ErddapCache(str(tmp_path / "cache"))
+    for _ in range(2):
+        df = erddap.erddapCTDretrieve(url=erddap_server.url, cruiseid="dy1805",
+                                      concastno="999", cache=cache)
+        assert df.empty
+    assert len(erddap_server.requests) == 1
+    assert next(iter(cache.index.values()))["empty"]
+
+    # final data never expire, an empty final response does
+    cache.negative_ttl = 0
+    erddap.erddapCTDretrieve(url=erddap_server.url, cruiseid="dy1805", concastno="999",
+                             cache=cache)
+    erddap.erddapCTDretrieve(url=erddap_server.url, cruiseid="dy1805", concastno="001",
+                             cache=cache)
+    erddap.erddapCTDretrieve(url=erddap_server.url, cruiseid="dy1805", concastno="001",
+                             cache=cache)
+    assert len(erddap_server.requests) == 3
+
+
+def test_cache_eviction(erddap_server, tmp_path):
+    cache = erddap.ErddapCache(str(tmp_path / "cache"))
+    for cast in ["001", "002"]:
+        erddap.erddapCTDretrieve(url=erddap_server.url, cruiseid="dy1805", concastno=cast,
+                                 cache=cache)
+    assert len(cache.index) == 2
+
+    cache.max_bytes = cache.size() - 1
+    cache.evict()
+    assert len(cache.index) == 1
+    assert cache.size() <= cache.max_bytes
+    assert "002" in urllib.parse.unquote(next(iter(cache.index.values()))["url"])
+
+
+def test_bulk_retrieve(erddap_flaky_server, tmp_path):
+    datasets = [("datasets_Mooring_19bs2c_final", {"timeseries_id=": "19bs2c_s37_0064m"}),
+                ("datasets_Mooring_19bs2c_final", {"timeseries_id=": "19bs2c_sc_0040m"}),
+                ("datasets_Mooring_19bs2c_final", {"timeseries_id=": "missing"}),
+                ("CTD_dy1805_final", None)]
+    results = erddap.erddap_bulk_retrieve(url=erddap_flaky_server.url, datasets=datasets,
+                                          max_workers=3, retries=2,
+                                          output_dir=str(tmp_path / "raw"))
+
+    assert list(results) == ["datasets_Mooring_19bs2c_final:19bs2c_s37_0064m",
+                             "datasets_Mooring_19bs2c_final:19bs2c_sc_0040m",
+                             "datasets_Mooring_19bs2c_final:missing",
+                             "CTD_dy1805_final"]
+    assert len(results["CTD_dy1805_final"]) == 12
+    assert (results["datasets_Mooring_19bs2c_final:19bs2c_sc_0040m"]["timeseries_id"]
+            == "19bs2c_sc_0040m").all()
+    assert results["datasets_Mooring_19bs2c_final:missing"].empty
+    # every url failed once and was retried
+    assert len(erddap_flaky_server.requests) == 8
+    assert (tmp_path / "raw" / "CTD_dy1805_final.nc").exists()
+
+
+def test_bulk_retrieve_named_with_cache(erddap_server, tmp_path):
+    cache = erddap.ErddapCache(str(tmp_path / "cache"))
+    datasets = {"ctd001": ("CTD_dy1805_final", {"profile_id=~": ".*001"})}
+    for _ in range(2):
+        results = erddap.erddap_bulk_retrieve(url=erddap_server.url, datasets=datasets,
+                                              cache=cache)
+    assert len(results["ctd001"]) == 4
+    assert len(erddap_server.requests) == 1
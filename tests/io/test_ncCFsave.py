@@ -0,0 +1,440 @@
+import netCDF4
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+from EcoFOCIpy.io import ncCFsave
+
+
+def legacy_expand(df, dim_names, rename=None):
+    """The original expand_dimensions chain"""
+    xdf = df.to_xarray().expand_dims(dim_names)
+    if rename:
+        xdf = xdf.rename(rename)
+    for dn in dim_names:
+        xdf = xdf.assign_coords({dn: (dn, [1e35])})
+    return xdf.transpose("time", "depth", "latitude", "longitude")
+
+
+@pytest.fixture
+def mooring_df():
+    time = pd.date_range("2021-01-01", periods=24, freq="h", name="date_time")
+    return pd.DataFrame({"temperature": np.linspace(2, 3, 24),
+                         "salinity": np.linspace(31, 32, 24).astype(np.float32)},
+                        index=time)
+
+
+def test_dataframe_to_xarray_is_zero_copy(mooring_df):
+    xdf = ncCFsave.dataframe_to_xarray(mooring_df)
+    xr.testing.assert_identical(xdf, mooring_df.to_xarray())
+    assert xdf["salinity"].dtype == np.float32
+    assert np.shares_memory(xdf["salinity"].values, mooring_df["salinity"].to_numpy())
+
+
+def test_expand_dimensions_mooring(mooring_df):
+    nc = ncCFsave.EcoFOCI_CFnc(df=mooring_df, operation_type="mooring")
+    nc.expand_dimensions()
+
+    expected = legacy_expand(mooring_df, ["latitude", "longitude", "depth"],
+                             rename={"date_time": "time"})
+    xr.testing.assert_identical(nc.get_xdf(), expected)
+    assert nc.get_xdf()["temperature"].dims == ("time", "depth", "latitude", "longitude")
+    assert nc.get_xdf()["salinity"].dtype == np.float32
+    assert np.shares_memory(nc.get_xdf()["temperature"].values,
+                            mooring_df["temperature"].to_numpy())
+
+
+def test_expand_dimensions_2d_adcp():
+    time = pd.date_range("2021-01-01", periods=5, freq="h")
+    depth = [10.0, 20.0, 30.0]
+    index = pd.MultiIndex.from_product([time, depth], names=["date_time", "depth"])
+    df = pd.DataFrame({"u_curr_comp": np.arange(15, dtype=float)}, index=index)
+
+    nc = ncCFsave.EcoFOCI_CFnc(df=df, operation_type="mooring")
+    nc.expand_dimensions(dim_names=["latitude", "longitude"])
+
+    expected = legacy_expand(df, ["latitude", "longitude"], rename={"date_time": "time"})
+    xr.testing.assert_identical(nc.get_xdf(), expected)
+
+
+def test_expand_dimensions_ctd():
+    depth = pd.Index(np.arange(1.0, 11.0), name="depth")
+    df = pd.DataFrame({"temperature_ch1": np.linspace(5, 1, 10)}, index=depth)
+
+    nc = ncCFsave.EcoFOCI_CFnc(df=df, operation_type="ctd")
+    nc.expand_dimensions(dim_names=["latitude", "longitude", "time"])
+
+    expected = legacy_expand(df, ["latitude", "longitude", "time"])
+    xr.testing.assert_identical(nc.get_xdf(), expected)
+
+
+def test_var_qcflag_init_int8(mooring_df, tmp_path):
+    mooring_df.iloc[3, 0] = np.nan
+    nc = ncCFsave.EcoFOCI_CFnc(df=mooring_df, operation_type="mooring")
+    nc.expand_dimensions()
+    nc.var_qcflag_init()
+
+    flags = nc.get_xdf()["temperature_QC"]
+    assert flags.dtype == np.int8
+    assert flags.dims == nc.get_xdf()["temperature"].dims
+    assert int(flags.isel(time=0)) == 0
+    assert int(flags.isel(time=3)) == ncCFsave.QC_FILL_VALUE
+
+    filename = str(tmp_path / "qc.nc")
+    nc.xarray2netcdf_save(nc.get_xdf(), filename=filename, format="NETCDF4")
+    with xr.open_dataset(filename, mask_and_scale=False) as raw:
+        assert raw["temperature_QC"].dtype == np.int8
+        assert raw["temperature_QC"].attrs["_FillValue"] == ncCFsave.QC_FILL_VALUE
+    with xr.open_dataset(filename) as decoded:
+        assert np.isnan(decoded["temperature_QC"].isel(time=3)).all()
+
+
+def test_var_qcflag_init_bitmask(mooring_df):
+    nc = ncCFsave.EcoFOCI_CFnc(df=mooring_df, operation_type="mooring")
+    nc.expand_dimensions()
+    nc.var_qcflag_init(bitmask=True)
+
+    flags = nc.get_xdf()["salinity_QC"]
+    assert flags.dtype == np.int16
+    assert (flags == 1).all()
+    assert flags.attrs["flag_masks"].tolist() == [2**n for n in range(10)]
+    assert ncCFsave.qcflag_to_bitmask([1, 4]).tolist() == [2, 16]
+
+
+def ctd_nc(first_depth=3.0, bitmask=False):
+    depth = pd.Index(np.arange(first_depth, first_depth + 5), name="depth")
+    df = pd.DataFrame({"temperature_ch1": np.linspace(5, 1, 5), "par": np.arange(5.0)},
+                      index=depth)
+    nc = ncCFsave.EcoFOCI_CFnc(df=df, operation_type="ctd")
+    nc.expand_dimensions(dim_names=["latitude", "longitude", "time"])
+    nc.var_qcflag_init(bitmask=bitmask)
+    return nc
+
+
+def test_interp2sfc():
+    nc = ctd_nc(first_depth=3.0)
+    nc.interp2sfc()
+    xdf = nc.get_xdf()
+
+    assert xdf["depth"].values.tolist() == [0, 1, 2, 3, 4, 5, 6, 7]
+    assert xdf["temperature_ch1"].dims == ("time", "depth", "latitude", "longitude")
+    np.testing.assert_array_equal(xdf["temperature_ch1"].values.ravel()[:4], [5, 5, 5, 5])
+    assert xdf["temperature_ch1_QC"].values.ravel().tolist() == [8, 8, 8, 0, 0, 0, 0, 0]
+    assert np.isnan(xdf["par"].values.ravel()[:3]).all()
+    assert xdf["par_QC"].values.ravel().tolist() == [9, 9, 9, 0, 0, 0, 0, 0]
+    assert xdf["par_QC"].dtype == np.int8
+    assert "QCFlag_Value" in xdf["par_QC"].attrs
+
+    nc = ctd_nc(first_depth=3.0, bitmask=True)
+    nc.interp2sfc()
+    xdf = nc.get_xdf()
+    assert xdf["temperature_ch1_QC"].values.ravel().tolist() == [256, 256, 256, 1, 1, 1, 1, 1]
+    assert xdf["par_QC"].values.ravel().tolist() == [512, 512, 512, 1, 1, 1, 1, 1]
+    assert xdf["par_QC"].dtype == np.int16
+
+
+def test_interp2sfc_fractional_and_surface_depths():
+    nc = ctd_nc(first_depth=1.5)
+    nc.interp2sfc()
+    np.testing.assert_array_equal(nc.get_xdf()["depth"].values[:2], [-0.5, 0.5])
+
+    nc = ctd_nc(first_depth=0.0)
+    nc.interp2sfc()
+    assert nc.get_xdf().sizes["depth"] == 5
+
+
+def test_extrapolate_to_surface_stacked_profiles():
+    depth = np.arange(1.0, 6.0)
+    temperature = np.array([[np.nan, np.nan, 4.0, 3.0, 2.0],
+                            [6.0, 5.0, np.nan, 3.0, 2.0]])
+    xdf = xr.Dataset({"temperature": (("profile", "depth"), temperature),
+                      "temperature_QC": (("profile", "depth"), np.zeros((2, 5), np.int8))},
+                     coords={"depth": depth, "profile": [0, 1]})
+
+    out = ncCFsave.extrapolate_to_surface(xdf, novars=[], profile_dim="profile")
+
+    np.testing.assert_array_equal(out["temperature"].sel(profile=0), [4, 4, 4, 4, 3, 2])
+    # interior gaps are not filled
+    np.testing.assert_array_equal(out["temperature"].sel(profile=1),
+                                  [6, 6, 5, np.nan, 3, 2])
+    assert out["temperature_QC"].sel(profile=0).values.tolist() == [8, 8, 8, 0, 0, 0]
+    assert out["temperature_QC"].sel(profile=1).values.tolist() == [8, 0, 0, 0, 0, 0]
+
+
+def test_time_chunksizes():
+    assert ncCFsave.time_chunksizes((100, 1, 1, 1), ("time", "depth", "latitude", "longitude"),
+                                    chunk_elements=10) == (10, 1, 1, 1)
+    # non-time dimensions are kept whole
+    assert ncCFsave.time_chunksizes((100, 256), ("time", "wavelength"),
+                                    chunk_elements=1024) == (4, 256)
+    assert ncCFsave.time_chunksizes((5, 2), ("time", "depth")) == (5, 2)
+
+
+def test_xarray2netcdf_save_packing_and_compression(mooring_df, tmp_path):
+    instrument_yaml = {
+        "temperature": {"long_name": "temperature", "encoding": {"dtype": "float32"}},
+        "salinity": {"long_name": "salinity",
+                     "encoding": {"dtype": "int16", "scale_factor": 0.001,
+                                  "add_offset": 30.0, "_FillValue": -32768}},
+    }
+    nc = ncCFsave.EcoFOCI_CFnc(df=mooring_df, instrument_yaml=instrument_yaml,
+                               operation_type="mooring")
+    nc.expand_dimensions()
+    nc.variable_meta_data(variable_keys=["temperature", "salinity"])
+    nc.var_qcflag_init()
+    assert "encoding" not in nc.get_xdf()["temperature"].attrs
+
+    filename = str(tmp_path / "packed.nc")
+    nc.xarray2netcdf_save(nc.get_xdf(), filename=filename, format="NETCDF4")
+
+    with xr.open_dataset(filename, mask_and_scale=False) as raw:
+        assert raw["temperature"].dtype == np.float32
+        assert raw["salinity"].dtype == np.int16
+        assert raw["temperature_QC"].dtype == np.int8
+        assert raw["temperature"].encoding["zlib"]
+        assert raw["temperature"].encoding["shuffle"]
+        assert raw["temperature"].encoding["chunksizes"] == (24, 1, 1, 1)
+    with xr.open_dataset(filename) as decoded:
+        np.testing.assert_allclose(decoded["salinity"].values.ravel(),
+                                   mooring_df["salinity"].values, atol=0.001)
+
+
+def test_xarray2netcdf_save_netcdf3(mooring_df, tmp_path):
+    nc = ncCFsave.EcoFOCI_CFnc(df=mooring_df, operation_type="mooring")
+    nc.expand_dimensions()
+    nc.var_qcflag_init()
+    filename = str(tmp_path / "classic.nc")
+    nc.xarray2netcdf_save(nc.get_xdf(), filename=filename, format="NETCDF3_CLASSIC")
+
+    with xr.open_dataset(filename, mask_and_scale=False) as raw:
+        assert "zlib" not in raw["temperature"].encoding
+        assert raw["temperature_QC"].dtype == np.int8
+
+
+def test_xarray2zarr_save_and_append(mooring_df, tmp_path):
+    pytest.importorskip("zarr")
+    instrument_yaml = {"temperature": {"long_name": "temperature",
+                                       "encoding": {"dtype": "float32"}},
+                       "salinity": {"long_name": "salinity"}}
+
+    def build(df):
+        nc = ncCFsave.EcoFOCI_CFnc(df=df, instrument_yaml=instrument_yaml,
+                                   operation_type="mooring")
+        nc.expand_dimensions()
+        nc.variable_meta_data(variable_keys=["temperature", "salinity"])
+        nc.var_qcflag_init()
+        nc.xdf.attrs["title"] = "test mooring"
+        return nc
+
+    store = str(tmp_path / "mooring.zarr")
+    nc = build(mooring_df.iloc[:10])
+    ncCFsave.xarray2zarr(nc.get_xdf(), store, chunk_elements=4, max_workers=3)
+    build(mooring_df.iloc[10:]).xarray2zarr_save(build(mooring_df.iloc[10:]).get_xdf(),
+                                                 store=store, append=True)
+
+    full = build(mooring_df).get_xdf()
+    with xr.open_zarr(store) as ds:
+        assert ds.attrs["title"] == "test mooring"
+        assert ds["temperature"].attrs["long_name"] == "temperature"
+        assert ds["temperature"].encoding["chunks"] == (4, 1, 1, 1)
+        assert ds["temperature"].encoding["dtype"] == np.float32
+        assert ds["temperature_QC"].encoding["dtype"] == np.int8
+        np.testing.assert_array_equal(ds["time"].values, full["time"].values)
+        np.testing.assert_allclose(ds["temperature"].values, full["temperature"].values,
+                                   rtol=1e-6)
+        np.testing.assert_array_equal(ds["salinity_QC"].values, full["salinity_QC"].values)
+
+    with pytest.raises(ValueError):
+        ncCFsave.xarray2zarr(nc.get_xdf(), store, append=True)
+
+
+def test_xarray2zarr_concurrent_2d(tmp_path):
+    pytest.importorskip("zarr")
+    rng = np.random.default_rng(0)
+    time = pd.date_range("2021-01-01", periods=1000, freq="h")
+    xdf = xr.Dataset({"u": (("time", "bin"), rng.normal(size=(1000, 3))),
+                      "temperature": ("time", rng.normal(size=1000))},
+                     coords={"time": time, "bin": [1, 2, 3]})
+
+    store = str(tmp_path / "adcp.zarr")
+    ncCFsave.xarray2zarr(xdf.isel(time=slice(0, 600)), store, chunk_elements=100,
+                         max_workers=8)
+    ncCFsave.xarray2zarr(xdf.isel(time=slice(600, None)), store, append=True, max_workers=8)
+
+    with xr.open_zarr(store) as z:
+        assert z["u"].encoding["chunks"] == (33, 3)
+        assert z["temperature"].encoding["chunks"] == (33,)
+        np.testing.assert_array_equal(z["u"].values, xdf["u"].values)
+        np.testing.assert_array_equal(z["temperature"].values, xdf["temperature"].values)
+
+
+def test_zarr_default_chunks_split_adcp_record():
+    time = pd.date_range("2021-01-01", periods=8760, freq="h")
+    xdf = xr.Dataset({"u": (("time", "depth"), np.zeros((8760, 50)))},
+                     coords={"time": time})
+    chunk = ncCFsave.record_time_chunk(xdf)
+    assert len(ncCFsave._zarr_regions(8760, chunk)) > 1
+
+
+def test_xarray2netcdf_append(mooring_df, tmp_path):
+    instrument_yaml = {"temperature": {"long_name": "temperature", "units": "degree_C"},
+                       "salinity": {"long_name": "salinity", "units": "PSU",
+                                    "encoding": {"dtype": "int16", "scale_factor": 0.001,
+                                                 "add_offset": 30.0, "_FillValue": -32768}}}
+
+    def build(df):
+        nc = ncCFsave.EcoFOCI_CFnc(df=df, instrument_yaml=instrument_yaml,
+                                   operation_type="mooring")
+        nc.expand_dimensions()
+        nc.variable_meta_data(variable_keys=["temperature", "salinity"])
+        nc.var_qcflag_init()
+        nc.provinance_meta_add()
+        nc.history("Created.")
+        return nc
+
+    filename = str(tmp_path / "nrt.nc")
+    nc = build(mooring_df.iloc[:10])
+    nc.xarray2netcdf_save(nc.get_xdf(), filename=filename, unlimited_time=True)
+
+    # the update overlaps the stored record, only the new steps are written
+    mooring_df.iloc[15, 0] = np.nan
+    update = build(mooring_df.iloc[5:])
+    assert update.xarray2netcdf_append(update.get_xdf(), filename=filename) == 14
+    assert update.xarray2netcdf_append(update.get_xdf(), filename=filename) == 0
+
+    expected = build(mooring_df).get_xdf()
+    with xr.open_dataset(filename) as ds:
+        np.testing.assert_array_equal(ds["time"].values, expected["time"].values)
+        np.testing.assert_allclose(ds["temperature"].values, expected["temperature"].values)
+        np.testing.assert_allclose(ds["salinity"].values, expected["salinity"].values,
+                                   atol=0.001)
+        assert np.isnan(ds["temperature"].isel(time=15)).all()
+        assert ds.attrs["date_modified"]
+        assert ds.attrs["history"].startswith("Created.\n")
+        assert ds.attrs["history"].endswith("Appended 14 records.")
+    with xr.open_dataset(filename, mask_and_scale=False) as raw:
+        np.testing.assert_array_equal(raw["temperature_QC"].values,
+                                      expected["temperature_QC"].values)
+
+
+def test_xarray2netcdf_append_validates(mooring_df, tmp_path):
+    nc = ncCFsave.EcoFOCI_CFnc(df=mooring_df.iloc[:10], operation_type="mooring")
+    nc.expand_dimensions()
+    filename = str(tmp_path / "fixed.nc")
+    nc.xarray2netcdf_save(nc.get_xdf(), filename=filename)
+    with pytest.raises(ValueError, match="unlimited"):
+        ncCFsave.netcdf_append(nc.get_xdf(), filename)
+
+    nc.xarray2netcdf_save(nc.get_xdf(), filename=filename, unlimited_time=True)
+    update = ncCFsave.EcoFOCI_CFnc(df=mooring_df.iloc[10:], operation_type="mooring")
+    update.expand_dimensions()
+    with pytest.raises(ValueError, match="missing"):
+        ncCFsave.netcdf_append(update.get_xdf().drop_vars("salinity"), filename)
+    update.xdf["temperature"].attrs["units"] = "degree_F"
+    nc.xdf["temperature"].attrs["units"] = "degree_C"
+    nc.xarray2netcdf_save(nc.get_xdf(), filename=filename, unlimited_time=True)
+    with pytest.raises(ValueError, match="units"):
+        ncCFsave.netcdf_append(update.get_xdf(), filename)
+    update.xdf["temperature"].attrs["units"] = "degree_C"
+    with pytest.raises(ValueError, match="values"):
+        ncCFsave.netcdf_append(update.get_xdf().assign_coords(depth=[10.0]), filename)
+
+
+def test_xarray2netcdf_append_validates_packing(mooring_df, tmp_path):
+    def build(df, encoding):
+        nc = ncCFsave.EcoFOCI_CFnc(
+            df=df, operation_type="mooring",
+            instrument_yaml={"salinity": {"units": "PSU", "encoding": encoding}})
+        nc.expand_dimensions()
+        nc.variable_meta_data(variable_keys=["salinity"])
+        return nc
+
+    packing = {"dtype": "int16", "scale_factor": 0.001, "add_offset": 30.0,
+               "_FillValue": -32768}
+    filename = str(tmp_path / "packed.nc")
+    nc = build(mooring_df.iloc[:10], packing)
+    nc.xarray2netcdf_save(nc.get_xdf(), filename=filename, unlimited_time=True)
+
+    update = build(mooring_df.iloc[10:], dict(packing, scale_factor=0.01))
+    with pytest.raises(ValueError, match="scale_factor"):
+        ncCFsave.netcdf_append(update.get_xdf(), filename)
+    update = build(mooring_df.iloc[10:], dict(packing, add_offset=0.0))
+    with pytest.raises(ValueError, match="add_offset"):
+        ncCFsave.netcdf_append(update.get_xdf(), filename)
+    update = build(mooring_df.iloc[10:], dict(packing, dtype="int32"))
+    with pytest.raises(ValueError, match="int32"):
+        ncCFsave.netcdf_append(update.get_xdf(), filename)
+    update = build(mooring_df.iloc[10:], packing)
+    assert ncCFsave.netcdf_append(update.get_xdf(), filename) == len(mooring_df) - 10
+
+
+@pytest.fixture
+def cruise_yaml():
+    import os
+
+    import yaml
+    path = os.path.join(os.path.dirname(__file__), "..", "..", "staticdata",
+                        "cruise_example.yaml")
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+def test_ragged_profiles_round_trip(cruise_yaml, tmp_path):
+    ctd_names = list(cruise_yaml["CTDCasts"])[:3]
+    casts = {}
+    for n, name in enumerate(ctd_names):
+        depth = pd.Index(np.arange(1.0, 5.0 + 3 * n), name="depth")
+        casts[name] = pd.DataFrame({"temperature_ch1": depth.to_numpy() * 0.1 + n,
+                                    "salinity_ch1": np.full(len(depth), 31.0 + n)},
+                                   index=depth)
+    xdf = ncCFsave.casts_to_ragged(
+        casts, cruise_yaml, positiveE=False,
+        instrument_yaml={"temperature_ch1": {"units": "degree_C",
+                                             "encoding": {"dtype": "float32"}}})
+
+    assert xdf["rowSize"].values.tolist() == [4, 7, 10]
+    assert xdf.sizes["obs"] == 21
+    assert xdf.attrs["featureType"] == "profile"
+    assert xdf["StationNameID"].values[0] == cruise_yaml["CTDCasts"][ctd_names[0]]["StationNameID"]
+    assert xdf["longitude"].values[0] < 0
+    assert xdf["BottomDepth"].dtype == np.float64
+
+    filename = str(tmp_path / "cruise.nc")
+    ncCFsave.ragged_profile_save(xdf, filename)
+    with netCDF4.Dataset(filename) as nc:
+        assert nc["salinity_ch1"].coordinates == "time latitude longitude depth"
+
+    with ncCFsave.RaggedProfiles(filename) as cruise:
+        assert len(cruise) == 3
+        cast = cruise.cast(ctd_names[1].lower())
+        np.testing.assert_allclose(cast["temperature_ch1"].values,
+                                   casts[ctd_names[1]]["temperature_ch1"].values, rtol=1e-6)
+        np.testing.assert_array_equal(cast["depth"].values, casts[ctd_names[1]].index.values)
+        assert cast["profile_id"].values == ctd_names[1]
+        assert cast["temperature_ch1"].attrs["units"] == "degree_C"
+        assert cruise.cast(2).sizes["obs"] == 10
+
+
+def test_ragged_profile_meta_missing(cruise_yaml):
+    ctd_names = list(cruise_yaml["CTDCasts"])[:2]
+    del cruise_yaml["CTDCasts"][ctd_names[0]]["BottomDepth"]
+    del cruise_yaml["CTDCasts"][ctd_names[1]]["StationNameID"]
+    casts = {name: pd.DataFrame({"temperature_ch1": [1.0, 2.0]},
+                                index=pd.Index([1.0, 2.0], name="pressure"))
+             for name in ctd_names}
+
+    xdf = ncCFsave.casts_to_ragged(casts, cruise_yaml)
+
+    assert xdf["BottomDepth"].dtype == np.float64
+    assert np.isnan(xdf["BottomDepth"].values[0])
+    assert xdf["BottomDepth"].values[1] == cruise_yaml["CTDCasts"][ctd_names[1]]["BottomDepth"]
+    assert xdf["StationNameID"].values[1] == ""
+    assert xdf["temperature_ch1"].encoding["coordinates"] == "time latitude longitude pressure"
+
+
+def test_cast_position_time(cruise_yaml):
+    time, latitude, longitude = ncCFsave.cast_position_time(cruise_yaml, "ctd001",
+                                                            positiveE=False)
+    assert time == pd.Timestamp("2018-04-30") + pd.Timedelta(seconds=69660)
+    assert latitude == pytest.approx(56 + 52.28 / 60)
+    assert longitude == pytest.approx(-(164 + 2.92 / 60))
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+import pytest
+from EcoFOCIpy.io import nitrates_parser
+
+
+def write_isus_dat(path, start_hour=0.0, nrows=4):
+    """Write a small ISUS .DAT file with the 12 line header layout."""
+    wavelengths = [f"{190 + i * 0.8:.2f}" for i in range(256)]
+    lines = [f"header line {i}\n" for i in range(11)]
+    lines.append(",".join(["SATSLF0204", "L"] + wavelengths) + "\n")
+    for k in range(nrows):
+        row = ["SATSLF0204", "2014123", f"{start_hour + k * 0.25:.5f}", f"{k + 1}.5"]
+        row += ["0"] * 16 + [str(1000 + k)] * 256 + ["42"]
+        lines.append(",".join(row) + "\n")
+    with open(path, "w") as f:
+        f.writelines(lines)
+    return path
+
+
+@pytest.fixture
+def isus_dir(tmp_path):
+    """Two .DAT files whose records interleave in time."""
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    write_isus_dat(raw_dir / "B.DAT", start_hour=1.0)
+    write_isus_dat(raw_dir / "A.DAT", start_hour=0.1)
+    return raw_dir
+
+
+def test_get_bandwidth_names(isus_dir):
+    names = nitrates_parser.get_bandwidth_names(str(isus_dir / "A.DAT"))
+    assert len(names) == 256
+    assert names[0] == "190.00"
+
+
+def test_isus_datetime_matches_string_parsing():
+    yyyyddd = pd.Series([2014123, 2015001, 2016366])
+    hours = pd.Series([0.5, 12.25, 23.99999])
+    expected = (pd.to_datetime(yyyyddd.astype(str), format="%Y%j")
+                + pd.to_timedelta(hours, unit="h"))
+    result = nitrates_parser.isus_datetime(yyyyddd, hours)
+    np.testing.assert_array_equal(result, expected.to_numpy())
+
+
+def test_isus_datetime_bad_rows_are_nat():
+    result = nitrates_parser.isus_datetime(["2014123", "garbage"], ["1.0", "2.0"])
+    assert not pd.isna(result[0])
+    assert pd.isna(result[1])
+
+
+@pytest.mark.parametrize("ext", [".nc", ".parquet"])
+def test_batch_ingest_isus_files(isus_dir, tmp_path, ext):
+    if ext == ".parquet":
+        pytest.importorskip("pyarrow")
+    output = str(tmp_path / f"merged{ext}")
+    merged = nitrates_parser.batch_ingest_isus_files(str(isus_dir), output, max_workers=2)
+
+    assert merged.shape[0] == 8
+    assert merged["date_time"].is_monotonic_increasing
+
+    isus = nitrates_parser.Isus()
+    df = isus.parse(filename=output)
+    assert isinstance(df.index, pd.DatetimeIndex)
+    assert df.index.is_monotonic_increasing
+    assert df.index[0] == pd.Timestamp("2014-05-03 00:06:00")
+    assert df.columns[0] == "S/N"
+    assert df.shape[1] == 275
+
+
+CAL_CONTENT = """H,File creation time : 01-Jan-2020 00:00:00
+H,T_CAL 20.5
+E,217.00,0.0100,0.0020,0,30000
+E,218.00,0.0090,?,0,31000
+"""
+
+
+@pytest.fixture
+def cal_tree(tmp_path):
+    """Vendor style calibration folders for SUNA 598 (2015 and 2020)."""
+    for year, letter in [(2015, "A"), (2020, "F")]:
+        folder = tmp_path / "cals" / "SUNA_598" / str(year)
+        folder.mkdir(parents=True)
+        (folder / f"SNA0598{letter}.cal").write_text(CAL_CONTENT.replace("20.5", str(year)))
+    return tmp_path / "cals"
+
+
+def test_instrument_from_cal_filename():
+    assert nitrates_parser.instrument_from_cal_filename("SNA1471B.cal") == "SUNA 1471"
+    assert nitrates_parser.instrument_from_cal_filename("/x/SNA0598F.cal") == "SUNA 598"
+    assert nitrates_parser.instrument_from_cal_filename("ISUS204D.CAL") == "ISUS 204"
+    assert nitrates_parser.instrument_from_cal_filename("notes.cal") is None
+
+
+def test_calibration_store_offline_lookup(cal_tree, tmp_path, monkeypatch):
+    store = nitrates_parser.CalibrationStore(str(tmp_path / "store"))
+    assert store.preload(str(cal_tree)) == 2
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("network access attempted")
+
+    monkeypatch.setattr(nitrates_parser.requests, "get", no_network)
+
+    content = nitrates_parser.get_calibration_file("SUNA 598", 2018, cal_store=store)
+    assert "T_CAL 2015" in content
+    content = nitrates_parser.get_calibration_file("SUNA 598", "2021", cal_store=store)
+    assert "T_CAL 2020" in content
+
+    with pytest.raises(ValueError):
+        nitrates_parser.get_calibration_file("SUNA 1471", 2021, cal_store=store, offline=True)
+
+    # index is persisted and re-read by a new store
+    reopened = nitrates_parser.CalibrationStore(str(tmp_path / "store"))
+    assert reopened.lookup("SUNA 598", 2016) == store.lookup("SUNA 598", 2016)
+
+
+def test_calibration_store_parsed_cache(tmp_path):
+    store = nitrates_parser.CalibrationStore(str(tmp_path / "store"))
+    store.add("SUNA 598", CAL_CONTENT, year=2020)
+
+    ncal = store.parsed(CAL_CONTENT, parser=nitrates_parser.parse_no3_cal)
+    assert ncal["CalTemp"] == 20.5
+    assert ncal["WL"] == [217.0, 218.0]
+    assert np.isnan(ncal["ESW"][1])
+
+    # a fresh store reads the parsed result from disk
+    reopened = nitrates_parser.CalibrationStore(str(tmp_path / "store"))
+    assert reopened.parsed(CAL_CONTENT, parser=nitrates_parser.parse_no3_cal)["WL"] == ncal["WL"]
+
+
+def make_isus_frame(frame_types, times):
+    df = pd.DataFrame({"S/N": frame_types,
+                       "NO3_conc": np.arange(len(times), dtype=float) + 1.0,
+                       "RMS Error": 0.001},
+                      index=pd.DatetimeIndex(times, name="date_time"))
+    isus = nitrates_parser.Isus()
+    isus.data_frame = df
+    return isus
+
+
+def test_dark_index_hourly_matches_groupby_apply():
+    times = pd.to_datetime(["2014-05-03 00:00", "2014-05-03 00:10", "2014-05-03 00:20",
+                            "2014-05-03 01:00", "2014-05-03 02:00", "2014-05-03 02:30"])
+    isus = make_isus_frame(["SN0204"] * len(times), times)
+    df = isus.data_frame
+
+    expected = (df.groupby(pd.Grouper(freq="h"))
+                  .apply(lambda g: g.iloc[1:] if len(g) > 1 else g)
+                  .droplevel(0))
+    kept = df[~isus.dark_index(method="hourly").to_numpy()]
+    pd.testing.assert_frame_equal(kept, expected)
+
+
+def test_dark_index_frame_types_and_cache():
+    times = pd.date_range("2014-05-03", periods=4, freq="15min")
+    isus = make_isus_frame(["SATNDF0204", "SATNLF0204", "SATNLF0204", "SATNDF0204"], times)
+
+    is_dark = isus.dark_index()
+    assert is_dark.tolist() == [True, False, False, True]
+    assert isus.dark_index() is is_dark
+
+    filtered = isus.FilterIsus(rmse_cutoff=0.003)
+    assert filtered["NO3_conc"].iloc[0] == 2.5
+    # data_frame was replaced, so the index is rebuilt
+    assert len(isus.dark_index()) == len(filtered)
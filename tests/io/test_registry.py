@@ -0,0 +1,126 @@
+import os
+
+import pandas as pd
+import pytest
+from EcoFOCIpy.io import open_instrument, open_instruments, registry, sniff
+from EcoFOCIpy.testing import synth
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "..", "staticdata", "example_data")
+MTR_COEF = [1.1e-3, 2.4e-4, 1.0e-7]
+
+
+@pytest.mark.parametrize("write, kind, shape", [
+    (lambda d: synth.sbe56_cnv(d / "t.cnv", 50), "sbe56", (50, 4)),
+    (lambda d: synth.sbe16_cnv(d / "t.cnv", 50), "sbe16", (50, 6)),
+    (lambda d: synth.sbe37_csv(d / "t.csv", 50), "sbe37", (50, 4)),
+    (lambda d: synth.sbe39_csv(d / "t.asc", 50, pressure=False), "sbe39", (50, 1)),
+    (lambda d: synth.sbe26_tid(d / "t.tid", 50), "sbe26", (50, 2)),
+    (lambda d: synth.suna_csv(d / "t.csv", 5), "suna", (5, 279)),
+    (lambda d: synth.isus_dat(d / "t.DAT", 5), "isus", (5, 275)),
+    (lambda d: synth.mtrduino_csv(d / "t.csv", 5), "mtr", (5, 6)),
+    (lambda d: synth.mtr_legacy(d / "t.txt", 2), "mtr", (240, 1)),
+    (lambda d: synth.wetlabs_txt(d / "t.txt", 50), "wetlabs", (50, 3)),
+    (lambda d: synth.wetlabs_txt(d / "t.txt", 50, channels=None), "wetlabs", (50, 1)),
+    (lambda d: synth.rcm_dat(d / "t.dat", 50), "rcm", (50, 9)),
+    (lambda d: synth.rcm_dat(d / "t.dat", 50, number_of_channels=7, time_format=1), "rcm",
+     (50, 8)),
+])
+def test_sniff_and_open(tmp_path, write, kind, shape):
+    path = write(tmp_path)
+    assert sniff(path) == kind
+
+    result = open_instrument(path, mtr_coef=MTR_COEF) if kind == "mtr" else open_instrument(path)
+    assert result.kind == kind
+    assert result.data.shape == shape
+    assert isinstance(result.data.index, pd.DatetimeIndex)
+    assert result.metadata["bytes"] == os.path.getsize(path)
+
+
+def test_adcp_reads_setup_from_report(tmp_path):
+    files = synth.adcp_files(tmp_path, "1234", 10, nbins=5)
+    result = open_instrument(files[".VEL"])
+    assert result.kind == "adcp"
+    assert list(result.data.columns[:3]) == ["bin", "u_curr_comp", "v_curr_comp"]
+    assert result.metadata["serial_no"] == "1234"
+    assert result.metadata["setup"]["num_of_bins"] == 5
+    assert result.parser.vel_df is result.data
+    assert open_instrument(files[".SCA"]).data.shape == (10, 8)
+
+
+@pytest.mark.parametrize("filename, kind", [
+    ("sbe56_timeJ.cnv", "sbe56"),
+    ("sbe16_sample1.cnv", "sbe16"),
+    ("sbe37_wpress.cnv", "sbe37"),
+    ("sbe39_wopress.cnv", "sbe39"),
+    ("sbe26_sample.tid", "sbe26"),
+    ("ecoflsb_sample.txt", "wetlabs"),
+    ("wpak_test.txt", "wpak"),
+    (os.path.join("adcp_data", "14068.VEL"), "adcp"),
+    (os.path.join("profile_data", "ctd001.cnv"), "sbe9_11p"),
+    (os.path.join("profile_data", "ctd001.btl"), "sbe_btl"),
+])
+def test_sniff_example_data(filename, kind):
+    assert sniff(os.path.join(EXAMPLES, filename)) == kind
+
+
+def test_static_parser_results():
+    sbe56 = open_instrument(os.path.join(EXAMPLES, "sbe56_timeJ.cnv"))
+    assert sbe56.header[-1].startswith("*END*")
+    assert sbe56.metadata["start_time"]
+    assert sbe56.parser is None
+
+    sbe37 = open_instrument(os.path.join(EXAMPLES, "sbe37_wpress.cnv"), datetime_index=False)
+    assert "date_time" in sbe37.data.columns
+
+
+def test_kind_and_parser_arguments(tmp_path):
+    path = synth.rcm_dat(tmp_path / "t.dat", 10, number_of_channels=7, time_format=1)
+    with pytest.raises(ValueError, match="Unknown instrument kind"):
+        open_instrument(path, kind="sbe99")
+
+    result = open_instrument(path, kind="rcm")
+    assert result.metadata["number_of_channels"] == 7
+    assert result.metadata["time_format"] == 1
+    assert result.data.index[0] == pd.Timestamp(synth.START)
+
+    raw = open_instrument(path, kind="rcm", datetime_index=False)
+    assert "date_time" in raw.data.columns
+
+
+def test_unknown_file(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("nothing to see here\n")
+    with pytest.raises(ValueError, match="Could not identify"):
+        open_instrument(path)
+    with pytest.raises(FileNotFoundError):
+        open_instrument(tmp_path / "missing.cnv")
+
+
+def test_register_format(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "FORMATS", dict(registry.FORMATS))
+
+    @registry.register("counts", sniffer=lambda ext, head: head.startswith("COUNTS"))
+    def read_counts(filename):
+        data = pd.read_csv(filename, skiprows=1, names=["count"])
+        return registry.InstrumentData("counts", filename, data)
+
+    path = tmp_path / "c.txt"
+    path.write_text("COUNTS\n1\n2\n")
+    assert open_instrument(path).data["count"].tolist() == [1, 2]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_open_instruments(tmp_path, max_workers, capsys):
+    files = [synth.sbe37_csv(tmp_path / "a.csv", 20), synth.sbe39_csv(tmp_path / "b.csv", 30),
+             synth.sbe26_tid(tmp_path / "c.tid", 40)]
+    bad = tmp_path / "bad.txt"
+    bad.write_text("nothing\n")
+
+    results = open_instruments(files + [bad], max_workers=max_workers, errors="skip")
+    assert list(results) == [os.fspath(f) for f in files]
+    assert [r.kind for r in results.values()] == ["sbe37", "sbe39", "sbe26"]
+    assert [len(r.data) for r in results.values()] == [20, 30, 40]
+    assert "[WARNING] Skipping" in capsys.readouterr().out
+
+    with pytest.raises(ValueError, match="Could not identify"):
+        open_instruments(files + [bad], max_workers=max_workers)
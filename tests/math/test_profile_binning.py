@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+from EcoFOCIpy.math import profile_binning
+
+
+def make_cast(max_pressure, seed):
+    """Down and up cast at ~24 scans per dbar with noisy temperature."""
+    rng = np.random.default_rng(seed)
+    down = np.linspace(0.3, max_pressure, int(24 * max_pressure))
+    up = np.linspace(max_pressure - 0.1, 1.0, int(12 * max_pressure))
+    pressure = np.concatenate([down, up])
+    return pd.DataFrame(
+        {"t090C": 10 - 0.1 * pressure + rng.normal(0, 0.05, len(pressure)),
+         "sal00": 31 + 0.01 * pressure},
+        index=pd.Index(pressure, name="Pressure [dbar]"),
+    )
+
+
+def groupby_bin(df, bin_size=1.0):
+    down = df.iloc[: np.argmax(df.index.to_numpy()) + 1]
+    levels = np.floor(down.index.to_numpy() / bin_size + 0.5) * bin_size
+    return down.groupby(levels).agg(["mean", "count", "std"])
+
+
+def test_split_cast():
+    assert profile_binning.split_cast([1, 2, 3, 2, 1]).tolist() == [True] * 3 + [False] * 2
+
+
+def test_bin_casts_matches_groupby():
+    casts = {"ctd001.cnv": make_cast(20.0, 1), "ctd002.cnv": make_cast(35.0, 2)}
+    binned = profile_binning.bin_casts(casts)
+
+    assert binned["t090C"].dims == ("profile", "pressure")
+    assert binned["pressure"].values[0] == 0.0
+    assert binned["pressure"].values[-1] == 35.0
+
+    for name, df in casts.items():
+        expected = groupby_bin(df)
+        cast = binned.sel(profile=name, pressure=expected.index.to_numpy())
+        np.testing.assert_allclose(cast["t090C"], expected[("t090C", "mean")])
+        np.testing.assert_array_equal(cast["t090C_count"], expected[("t090C", "count")])
+        np.testing.assert_allclose(cast["t090C_std"], expected[("t090C", "std")])
+
+    # the shallow cast has no data in the deeper bins
+    assert binned["t090C_count"].sel(profile="ctd001.cnv", pressure=30.0) == 0
+    assert np.isnan(binned["t090C"].sel(profile="ctd001.cnv", pressure=30.0))
+
+
+def test_bin_casts_upcast_and_range():
+    df = make_cast(10.0, 3)
+    binned = profile_binning.bin_casts(df, direction="up", bin_size=2.0,
+                                       pressure_range=(2, 8), stats=("mean",))
+    assert binned["pressure"].values.tolist() == [2.0, 4.0, 6.0, 8.0]
+    assert list(binned.data_vars) == ["t090C", "sal00"]
+    up = df.iloc[np.argmax(df.index.to_numpy()) + 1:]
+    in_bin = up[(up.index >= 3.0) & (up.index < 5.0)]
+    assert float(binned["sal00"].sel(pressure=4.0)) == pytest.approx(in_bin["sal00"].mean())
@@ -0,0 +1,68 @@
+import matplotlib as mpl
+import numpy as np
+import pandas as pd
+import pytest
+from EcoFOCIpy.plots import batch_plots
+
+
+@pytest.fixture
+def casts():
+    depth = np.arange(1, 51, dtype=float)
+    df = pd.DataFrame({"temperature_ch1": np.linspace(8, 1, 50),
+                       "temperature_ch2": np.linspace(8.01, 1.01, 50),
+                       "salinity_ch1": np.linspace(31, 33, 50),
+                       "salinity_ch2": np.linspace(31.01, 33.01, 50)},
+                      index=pd.Index(depth, name="depth"))
+    return {"ctd001.cnv": df, "ctd002.cnv": df * 1.01}
+
+
+@pytest.fixture
+def currents():
+    time = pd.date_range("2020-01-01", periods=200, freq="h")
+    df = pd.DataFrame({"u_curr_comp": 10 * np.sin(np.arange(200) / 10),
+                       "v_curr_comp": 10 * np.cos(np.arange(200) / 10)}, index=time)
+    return {"20bs2c_rcm_0050m": df}
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_render_figures(casts, currents, tmp_path, max_workers):
+    jobs = batch_plots.profile_jobs(casts, kind="plot2var",
+                                    varname=["temperature_ch1", "temperature_ch2",
+                                             "salinity_ch1", "salinity_ch2"],
+                                    xlabel=["Temperature", "Salinity"], suffix="TempSal")
+    jobs += batch_plots.salvtemp_jobs(casts, cruise="dy2103")
+    jobs += batch_plots.stick_jobs(currents)
+
+    report = batch_plots.render_figures(jobs, str(tmp_path), max_workers=max_workers)
+
+    assert report["error"].isna().all()
+    assert sorted(report["name"]) == ["20bs2c_rcm_0050m_stick", "ctd001_TS", "ctd001_TempSal",
+                                      "ctd002_TS", "ctd002_TempSal"]
+    assert (report["render_time"] > 0).all()
+    for path in report["path"]:
+        assert path.endswith(".png")
+        assert (tmp_path / path.split("/")[-1]).stat().st_size > 0
+
+
+def test_render_figures_reports_errors(tmp_path):
+    report = batch_plots.render_figures([{"name": "bad", "kind": "nope", "kwargs": {}}],
+                                        str(tmp_path), max_workers=1)
+    assert report.loc[0, "path"] is None
+    assert "Unknown plot kind" in report.loc[0, "error"]
+
+
+def test_render_in_process_keeps_backend(casts, tmp_path):
+    backend = mpl.get_backend()
+    mpl.use("svg", force=True)
+    try:
+        report = batch_plots.render_figures(batch_plots.salvtemp_jobs(casts), str(tmp_path),
+                                            max_workers=1)
+        assert mpl.get_backend() == "svg"
+    finally:
+        mpl.use(backend, force=True)
+    assert report["error"].isna().all()
+
+
+def test_profile_jobs_requires_varname(casts):
+    with pytest.raises(TypeError):
+        batch_plots.profile_jobs(casts)
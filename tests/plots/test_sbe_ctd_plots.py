@@ -0,0 +1,31 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+import seawater as sw
+from EcoFOCIpy.plots import sbe_ctd_plots
+
+
+def test_sigmat_grid_matches_pointwise():
+    si, ti, dens = sbe_ctd_plots.sigmat_grid([30, 32], [-2, 4])
+    assert dens.shape == (len(ti), len(si)) == (7, 21)
+    for j in (0, 3, 6):
+        for i in (0, 10, 20):
+            np.testing.assert_allclose(dens[j, i], sw.dens0(si[i], ti[j]) - 1000)
+
+
+def test_sigmat_grid_is_cached_and_read_only():
+    first = sbe_ctd_plots.sigmat_grid([28, 34], [-2, 15])
+    second = sbe_ctd_plots.sigmat_grid((28.0, 34.0), (-2.0, 15.0))
+    assert first[2] is second[2]
+    assert not first[2].flags.writeable
+
+
+def test_plot_salvtemp():
+    salt = np.linspace(31, 33, 20)
+    temp = np.linspace(0, 8, 20)
+    fig = sbe_ctd_plots.plot_salvtemp(salt=salt, temp=temp, press=np.arange(20), ptitle="test")
+    assert fig is not None
+    plt.close(fig)
@@ -0,0 +1,48 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+from EcoFOCIpy.plots import TimeSeriesStickPlot
+
+
+@pytest.fixture
+def hourly_currents():
+    """Three years of hourly u/v"""
+    time = pd.date_range("2018-01-01", "2020-12-31 23:00", freq="h")
+    phase = np.arange(len(time)) * 2 * np.pi / 12.42
+    return time, 20 * np.cos(phase), 10 * np.sin(phase) + 2
+
+
+def test_aggregation_interval(hourly_currents):
+    time, _, _ = hourly_currents
+    interval = TimeSeriesStickPlot.aggregation_interval(time, pixel_width=1100)
+    # 1096 days over 550 sticks needs just under 2 days per stick
+    assert interval == "2D"
+    assert TimeSeriesStickPlot.aggregation_interval(time[:100], pixel_width=1100) is None
+
+
+def test_vector_average():
+    time = pd.date_range("2020-01-01", periods=4, freq="30min")
+    agg = TimeSeriesStickPlot.vector_average(time, [1, 3, -2, -2], [0, 0, 1, 3], "1h")
+    assert agg["u"].tolist() == [2.0, -2.0]
+    assert agg["v"].tolist() == [0.0, 2.0]
+    assert agg["mag_max"].iloc[0] == 3.0
+    assert agg["v_min"].iloc[1] == 1.0
+    assert agg.index[0] == pd.Timestamp("2020-01-01 00:15")
+
+
+@pytest.mark.parametrize("options", [{"decimate": True}, {"resample": "1D"}])
+def test_plot_aggregated(hourly_currents, options):
+    time, u, v = hourly_currents
+    plotter = TimeSeriesStickPlot.Timeseries1dStickPlot()
+    _, fig = plotter.plot(timedata=time, udata=u, vdata=v, rotate=0.0, **options)
+    quiver = fig.axes[0].collections[-1]
+    assert len(quiver.get_offsets()) < len(time) / 20
+    # the magnitude is shaded over the min/max envelope of each bin, not down to 0
+    envelope = fig.axes[0].collections[0].get_paths()[0].vertices
+    assert envelope[:, 1].min() > 5
+    plt.close(fig)
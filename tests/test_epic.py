@@ -1,5 +1,7 @@
 import datetime
 
+import numpy as np
+import pandas as pd
 import pytest
 from EcoFOCIpy.epic import EPIC_timeconvert as EPIC
 
@@ -7,17 +9,165 @@ from EcoFOCIpy.epic import EPIC_timeconvert as EPIC
 class TestClassEPICTime:
     def test_1d(self):
         testdate = EPIC.EPIC2Datetime([2440000,],[43200000+3600*1000,])
-        assert testdate == [datetime.datetime(1968, 5, 23, 13, 0)]
+        assert testdate.tolist() == [datetime.datetime(1968, 5, 23, 13, 0)]
 
     def test_2d(self):
         testdate = EPIC.EPIC2Datetime([2440000,2450000],[43200000,0])
-        assert testdate == [datetime.datetime(1968, 5, 23, 12, 0), datetime.datetime(1995, 10, 9, 0, 0)]
+        assert testdate.tolist() == [datetime.datetime(1968, 5, 23, 12, 0), datetime.datetime(1995, 10, 9, 0, 0)]
 
     def test_1d_EPIC(self):
-        testdate = EPIC.Datetime2EPIC(EPIC.EPIC2Datetime([2440000,],[43200000+3600*1000,]))
+        testdate = EPIC.Datetime2EPIC(EPIC.EPIC2Datetime([2440000,],[43200000+3600*1000,]).tolist())
         assert testdate == ([2440000], [46800000])
 
     def test_2d_EPIC(self):
         testdate = EPIC.Datetime2EPIC(EPIC.EPIC2Datetime([2440000,2450000],[43200000,0]))
-        assert testdate == ([2440000,2450000],[43200000,0])
+        np.testing.assert_array_equal(testdate[0], [2440000,2450000])
+        np.testing.assert_array_equal(testdate[1], [43200000,0])
 
+    def test_msec_precision(self):
+        testdate = EPIC.EPIC2Datetime([2450000, 2450000], [1, 86399999])
+        assert testdate[0] == pd.Timestamp('1995-10-09 00:00:00.001')
+        time, time2 = EPIC.Datetime2EPIC(testdate)
+        assert time.tolist() == [2450000, 2450000]
+        assert time2.tolist() == [1, 86399999]
+
+    def test_scalar(self):
+        testdate = EPIC.EPIC2Datetime(2440000, 500)
+        assert testdate == np.datetime64('1968-05-23T00:00:00.500')
+        assert EPIC.Datetime2EPIC(datetime.datetime(1968, 5, 22, 23, 59, 59)) == (2439999, 86399000)
+        assert EPIC.Datetime2EPIC(testdate) == (2440000, 500)
+
+    def test_large_array(self):
+        time = np.full(100000, 2450000) + np.arange(100000) // 24
+        time2 = (np.arange(100000) % 24) * 3600000
+        np.testing.assert_array_equal(
+            EPIC.Datetime2EPIC(EPIC.EPIC2Datetime(time, time2)), (time, time2))
+
+    def test_fill_values(self):
+        time = np.ma.masked_array([2450000, 1e35, 2450000, np.nan, 2450000, 2147483647],
+                                  mask=[0, 0, 1, 0, 0, 0])
+        time2 = [0, 0, 0, 0, 1e35, 0]
+        testdate = EPIC.EPIC2Datetime(time, time2)
+        assert testdate[0] == pd.Timestamp('1995-10-09')
+        assert testdate[1:].isna().all()
+        assert pd.isna(EPIC.EPIC2Datetime(1e35, 1e35))
+
+        udunits = EPIC.get_UDUNITS(testdate, 'days since 1995-10-09')
+        assert udunits[0] == 0
+        assert np.isnan(udunits[1:]).all()
+        assert np.isnan(EPIC.get_UDUNITS(testdate[1:])).all()
+
+        time, time2 = EPIC.Datetime2EPIC(testdate)
+        assert time.tolist() == [2450000] + [EPIC.EPIC_INT_FILL] * 5
+        assert time2.tolist() == [0] + [EPIC.EPIC_INT_FILL] * 5
+        assert EPIC.EPIC2Datetime(time, time2)[1:].isna().all()
+        assert EPIC.Datetime2EPIC(np.datetime64('NaT', 'ms')) == (EPIC.EPIC_INT_FILL,) * 2
+
+    def test_get_UDUNITS(self):
+        testdate = EPIC.EPIC2Datetime([2440000], [43200000])
+        assert EPIC.get_UDUNITS(testdate, 'days since 1968-5-23') == pytest.approx([0.5])
+
+
+
+def write_epic_file(path, start_day=2450000, nrecords=48):
+    """Small PMEL-EPIC mooring file: time/time2 words, lat/lon dims, T_20 and S_41."""
+    import xarray as xr
+    time2 = (np.arange(nrecords) % 24) * 3600000 + 500
+    time = start_day + np.arange(nrecords) // 24
+    dims = ('time', 'depth', 'lat', 'lon')
+    shape = (nrecords, 1, 1, 1)
+    xdf = xr.Dataset(
+        {'time2': ('time', time2.astype(np.int32), {'units': 'msec since 0:00 GMT'}),
+         'T_20': (dims, np.linspace(2, 3, nrecords).reshape(shape), {'epic_code': 20}),
+         'Sal': (dims, np.full(shape, 31.5), {'epic_code': 41}),
+         'ST_70': (dims, np.zeros(shape), {'epic_code': 70})},
+        coords={'time': ('time', time.astype(np.int32), {'units': 'True Julian Day'}),
+                'depth': ('depth', [55.0]),
+                'lat': ('lat', [56.87], {'units': 'degree_north'}),
+                'lon': ('lon', [164.05], {'units': 'degree_west'})},
+        attrs={'MOORING': '16BSM-2A', 'history': 'EPIC archive', 'Conventions': 'PMEL-EPIC',
+               'EPIC_FILE_GENERATOR': 'mmdb', 'COORD_SYSTEM': 'GEOGRAPHICAL',
+               'PROG_CMNT1': 'cat_ctd v1.36'})
+    xdf.to_netcdf(path, format='NETCDF3_CLASSIC')
+    return str(path)
+
+
+INSTRUMENT_YAML = {
+    'time': {'epic_key': 'TIM_601', 'standard_name': 'time'},
+    'depth': {'epic_key': 'D_3', 'units': 'meter'},
+    'temperature': {'epic_key': 'T_20', 'units': 'degree_C',
+                    'encoding': {'dtype': 'float32'}},
+    'salinity': {'epic_key': 'S_41', 'units': 'PSU'},
+}
+
+
+def test_epic_to_cf(tmp_path):
+    import xarray as xr
+    from EcoFOCIpy.epic import epic2cf
+
+    path = write_epic_file(tmp_path / 'epic.nc')
+    with xr.open_dataset(path, decode_times=False) as epic:
+        xdf = epic2cf.epic_to_cf(epic, INSTRUMENT_YAML)
+
+    assert list(xdf.data_vars) == ['temperature', 'salinity']
+    assert xdf['temperature'].dims == ('time', 'depth', 'latitude', 'longitude')
+    assert xdf['time'].values[1] == np.datetime64('1995-10-09T01:00:00.500')
+    assert xdf['longitude'].values[0] == pytest.approx(-164.05)
+    assert xdf['salinity'].attrs == {'epic_key': 'S_41', 'units': 'PSU'}
+    assert xdf.attrs == {'MOORING': '16BSM-2A', 'history': 'EPIC archive',
+                         'Conventions': epic2cf.CF_CONVENTIONS}
+
+
+def test_batch_convert_resumes(tmp_path, capsys):
+    import xarray as xr
+    from EcoFOCIpy.epic import epic2cf
+
+    raw = tmp_path / 'epic'
+    raw.mkdir()
+    files = [write_epic_file(raw / f'mooring{n}.nc', start_day=2450000 + n) for n in range(3)]
+    (raw / 'broken.nc').write_text('not netcdf')
+    files.append(str(raw / 'broken.nc'))
+    out = str(tmp_path / 'cf')
+
+    report = epic2cf.batch_convert(files, out, INSTRUMENT_YAML, max_workers=2)
+    assert report['status'].value_counts().to_dict() == {'converted': 3, 'failed': 1}
+
+    with xr.open_dataset(report['output'].dropna().iloc[0], mask_and_scale=False) as cf:
+        assert cf['temperature'].dtype == np.float32
+        assert cf['temperature_QC'].dtype == np.int8
+        assert cf.attrs['MOORING'] == '16BSM-2A'
+        assert cf.attrs['Conventions'] == epic2cf.CF_CONVENTIONS
+        assert cf.attrs['history'].endswith('Converted from PMEL-EPIC mooring0.nc.')
+
+    # only the failed file is tried again
+    report = epic2cf.batch_convert(files, out, INSTRUMENT_YAML, max_workers=1)
+    assert report['status'].value_counts().to_dict() == {'skipped': 3, 'failed': 1}
+
+
+def test_batch_convert_missing_input(tmp_path):
+    import json
+    import os
+
+    from EcoFOCIpy.epic import epic2cf
+
+    raw = tmp_path / 'epic'
+    raw.mkdir()
+    files = [write_epic_file(raw / f'mooring{n}.nc', start_day=2450000 + n) for n in range(2)]
+    out = str(tmp_path / 'cf')
+
+    missing = str(raw / 'missing.nc')
+    report = epic2cf.batch_convert(files + [missing], out, INSTRUMENT_YAML, max_workers=1)
+    status = dict(zip(report['file'], report['status']))
+    assert status == {os.path.abspath(files[0]): 'converted',
+                      os.path.abspath(files[1]): 'converted', missing: 'failed'}
+    assert 'FileNotFoundError' in report.set_index('file').loc[missing, 'error']
+
+    # a file converted in an earlier run and deleted since
+    os.remove(files[0])
+    report = epic2cf.batch_convert(files, out, INSTRUMENT_YAML, max_workers=1)
+    assert report.set_index('file')['status'].to_dict() == {
+        os.path.abspath(files[0]): 'failed', os.path.abspath(files[1]): 'skipped'}
+    with open(os.path.join(out, epic2cf.MANIFEST)) as f:
+        manifest = json.load(f)
+    assert manifest[os.path.abspath(files[0])]['status'] == 'failed'
+    assert manifest[os.path.abspath(files[0])]['state'] is None
@@ -0,0 +1,51 @@
+"""Import time regression tests, run in a fresh interpreter each"""
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+
+HEAVY = ["matplotlib", "xarray", "requests", "gsw", "seawater", "cftime", "erddapy",
+         "netCDF4", "ctd"]
+
+
+def imported_modules(statement):
+    """Heavy modules present in sys.modules after running statement"""
+    code = (f"import json, sys, warnings\nwarnings.simplefilter('error', UserWarning)\n{statement}\n"
+            f"print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_package_is_light():
+    assert imported_modules("import EcoFOCIpy") == []
+
+
+def test_subpackages_are_lazy():
+    assert imported_modules("import EcoFOCIpy.io, EcoFOCIpy.plots, EcoFOCIpy.math") == []
+
+
+@pytest.mark.parametrize("module", ["EcoFOCIpy.io.nitrates_parser",
+                                    "EcoFOCIpy.math.nitrates_corr"])
+def test_nitrates_defer_matplotlib(module):
+    assert "matplotlib" not in imported_modules(f"import {module}")
+
+
+def test_lazy_attribute_access():
+    assert "xarray" in imported_modules("import EcoFOCIpy\nEcoFOCIpy.io.ncCFsave")
+    with pytest.raises(subprocess.CalledProcessError):
+        imported_modules("import EcoFOCIpy\nEcoFOCIpy.instruments")
+
+
+def test_open_instrument_is_light():
+    # parsers are imported when a file of their kind is opened
+    assert imported_modules("from EcoFOCIpy.io import open_instrument") == []
+
+
+def test_import_time():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import EcoFOCIpy"], check=True)
+    # interpreter start up dominates, the package import itself is a few ms
+    assert time.perf_counter() - start < 5.0
@@ -0,0 +1,58 @@
+import os
+from collections import OrderedDict
+
+import pytest
+from EcoFOCIpy.metaconfig import load_config
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "instrument.yaml"
+    path.write_text("temperature:\n  epic_key: T_20\n  units: degree_C\n"
+                    "salinity:\n  epic_key: S_41\n  flags: [0, 1]\n")
+    return str(path)
+
+
+def test_load_config_ordered(config_file):
+    config = load_config.load_config(config_file)
+    assert isinstance(config, OrderedDict)
+    assert list(config) == ["temperature", "salinity"]
+    assert config["salinity"]["flags"] == [0, 1]
+
+
+def test_load_config_cache_returns_copies(config_file, monkeypatch):
+    first = load_config.load_config(config_file)
+    first["temperature"]["units"] = "changed"
+
+    def no_parse(*args, **kwargs):
+        raise AssertionError("config parsed again")
+
+    monkeypatch.setattr(load_config, "ordered_load", no_parse)
+    second = load_config.load_config(config_file)
+    assert second["temperature"]["units"] == "degree_C"
+
+
+def test_load_config_reloads_modified_file(config_file):
+    load_config.load_config(config_file)
+    with open(config_file, "a") as f:
+        f.write("oxygen:\n  epic_key: O_65\n")
+    stat = os.stat(config_file)
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert "oxygen" in load_config.load_config(config_file)
+
+
+def test_load_config_readonly(config_file):
+    view = load_config.load_config(config_file, readonly=True)
+    assert view["salinity"]["flags"] == (0, 1)
+    with pytest.raises(TypeError):
+        view["temperature"]["units"] = "changed"
+    assert load_config.load_config(config_file, readonly=True) is view
+
+
+def test_load_config_missing(tmp_path):
+    with pytest.raises(RuntimeError):
+        load_config.load_config(str(tmp_path / "missing.yaml"))
+
+
+def test_ordered_loader_built_once():
+    assert load_config.ordered_loader() is load_config.ordered_loader()
@@ -0,0 +1,135 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from EcoFOCIpy import profiling
+from EcoFOCIpy.io import ncCFsave, sbe_parser
+from EcoFOCIpy.testing import synth
+
+
+@pytest.fixture
+def sbe37_file(tmp_path):
+    return synth.sbe37_csv(tmp_path / "sbe37.csv", 2000)
+
+
+def test_disabled_records_nothing(sbe37_file):
+    with profiling.profile() as run:
+        pass
+    sbe_parser.sbe37.parse(sbe37_file)
+    assert not profiling.enabled()
+    assert run.records == []
+
+
+def test_parser_stage(sbe37_file):
+    with profiling.profile() as run:
+        df, header = sbe_parser.sbe37.parse(sbe37_file)
+
+    (record,) = run.records
+    assert record["stage"] == "sbe_parser.sbe37.parse"
+    assert record["rows"] == len(df) == 2000
+    assert record["bytes"] == os.path.getsize(sbe37_file)
+    assert record["wall_time"] > 0
+    assert record["peak_memory"] > 0
+    assert record["error"] is None
+
+
+def test_nested_stages_and_memory():
+    with profiling.profile() as run:
+        with profiling.stage("outer") as outer:
+            with profiling.stage("inner", rows=10**6):
+                data = np.ones(10**6)  # 8 MB
+            del data
+            outer.rows = 5
+
+    inner, outer = run.records
+    assert (inner["stage"], inner["depth"]) == ("inner", 1)
+    assert (outer["stage"], outer["depth"], outer["rows"]) == ("outer", 0, 5)
+    assert inner["peak_memory"] >= 8 * 10**6
+    assert outer["peak_memory"] >= inner["peak_memory"]
+
+
+def test_time_only():
+    with profiling.profile(memory=False) as run:
+        with profiling.stage("work"):
+            pass
+    assert run.records[0]["peak_memory"] is None
+    assert run.records[0]["wall_time"] >= 0
+
+
+def test_failed_stage_is_recorded(tmp_path):
+    with profiling.profile() as run:
+        with pytest.raises(FileNotFoundError):
+            sbe_parser.sbe37.parse(str(tmp_path / "missing.cnv"))
+    assert run.records[0]["error"].startswith("FileNotFoundError")
+    assert run.summary().loc["sbe_parser.sbe37.parse", "errors"] == 1
+
+
+def test_writer_rows_and_bytes(tmp_path):
+    index = pd.date_range("2020-01-01", periods=500, freq="h", name="date_time")
+    df = pd.DataFrame({"temperature": np.linspace(0, 5, 500)}, index=index)
+    filename = str(tmp_path / "out.nc")
+
+    with profiling.profile() as run:
+        nc = ncCFsave.EcoFOCI_CFnc(df=df, operation_type="mooring")
+        nc.expand_dimensions()
+        nc.xarray2netcdf_save(nc.get_xdf(), filename=filename)
+
+    stages = {r["stage"]: r for r in run.records}
+    assert stages["ncCFsave.EcoFOCI_CFnc.expand_dimensions"]["rows"] == 500
+    save = stages["ncCFsave.EcoFOCI_CFnc.xarray2netcdf_save"]
+    assert save["rows"] == 500
+    assert save["bytes"] == os.path.getsize(filename)
+
+
+def test_summary_and_reports(sbe37_file, tmp_path):
+    with profiling.profile() as run:
+        for _ in range(3):
+            sbe_parser.sbe37.parse(sbe37_file)
+        with profiling.stage("qc", rows=100):
+            pass
+
+    summary = run.summary()
+    assert list(summary.index) == ["sbe_parser.sbe37.parse", "qc"]
+    assert summary.loc["sbe_parser.sbe37.parse", "calls"] == 3
+    assert summary.loc["sbe_parser.sbe37.parse", "rows"] == 6000
+    assert "sbe_parser.sbe37.parse" in run.report()
+
+    report = json.loads(open(run.report(str(tmp_path / "profile.json"))).read())
+    assert len(report["stages"]) == 4
+    assert report["summary"][0]["stage"] == "sbe_parser.sbe37.parse"
+
+
+def test_environment_variable(sbe37_file, tmp_path):
+    report = tmp_path / "run.json"
+    env = dict(os.environ, ECOFOCIPY_PROFILE="time", ECOFOCIPY_PROFILE_REPORT=str(report))
+    code = ("from EcoFOCIpy.io import sbe_parser\n"
+            f"sbe_parser.sbe37.parse({sbe37_file!r})")
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+    result = json.loads(report.read_text())
+    assert result["memory"] is False
+    assert result["stages"][0]["stage"] == "sbe_parser.sbe37.parse"
+
+
+def test_environment_variable_skips_workers(tmp_path):
+    env = dict(os.environ, ECOFOCIPY_PROFILE="1",
+               ECOFOCIPY_PROFILE_REPORT=str(tmp_path / "run.json"))
+    code = ("import multiprocessing, tracemalloc\n"
+            "from concurrent.futures import ProcessPoolExecutor\n"
+            "from EcoFOCIpy import profiling\n"
+            "def state():\n"
+            "    return profiling.enabled(), tracemalloc.is_tracing()\n"
+            "if __name__ == '__main__':\n"
+            "    assert state() == (True, True)\n"
+            "    for method in ('spawn', 'fork'):\n"
+            "        context = multiprocessing.get_context(method)\n"
+            "        with ProcessPoolExecutor(1, mp_context=context) as pool:\n"
+            "            assert pool.submit(state).result() == (False, False), method\n"
+            "    assert state() == (True, True)\n")
+    script = tmp_path / "workers.py"
+    script.write_text(code)
+    subprocess.run([sys.executable, str(script)], env=env, check=True, cwd=tmp_path)
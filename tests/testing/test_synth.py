@@ -0,0 +1,133 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+from EcoFOCIpy.io import (adcp_parser, mtr_parser, nitrates_parser, rcm_parser, sbe_parser,
+                          wetlabs_parser)
+from EcoFOCIpy.testing import synth
+
+START = pd.Timestamp("2018-04-30 14:00:00")
+
+
+def expected_index(nrows, interval):
+    return pd.date_range(START, periods=nrows, freq=pd.Timedelta(seconds=interval))
+
+
+@pytest.mark.parametrize("time_word", ["timeJ", "timeJV2", "timeS", "timeK"])
+def test_sbe56_time_words(tmp_path, time_word):
+    path = synth.sbe56_cnv(tmp_path / "sbe56.cnv", 500, interval=60, time_word=time_word)
+    df, header, start_time = sbe_parser.sbe56.parse(path)
+
+    assert start_time == "Apr 30 2018 14:00:00"
+    assert list(df.columns) == ["scan", time_word, "t090C", "flag"]
+    # cnv time words are written to 6 decimals
+    np.testing.assert_allclose(df.index.astype("int64"),
+                               expected_index(500, 60).astype("int64"), atol=0.1e9)
+
+
+@pytest.mark.parametrize("time_word", ["timeJ", "timeJV2", "timeS", "timeK"])
+def test_sbe16_time_words(tmp_path, time_word):
+    path = synth.sbe16_cnv(tmp_path / "sbe16.cnv", 200, time_word=time_word)
+    df, header = sbe_parser.sbe16.parse(path)
+
+    assert df.shape == (200, 6)
+    np.testing.assert_allclose(df.index.astype("int64"),
+                               expected_index(200, 3600).astype("int64"), atol=0.1e9)
+
+
+@pytest.mark.parametrize("pressure", [True, False])
+def test_sbe37_sbe39_ascii(tmp_path, pressure):
+    df, _ = sbe_parser.sbe37.parse(synth.sbe37_csv(tmp_path / "sbe37.csv", 300,
+                                                   pressure=pressure))
+    assert ("pressure" in df.columns) == pressure
+    assert df.index.equals(pd.DatetimeIndex(expected_index(300, 30), name="date_time"))
+
+    df, _ = sbe_parser.sbe39.parse(synth.sbe39_csv(tmp_path / "sbe39.csv", 300,
+                                                   pressure=pressure))
+    assert ("pressure" in df.columns) == pressure
+    assert len(df) == 300
+
+
+def test_sbe26_tid(tmp_path):
+    df = sbe_parser.sbe26.parse(synth.sbe26_tid(tmp_path / "sbe26.tid", 100))
+    assert list(df.columns) == ["pressure", "temperature"]
+    assert df.index[-1] == START + pd.Timedelta(minutes=15 * 99)
+
+
+def test_adcp_files(tmp_path):
+    paths = synth.adcp_files(tmp_path, "14068", nensembles=30, nbins=12)
+    assert set(paths) == {".VEL", ".PG", ".EIN", ".SCA", ".RPT"}
+
+    adcp = adcp_parser.adcp("14068", deployment_dir=tmp_path)
+    vel = adcp.load_vel_file()
+    assert len(vel) == 30 * 12
+    assert vel["bin"].iloc[0] == 12
+    assert len(adcp.load_pg_file()) == len(adcp.load_ein_file()) == 30 * 12
+    assert len(adcp.load_scal_file()) == 30
+    _, setup = adcp.load_rpt_file()
+    assert setup == {"num_of_bins": 12, "bin_length": 200.0, "distance_to_first_bin": 306.0}
+
+
+def test_suna_csv(tmp_path):
+    df = nitrates_parser.Suna().parse(synth.suna_csv(tmp_path / "suna.csv", 50))
+    assert df.shape == (50, 279)
+    assert df["Fit RMSE"].notna().all()
+    assert isinstance(df.index, pd.DatetimeIndex)
+
+
+def test_isus_dat(tmp_path):
+    df = nitrates_parser.read_isus_file(synth.isus_dat(tmp_path / "isus.DAT", 40))
+    assert df.shape == (40, 277)
+    times = nitrates_parser.isus_datetime(df["YYYYDDD"], df["HH.HHHHH"])
+    np.testing.assert_array_equal(times, expected_index(40, 3600).to_numpy())
+
+
+def test_mtr(tmp_path):
+    legacy = mtr_parser.MTR(synth.mtr_legacy(tmp_path / "mtr.txt", 3), "legacy",
+                            mtr_coef=[1.1e-3, 2.4e-4, 1e-7])
+    assert len(legacy.data) == 3 * synth.MTR_BLOCK
+    assert legacy.data.index.is_monotonic_increasing
+
+    duino = mtr_parser.MTR(synth.mtrduino_csv(tmp_path / "mtr.csv", 25), "mtrduino",
+                           mtr_coef=[1.1e-3, 2.4e-4, 1e-7])
+    assert duino.data.shape == (25, 6)
+
+
+def test_wetlabs(tmp_path):
+    df, header = wetlabs_parser.wetlabs().parse(
+        synth.wetlabs_txt(tmp_path / "eco.txt", 100, channels=(700, 695)))
+    assert list(df.columns) == ["700", "695", "TempCount"]
+
+    df, _ = wetlabs_parser.wetlabs().parse(
+        synth.wetlabs_txt(tmp_path / "par.txt", 100, channels=None))
+    assert list(df.columns) == ["PAR"]
+
+
+@pytest.mark.parametrize("channels,time_format", [(8, 0), (7, 1), (6, 0)])
+def test_rcm(tmp_path, channels, time_format):
+    df = rcm_parser.rcm().parse(
+        synth.rcm_dat(tmp_path / "rcm.dat", 48, number_of_channels=channels,
+                      time_format=time_format),
+        number_of_channels=channels, time_format=time_format)
+    assert df.notna().all().all()
+    assert df.index.equals(pd.DatetimeIndex(expected_index(48, 3600), name="date_time"))
+
+
+def test_chunking_keeps_layout_and_times(tmp_path):
+    whole, _ = sbe_parser.sbe37.parse(synth.sbe37_csv(tmp_path / "a.csv", 1000))
+    chunked, _ = sbe_parser.sbe37.parse(synth.sbe37_csv(tmp_path / "b.csv", 1000,
+                                                        chunk_rows=64))
+    assert chunked.index.equals(whole.index)
+    assert list(chunked.columns) == list(whole.columns)
+
+
+def test_memory_does_not_grow_with_rows(tmp_path):
+    def peak(nrows):
+        tracemalloc.start()
+        synth.sbe56_cnv(tmp_path / "sbe56.cnv", nrows, chunk_rows=1000)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak_bytes
+
+    assert peak(100_000) < 2 * peak(2_000)